@@ -0,0 +1,21 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+
+class AuthenticationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.authentication'
+    label = 'authentication'
+
+    def ready(self):
+        from . import policy, user_cache
+        from .models import Business, Role, User
+
+        post_save.connect(user_cache.user_changed, sender=User)
+        post_delete.connect(user_cache.user_changed, sender=User)
+        # Role and Business deletes detach their users, so collect them beforehand
+        for model, handler in ((Role, user_cache.role_changed), (Business, user_cache.business_changed)):
+            post_save.connect(handler, sender=model)
+            pre_delete.connect(handler, sender=model)
+        post_save.connect(policy.role_changed, sender=Role)
+        post_delete.connect(policy.role_changed, sender=Role)
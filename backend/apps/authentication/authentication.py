@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .tokens import (
+    BUSINESS_ADMIN_CLAIM, BUSINESS_CLAIM, CLAIMS, ROLE_CLAIM, VERSION_CLAIM, compute_token_version, get_token_version
+)
+from .user_cache import get_cached_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user, role and business in one query
+    and keeps the result in the auth cache, so steady-state requests make no
+    authentication queries. Entries are dropped whenever the user, their role
+    or their business is saved.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
+
+
+class RoleClaim:
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class ClaimsUser:
+    """
+    Stand-in for the User built from token claims. It exposes pk/id,
+    business_id, is_business_admin and role.name; touching anything else
+    loads the full (cached) user and delegates to it.
+    """
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+
+    def __init__(self, user_id, token):
+        self.pk = self.id = user_id
+        self.business_id = token[BUSINESS_CLAIM]
+        self.is_business_admin = token[BUSINESS_ADMIN_CLAIM]
+        self.role = RoleClaim(token[ROLE_CLAIM]) if token[ROLE_CLAIM] else None
+
+    def get_full_user(self):
+        user = self.__dict__.get('_user')
+        if user is None:
+            user = get_cached_user(self.pk)
+            if user is None:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            self._user = user
+        return user
+
+    def __getattr__(self, name):
+        # Only called for attributes not set above
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.get_full_user(), name)
+
+    def __eq__(self, other):
+        return isinstance(other, (ClaimsUser, get_user_model())) and other.pk == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return str(self.get_full_user())
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    For safe methods, trusts the business/role claims of a token whose
+    version still matches the user's current token version (held in the auth
+    cache), and returns a ClaimsUser without loading the user. Other methods,
+    and tokens issued without the claims, get the full user as before.
+    """
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if request.method in SAFE_METHODS and all(claim in validated_token for claim in CLAIMS):
+            return self.get_claims_user(validated_token), validated_token
+        return self.check_version(self.get_user(validated_token), validated_token), validated_token
+
+    def get_claims_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        version = get_token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if version != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed(_('Token is out of date, refresh it'), code='token_outdated')
+        return ClaimsUser(int(user_id), validated_token)
+
+    def check_version(self, user, validated_token):
+        if VERSION_CLAIM in validated_token and validated_token[VERSION_CLAIM] != compute_token_version(user):
+            raise AuthenticationFailed(_('Token is out of date, refresh it'), code='token_outdated')
+        return user
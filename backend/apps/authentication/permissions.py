@@ -1,4 +1,29 @@
 from rest_framework import permissions
+from .policy import registry as policy_registry, user_has_permission
+
+NO_PERMISSIONS = {}
+
+
+class RolePolicyPermission(permissions.BasePermission):
+    """
+    Checks the view's `action_permissions` ({view action: permission name})
+    against the compiled role policy (see policy.py). Actions without an
+    entry only require authentication unless listed in `public_actions`.
+    """
+    def has_permission(self, request, view):
+        action = view.action
+        if action in getattr(view, 'public_actions', ()):
+            return True
+        user = request.user
+        if not user.is_authenticated:
+            return False
+        permission = getattr(view, 'action_permissions', NO_PERMISSIONS).get(action)
+        if permission is None:
+            return True
+        # user_has_permission() inlined: this runs on every request
+        role = user.role
+        return role is not None and role.name in policy_registry.table().get(permission, ())
+
 
 class HasRolePermission(permissions.BasePermission):
     """
@@ -7,22 +32,15 @@ class HasRolePermission(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        
-        # Define permission mappings
-        required_permissions = {
-            'create_product': ['admin', 'editor'],
-            'edit_product': ['admin', 'editor'],
-            'approve_product': ['admin', 'approver'],
-            'delete_product': ['admin'],
-            'manage_users': ['admin'],
-        }
-        
+
         action = getattr(view, 'action_permission', None)
         if not action:
             return True
-            
-        return request.user.role.name in required_permissions.get(action, [])
+
+        return user_has_permission(request.user, action)
 
 class IsBusinessAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and (request.user.is_business_admin or request.user.role.name == 'admin')
+        return request.user.is_authenticated and (
+            request.user.is_business_admin or user_has_permission(request.user, 'manage_users')
+        )
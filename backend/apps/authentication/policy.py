@@ -0,0 +1,112 @@
+"""
+Role policies compiled into a frozen permission -> roles lookup table.
+
+A role's policy is DEFAULT_ROLE_POLICIES[role name] adjusted by
+Role.permissions, which may be either
+  - a list of permission names, replacing the defaults, or
+  - a dict of permission name -> bool, granting or revoking on top of them.
+
+The table is compiled on first use, kept for the life of the process and
+dropped when a Role is saved or deleted. Other processes notice through a
+version number in the shared cache, checked at most every
+AUTH_POLICY_CHECK_INTERVAL seconds.
+"""
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+PERMISSIONS = ('create_product', 'edit_product', 'delete_product', 'approve_product', 'manage_users')
+
+DEFAULT_ROLE_POLICIES = {
+    'admin': PERMISSIONS,
+    'editor': ('create_product', 'edit_product'),
+    'approver': ('create_product', 'edit_product', 'approve_product'),
+    'viewer': (),
+}
+
+POLICY_VERSION_KEY = 'auth:policy:version'
+
+
+def get_policy_cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def resolve_role_permissions(name, permissions):
+    granted = set(DEFAULT_ROLE_POLICIES.get(name, ()))
+    if isinstance(permissions, (list, tuple)):
+        granted = set(permissions)
+    elif isinstance(permissions, dict):
+        for permission, allowed in permissions.items():
+            if allowed:
+                granted.add(permission)
+            else:
+                granted.discard(permission)
+    return granted
+
+
+def compile_policy(roles):
+    """
+    roles: iterable of (name, permissions JSON). Default roles missing from it
+    keep their default policy. Returns a read-only mapping of permission ->
+    frozenset of role names holding it.
+    """
+    policies = {name: None for name in DEFAULT_ROLE_POLICIES}
+    policies.update(roles)
+    table = {}
+    for name, permissions in policies.items():
+        for permission in resolve_role_permissions(name, permissions):
+            table.setdefault(permission, set()).add(name)
+    return MappingProxyType({permission: frozenset(names) for permission, names in table.items()})
+
+
+class PolicyRegistry:
+    def __init__(self):
+        self._table = None
+        self._version = None
+        self._fresh_until = 0.0
+        self._lock = threading.Lock()
+
+    def table(self):
+        table = self._table
+        if table is not None and time.monotonic() < self._fresh_until:
+            return table
+        with self._lock:
+            version = get_policy_cache().get(POLICY_VERSION_KEY, 0)
+            if self._table is None or version != self._version:
+                from .models import Role
+                self._table = compile_policy(Role.objects.values_list('name', 'permissions'))
+                self._version = version
+            self._fresh_until = time.monotonic() + getattr(settings, 'AUTH_POLICY_CHECK_INTERVAL', 5)
+            return self._table
+
+    def invalidate(self):
+        with self._lock:
+            self._table = None
+        cache = get_policy_cache()
+        if not cache.add(POLICY_VERSION_KEY, 1, timeout=None):
+            try:
+                cache.incr(POLICY_VERSION_KEY)
+            except ValueError:
+                cache.set(POLICY_VERSION_KEY, 1, timeout=None)
+
+
+registry = PolicyRegistry()
+
+
+def role_has_permission(role_name, permission):
+    return role_name in registry.table().get(permission, ())
+
+
+def user_has_permission(user, permission):
+    role = getattr(user, 'role', None)
+    return role is not None and role_has_permission(role.name, permission)
+
+
+def role_changed(sender, **kwargs):
+    # Now, and again once the change is visible to the connection that recompiles
+    registry.invalidate()
+    transaction.on_commit(registry.invalidate)
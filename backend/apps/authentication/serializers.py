@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from .models import Business, Role
+from .tokens import set_claims
 
 User = get_user_model()
 
@@ -65,3 +69,35 @@ class RegisterSerializer(serializers.ModelSerializer):
             is_business_admin=True
         )
         return user
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Adds the business, role and token version claims (see tokens.py)."""
+    @classmethod
+    def get_token(cls, user):
+        return set_claims(super().get_token(user), user)
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-issues the claims from the current user, so a refresh after a role or
+    business change yields an access token that passes the version check.
+    """
+    default_error_messages = {
+        'no_active_account': 'No active account found for the given token.'
+    }
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.select_related('role').filter(
+            **{jwt_settings.USER_ID_FIELD: refresh.payload.get(jwt_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        set_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
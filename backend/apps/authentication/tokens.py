@@ -0,0 +1,51 @@
+"""
+Custom JWT claims that let safe requests authenticate without loading the user.
+
+Tokens carry the user's business id, role name and is_business_admin, plus a
+token version: a short hash of every user field the claims (or the token's
+validity) depend on. The current version of each user is kept in the auth
+cache and dropped together with the cached user, so a role change, business
+move, deactivation or password change invalidates outstanding access tokens
+on their next use; clients then refresh and receive fresh claims.
+"""
+import hashlib
+
+from django.conf import settings
+
+from .user_cache import get_cached_user, get_user_cache, token_version_key
+
+BUSINESS_CLAIM = 'business_id'
+ROLE_CLAIM = 'role'
+BUSINESS_ADMIN_CLAIM = 'is_business_admin'
+VERSION_CLAIM = 'tv'
+CLAIMS = (BUSINESS_CLAIM, ROLE_CLAIM, BUSINESS_ADMIN_CLAIM, VERSION_CLAIM)
+
+def compute_token_version(user):
+    role = user.role.name if user.role_id else ''
+    state = f'{user.business_id}|{role}|{user.is_business_admin}|{user.is_active}|{user.password}'
+    return hashlib.blake2b(state.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def get_token_version(user_id):
+    """
+    Current token version for user_id, or None if the user does not exist.
+    Served from the auth cache; a miss costs at most one query.
+    """
+    cache = get_user_cache()
+    key = token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        user = get_cached_user(user_id)
+        if user is None:
+            return None
+        version = compute_token_version(user)
+        cache.set(key, version, getattr(settings, 'AUTH_TOKEN_VERSION_TTL', 86400))
+    return version
+
+
+def set_claims(token, user):
+    token[BUSINESS_CLAIM] = user.business_id
+    token[ROLE_CLAIM] = user.role.name if user.role_id else None
+    token[BUSINESS_ADMIN_CLAIM] = user.is_business_admin
+    token[VERSION_CLAIM] = compute_token_version(user)
+    return token
@@ -1,10 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
-from .views import RegisterView, me, UserViewSet, RoleViewSet
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import LoginView, RegisterView, me, UserViewSet, RoleViewSet
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
@@ -13,7 +10,7 @@ router.register(r'roles', RoleViewSet, basename='role')
 urlpatterns = [
     path('', include(router.urls)),
     path('register/', RegisterView.as_view(), name='auth_register'),
-    path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('login/', LoginView.as_view(), name='token_obtain_pair'),
     path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('me/', me, name='auth_me'),
 ]
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+
+USER_CACHE_PREFIX = 'auth:user'
+TOKEN_VERSION_PREFIX = 'auth:token_version'
+INVALIDATION_CHUNK_SIZE = 500
+
+
+def get_user_cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def user_cache_key(user_id):
+    return f'{USER_CACHE_PREFIX}:{user_id}'
+
+
+def token_version_key(user_id):
+    return f'{TOKEN_VERSION_PREFIX}:{user_id}'
+
+
+def load_user(user_id):
+    """
+    Load a user together with its role and business in a single query.
+    """
+    User = get_user_model()
+    return User.objects.select_related('role', 'business').filter(pk=user_id).first()
+
+
+def get_cached_user(user_id):
+    """
+    Return the user for user_id from the auth cache, loading it on a miss.
+    Returns None if the user does not exist.
+    """
+    cache = get_user_cache()
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = load_user(user_id)
+        if user is not None:
+            cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+    return user
+
+
+def invalidate_users(user_ids):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    def delete():
+        cache = get_user_cache()
+        for start in range(0, len(user_ids), INVALIDATION_CHUNK_SIZE):
+            chunk = user_ids[start:start + INVALIDATION_CHUNK_SIZE]
+            keys = [user_cache_key(user_id) for user_id in chunk]
+            # Token versions are derived from the user, so they go too
+            keys += [token_version_key(user_id) for user_id in chunk]
+            cache.delete_many(keys)
+
+    # Delete now, and again once the write is visible to other connections, so a
+    # concurrent request cannot re-cache the old row in between.
+    delete()
+    transaction.on_commit(delete)
+
+
+def user_changed(sender, instance, **kwargs):
+    invalidate_users([instance.pk])
+
+
+def role_changed(sender, instance, **kwargs):
+    User = get_user_model()
+    invalidate_users(User.objects.filter(role_id=instance.pk).values_list('pk', flat=True).iterator())
+
+
+def business_changed(sender, instance, **kwargs):
+    User = get_user_model()
+    invalidate_users(User.objects.filter(business_id=instance.pk).values_list('pk', flat=True).iterator())
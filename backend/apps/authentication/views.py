@@ -1,6 +1,7 @@
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
 from .serializers import RegisterSerializer, UserSerializer, RoleSerializer
 from .permissions import IsBusinessAdmin
@@ -13,12 +14,16 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = (permissions.AllowAny,)
     serializer_class = RegisterSerializer
 
+class LoginView(TokenObtainPairView):
+    # Slows down password guessing; see core/throttling.py
+    throttle_scope = 'login'
+
 class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [IsBusinessAdmin]
 
     def get_queryset(self):
-        return User.objects.filter(business=self.request.user.business)
+        return User.objects.filter(business_id=self.request.user.business_id).select_related('business', 'role')
 
     def perform_create(self, serializer):
         # Allow passing role name when creating user
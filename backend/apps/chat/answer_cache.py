@@ -0,0 +1,108 @@
+"""
+In-process LRU + TTL cache of chatbot answers.
+
+Entries are keyed on (business, normalized question, digest of the earlier
+turns sent with it, catalog version), so a follow-up such as "how much is
+it?" is only reused within the same conversation context. The catalog version comes from the shared cache and changes whenever any of the
+business's products is written, so stale answers are never served after a
+catalog change, in any process; they simply age out of the LRU.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .retrieval import TOKEN_RE
+
+# Words that never change what is asked; unlike retrieval's stop words this
+# keeps interrogatives, so "where is the lamp" and "why is the lamp" differ
+FILLER_WORDS = frozenset('a an the please'.split())
+
+
+def normalize_message(message):
+    """Casefolded word tokens without punctuation or filler words."""
+    return ' '.join(token for token in TOKEN_RE.findall(message.casefold()) if token not in FILLER_WORDS)
+
+
+def turns_digest(turns):
+    """Digest of the earlier turns the model sees alongside a question"""
+    pairs = [(turn['user_message'], turn['ai_response']) for turn in turns]
+    return hashlib.sha256(json.dumps(pairs).encode()).hexdigest()
+
+
+class AnswerCache:
+    def __init__(self, max_entries=1000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.reset_metrics()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    global _cache
+    max_entries = getattr(settings, 'CHAT_ANSWER_CACHE_MAX_ENTRIES', 1000)
+    ttl = getattr(settings, 'CHAT_ANSWER_CACHE_TTL', 3600)
+    with _cache_lock:
+        if _cache is None or (_cache.max_entries, _cache.ttl) != (max_entries, ttl):
+            _cache = AnswerCache(max_entries, ttl)
+        return _cache
+
+
+def answer_key(business_id, message, catalog_version, turns=()):
+    normalized = normalize_message(message)
+    if not normalized:
+        return None
+    return (business_id, normalized, turns_digest(turns), catalog_version)
@@ -0,0 +1,20 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+
+
+class ChatConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.chat'
+    label = 'chat'
+
+    def ready(self):
+        from apps.products.models import Product
+        from apps.products.signals import products_bulk_changed
+        from . import retrieval, window
+        from .models import ChatHistory
+
+        # Connected after apps.products, so the catalog version is bumped first
+        post_save.connect(retrieval.product_saved, sender=Product)
+        post_delete.connect(retrieval.product_deleted, sender=Product)
+        products_bulk_changed.connect(retrieval.products_bulk_changed)
+        post_save.connect(window.message_saved, sender=ChatHistory)
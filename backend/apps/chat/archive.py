@@ -0,0 +1,188 @@
+"""
+Compact storage tier for old chat messages.
+
+archive_batch() moves ChatHistory rows older than a cutoff into
+ChatArchiveSegment rows: runs of up to CHAT_ARCHIVE_SEGMENT_SIZE messages of
+one user, stored as zlib-compressed JSON. Archival moves forward in time, so
+every archived message of a user is older than their remaining hot messages.
+ChatTimeline and seek_archive() read both tiers as one newest-first history.
+"""
+import json
+import zlib
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils.dateparse import parse_datetime
+
+from .models import ChatArchiveSegment, ChatHistory
+
+ARCHIVED_FIELDS = ('id', 'user_id', 'business_id', 'user_message', 'ai_response', 'timestamp')
+
+
+def get_segment_size():
+    return getattr(settings, 'CHAT_ARCHIVE_SEGMENT_SIZE', 500)
+
+
+def encode_messages(rows):
+    payload = [[row['id'], row['timestamp'].isoformat(), row['user_message'], row['ai_response']] for row in rows]
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def decode_segment(segment):
+    """The segment's messages as unsaved ChatHistory instances, oldest first."""
+    payload = json.loads(zlib.decompress(bytes(segment.data)).decode('utf-8'))
+    return [
+        ChatHistory(
+            id=pk, user_id=segment.user_id, business_id=segment.business_id,
+            user_message=user_message, ai_response=ai_response, timestamp=parse_datetime(timestamp)
+        )
+        for pk, timestamp, user_message, ai_response in payload
+    ]
+
+
+def _segment(user_id, business_id, rows):
+    return ChatArchiveSegment(
+        user_id=user_id, business_id=business_id,
+        first_timestamp=rows[0]['timestamp'], first_message_id=rows[0]['id'],
+        last_timestamp=rows[-1]['timestamp'], last_message_id=rows[-1]['id'],
+        message_count=len(rows), data=encode_messages(rows),
+    )
+
+
+def _rows(messages):
+    return [{field: getattr(message, field) for field in ARCHIVED_FIELDS} for message in messages]
+
+
+def archive_batch(cutoff, batch_size=5000, segment_size=None):
+    """
+    Archive up to batch_size messages older than cutoff in one transaction.
+    A user's last partial segment is topped up before new ones are started.
+    Returns the number of messages archived.
+    """
+    segment_size = segment_size or get_segment_size()
+    with transaction.atomic():
+        rows = list(
+            ChatHistory.objects.filter(timestamp__lt=cutoff)
+            .order_by('user_id', 'business_id', 'timestamp', 'id')
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        created, updated = [], []
+        for (user_id, business_id), group in groupby(rows, key=lambda row: (row['user_id'], row['business_id'])):
+            group = list(group)
+            tail = (
+                ChatArchiveSegment.objects.select_for_update()
+                .filter(user_id=user_id, business_id=business_id, message_count__lt=segment_size)
+                .order_by('-last_timestamp', '-last_message_id').first()
+            )
+            if tail is not None and (tail.last_timestamp, tail.last_message_id) < (group[0]['timestamp'], group[0]['id']):
+                merged = _rows(decode_segment(tail)) + group[:segment_size - tail.message_count]
+                group = group[segment_size - tail.message_count:]
+                replacement = _segment(user_id, business_id, merged)
+                replacement.pk = tail.pk
+                updated.append(replacement)
+            for start in range(0, len(group), segment_size):
+                created.append(_segment(user_id, business_id, group[start:start + segment_size]))
+
+        ChatArchiveSegment.objects.bulk_create(created)
+        if updated:
+            ChatArchiveSegment.objects.bulk_update(updated, [
+                'last_timestamp', 'last_message_id', 'message_count', 'data'
+            ])
+        ChatHistory.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def seek_archive(segments, position, descending, limit):
+    """
+    Up to `limit` archived messages strictly past `position` ((timestamp, id),
+    or None for the start) in timeline order, from the segments queryset.
+    """
+    if descending:
+        if position is not None:
+            value, pk = position
+            segments = segments.filter(Q(first_timestamp__lt=value) | Q(first_timestamp=value, first_message_id__lt=pk))
+        segments = segments.order_by('-last_timestamp', '-last_message_id')
+    else:
+        if position is not None:
+            value, pk = position
+            segments = segments.filter(Q(last_timestamp__gt=value) | Q(last_timestamp=value, last_message_id__gt=pk))
+        segments = segments.order_by('first_timestamp', 'first_message_id')
+
+    results = []
+    for segment in segments.iterator(chunk_size=8):
+        messages = decode_segment(segment)
+        if descending:
+            messages.reverse()
+        if position is not None:
+            value, pk = position
+            if descending:
+                messages = [m for m in messages if (m.timestamp, m.id) < (value, pk)]
+            else:
+                messages = [m for m in messages if (m.timestamp, m.id) > (value, pk)]
+        results.extend(messages)
+        if len(results) >= limit:
+            break
+    return results[:limit]
+
+
+class ChatTimeline:
+    """
+    Read-only, newest-first sequence over a hot ChatHistory queryset followed
+    by the matching archive segments, sliceable like a queryset so Django's
+    Paginator can page across both tiers.
+    """
+    def __init__(self, queryset, segments):
+        self.queryset = queryset.order_by('-timestamp', '-id')
+        self.segments = segments
+        self._hot_count = None
+        self._count = None
+
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.queryset.count()
+        return self._hot_count
+
+    def count(self):
+        if self._count is None:
+            archived = self.segments.aggregate(total=Sum('message_count'))['total'] or 0
+            self._count = self.hot_count() + archived
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError('ChatTimeline only supports slicing')
+        start, stop = key.start or 0, key.stop if key.stop is not None else self.count()
+        hot = self.hot_count()
+        results = []
+        if start < hot:
+            results = list(self.queryset[start:min(stop, hot)])
+        if stop > hot:
+            results.extend(self._archived(max(start - hot, 0), stop - hot))
+        return results
+
+    def _archived(self, start, stop):
+        """Archived messages start..stop (offsets past the hot rows)."""
+        wanted, first_offset, offset = [], None, 0
+        ordered = self.segments.order_by('-last_timestamp', '-last_message_id')
+        for pk, count in ordered.values_list('pk', 'message_count').iterator():
+            if offset >= stop:
+                break
+            if offset + count > start:
+                wanted.append(pk)
+                first_offset = offset if first_offset is None else first_offset
+            offset += count
+        if not wanted:
+            return []
+        loaded = ChatArchiveSegment.objects.in_bulk(wanted)
+        messages = []
+        for pk in wanted:
+            messages.extend(reversed(decode_segment(loaded[pk])))
+        return messages[start - first_offset:stop - first_offset]
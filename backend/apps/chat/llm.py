@@ -0,0 +1,135 @@
+"""
+Server-side chat completions against an OpenAI-compatible endpoint
+(OpenRouter by default).
+
+One AsyncOpenAI client is kept per event loop so its HTTP connections are
+pooled across requests. Each business may run at most
+CHAT_LLM_MAX_CONCURRENCY completions at a time, counted in
+CHAT_LLM_SLOT_CACHE_ALIAS with atomic incr/decr so the limit holds under
+WSGI and ASGI alike, and across workers when that cache is shared (Redis or
+Memcached; LocMemCache limits each process separately).
+"""
+import asyncio
+import json
+import weakref
+
+from django.conf import settings
+from django.core.cache import caches
+from openai import AsyncOpenAI
+
+SYSTEM_PROMPT = (
+    'You are a helpful product assistant for a marketplace business. '
+    'You have access to the following products from this business (in JSON format):\n'
+    '{products}\n\n'
+    "Please answer the user's question based on these products. "
+    'If a product is found, describe it including its price. '
+    "If you cannot find relevant information, politely say you don't have that information. "
+    'Be concise and helpful.'
+)
+
+# How often a request waiting for a completion slot checks again
+SLOT_POLL_INTERVAL = 0.05
+
+_clients = weakref.WeakKeyDictionary()
+
+
+class BusinessBusy(Exception):
+    pass
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(
+            base_url=settings.CHAT_LLM_BASE_URL,
+            api_key=settings.CHAT_LLM_API_KEY or 'missing',
+            timeout=getattr(settings, 'CHAT_LLM_TIMEOUT', 60),
+            max_retries=getattr(settings, 'CHAT_LLM_MAX_RETRIES', 1),
+            default_headers={'X-Title': 'Product Marketplace'},
+        )
+        _clients[loop] = client
+    return client
+
+
+def get_slot_cache():
+    return caches[getattr(settings, 'CHAT_LLM_SLOT_CACHE_ALIAS', 'default')]
+
+
+def _slot_ttl():
+    # Counts leaked by a crashed worker expire once the business goes quiet
+    return max(60, 2 * int(getattr(settings, 'CHAT_LLM_TIMEOUT', 60)))
+
+
+class Slot:
+    """A held completion slot. release() may be called more than once."""
+    def __init__(self, key):
+        self.key = key
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        try:
+            get_slot_cache().decr(self.key)
+        except ValueError:
+            # The counter expired while the slot was held
+            pass
+
+
+async def acquire_slot(business_id):
+    """
+    Wait up to CHAT_LLM_QUEUE_TIMEOUT seconds for one of the business's
+    completion slots. Returns the Slot to release; raises BusinessBusy.
+    """
+    cache = get_slot_cache()
+    key = f'chat:llm:slots:{business_id}'
+    limit = getattr(settings, 'CHAT_LLM_MAX_CONCURRENCY', 4)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, 'CHAT_LLM_QUEUE_TIMEOUT', 5)
+    while True:
+        if await cache.aadd(key, 1, _slot_ttl()):
+            held = 1
+        else:
+            try:
+                held = await cache.aincr(key)
+            except ValueError:
+                continue
+            await cache.atouch(key, _slot_ttl())
+        if held <= limit:
+            return Slot(key)
+        try:
+            await cache.adecr(key)
+        except ValueError:
+            pass
+        if loop.time() >= deadline:
+            raise BusinessBusy(business_id)
+        await asyncio.sleep(SLOT_POLL_INTERVAL)
+
+
+def build_messages(message, products, turns):
+    messages = [{'role': 'system', 'content': SYSTEM_PROMPT.format(products=json.dumps(products))}]
+    for turn in turns:
+        messages.append({'role': 'user', 'content': turn['user_message']})
+        messages.append({'role': 'assistant', 'content': turn['ai_response']})
+    messages.append({'role': 'user', 'content': message})
+    return messages
+
+
+async def stream_completion(messages):
+    """Yield the completion's text deltas as they arrive."""
+    stream = await get_client().chat.completions.create(
+        model=settings.CHAT_LLM_MODEL,
+        messages=messages,
+        temperature=getattr(settings, 'CHAT_LLM_TEMPERATURE', 0.7),
+        max_tokens=getattr(settings, 'CHAT_LLM_MAX_TOKENS', 500),
+        stream=True,
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # Hands the connection back to the pool even if the client went away
+        await stream.close()
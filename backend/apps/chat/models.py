@@ -11,4 +11,27 @@ class ChatHistory(models.Model):
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['business', 'timestamp']),
+            models.Index(fields=['user', 'timestamp', 'id'], name='chat_hist_user_ts_id_idx'),
+        ]
+
+
+class ChatArchiveSegment(models.Model):
+    """
+    A run of one user's archived chat messages, oldest first, stored as
+    zlib-compressed JSON. Written by the archive_chat_history command.
+    """
+    user = models.ForeignKey('authentication.User', on_delete=models.CASCADE, related_name='chat_archive_segments')
+    business = models.ForeignKey('authentication.Business', on_delete=models.CASCADE, related_name='chat_archive_segments')
+    first_timestamp = models.DateTimeField()
+    first_message_id = models.BigIntegerField()
+    last_timestamp = models.DateTimeField()
+    last_message_id = models.BigIntegerField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'last_timestamp', 'last_message_id'], name='chat_arch_user_last_idx'),
+            models.Index(fields=['user', 'first_timestamp', 'first_message_id'], name='chat_arch_user_first_idx'),
         ]
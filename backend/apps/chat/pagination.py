@@ -0,0 +1,42 @@
+from asgiref.sync import sync_to_async
+
+from core.pagination import KeysetPagination, PageNumberOrKeysetPagination
+from .archive import ChatTimeline, seek_archive
+
+
+class ArchiveKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination that continues from the hot rows into the view's
+    archive segments. Archived messages are older than every hot one, so the
+    two tiers are simply concatenated in timeline order.
+    """
+    def get_rows(self, queryset, position, descending, limit, view=None):
+        if self.field != 'timestamp':
+            return super().get_rows(queryset, position, descending, limit, view)
+        segments = view.get_archive_queryset()
+        if descending:
+            rows = super().get_rows(queryset, position, descending, limit, view)
+            if len(rows) < limit:
+                rows += seek_archive(segments, position, descending, limit - len(rows))
+            return rows
+        rows = seek_archive(segments, position, descending, limit)
+        if len(rows) < limit:
+            rows += super().get_rows(queryset, position, descending, limit - len(rows), view)
+        return rows
+
+    async def aget_rows(self, queryset, position, descending, limit, view=None):
+        # Archive reads decode segments, so the whole seek runs in one worker thread
+        return await sync_to_async(self.get_rows)(queryset, position, descending, limit, view)
+
+
+class ChatHistoryPagination(PageNumberOrKeysetPagination):
+    """
+    PageNumberOrKeysetPagination across the hot table and the archive, for
+    views that define get_archive_queryset().
+    """
+    keyset_class = ArchiveKeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(ChatTimeline(queryset, view.get_archive_queryset()), request, view)
@@ -0,0 +1,241 @@
+"""
+Per-business BM25 index over products, used to pick the handful of products
+that are relevant to a chat message instead of sending the whole catalog to
+the model.
+
+Indexes live in process memory. They are built lazily from the database on
+first use, updated in place when this process saves or deletes a product, and
+rebuilt when the business's catalog version (bumped by any process on every
+product write) no longer matches or the index is older than
+CHAT_RETRIEVAL_MAX_AGE.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.products.cache import get_catalog_version, own_version_run
+from apps.products.models import Product
+from apps.products.rows import format_decimal
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+STOP_WORDS = frozenset(
+    'a an and are as at be but by can do does for from have how i in is it me my of on or '
+    'please show tell than that the their there these this to was what when where which '
+    'who why will with you your'.split()
+)
+SNIPPET_LENGTH = 200
+# Name terms count this many times as much as description terms
+NAME_WEIGHT = 3
+INDEXED_FIELDS = ('id', 'name', 'description', 'price', 'status')
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def project(product):
+    """Compact projection returned to callers; product is a dict of INDEXED_FIELDS."""
+    description = product['description']
+    if len(description) > SNIPPET_LENGTH:
+        description = description[:SNIPPET_LENGTH].rsplit(' ', 1)[0] + '...'
+    return {
+        'id': product['id'],
+        'name': product['name'],
+        'price': format_decimal(product['price']),
+        'status': product['status'],
+        'description': description,
+    }
+
+
+class BM25Index:
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {doc id: term frequency}
+        self.lengths = {}
+        self.terms = {}
+        self.records = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, doc_id, record, text_fields):
+        if doc_id in self.lengths:
+            self.remove(doc_id)
+        name, description = text_fields
+        counts = Counter(tokenize(description))
+        for token in tokenize(name):
+            counts[token] += NAME_WEIGHT
+        length = sum(counts.values())
+        for term, frequency in counts.items():
+            self.postings[term][doc_id] = frequency
+        self.lengths[doc_id] = length
+        self.terms[doc_id] = tuple(counts)
+        self.records[doc_id] = record
+        self.total_length += length
+
+    def remove(self, doc_id):
+        if doc_id not in self.lengths:
+            return
+        for term in self.terms.pop(doc_id):
+            postings = self.postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(doc_id)
+        del self.records[doc_id]
+
+    def search(self, query, k=5, status=None, max_df_ratio=0.5, prune_above=1000):
+        """
+        Return up to k (score, record) pairs, best first. In indexes larger
+        than prune_above, terms that appear in more than max_df_ratio of the
+        documents are skipped when rarer terms are present: they barely move
+        the ranking but dominate the cost.
+        """
+        count = len(self.lengths)
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term in self.postings]
+        if not count or not terms:
+            return []
+        if count > prune_above:
+            selective = [term for term in terms if len(self.postings[term]) <= count * max_df_ratio]
+            terms = selective or terms
+
+        average_length = self.total_length / count
+        k1, b = self.k1, self.b
+        scores = defaultdict(float)
+        for term in terms:
+            postings = self.postings[term]
+            df = len(postings)
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            lengths = self.lengths
+            for doc_id, frequency in postings.items():
+                norm = k1 * (1 - b + b * lengths[doc_id] / average_length)
+                scores[doc_id] += idf * frequency * (k1 + 1) / (frequency + norm)
+
+        if status:
+            candidates = ((score, doc_id) for doc_id, score in scores.items() if self.records[doc_id]['status'] == status)
+        else:
+            candidates = ((score, doc_id) for doc_id, score in scores.items())
+        return [(score, self.records[doc_id]) for score, doc_id in heapq.nlargest(k, candidates)]
+
+
+class IndexEntry:
+    def __init__(self, index, version):
+        self.index = index
+        self.version = version
+        self.built_at = time.monotonic()
+        self.lock = threading.Lock()
+
+
+class ProductIndexRegistry:
+    """
+    Process-wide, LRU-bounded set of per-business indexes.
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, business_id):
+        version = get_catalog_version(business_id)
+        max_age = getattr(settings, 'CHAT_RETRIEVAL_MAX_AGE', 300)
+        with self._lock:
+            entry = self._entries.get(business_id)
+            if entry is not None and entry.version == version and time.monotonic() - entry.built_at < max_age:
+                self._entries.move_to_end(business_id)
+                return entry
+        entry = IndexEntry(self.build(business_id), version)
+        with self._lock:
+            self._entries[business_id] = entry
+            self._entries.move_to_end(business_id)
+            while len(self._entries) > getattr(settings, 'CHAT_RETRIEVAL_MAX_INDEXES', 64):
+                self._entries.popitem(last=False)
+        return entry
+
+    def build(self, business_id):
+        index = BM25Index()
+        rows = Product.objects.filter(business_id=business_id).values(*INDEXED_FIELDS).order_by()
+        for row in rows.iterator(chunk_size=2000):
+            index.add(row['id'], project(row), (row['name'], row['description']))
+        return index
+
+    def search(self, business_id, query, k=5, status=None):
+        entry = self.get(business_id)
+        with entry.lock:
+            return entry.index.search(query, k=k, status=status), len(entry.index)
+
+    def loaded(self, business_ids):
+        """The given businesses that have an index in this process"""
+        with self._lock:
+            return {business_id for business_id in business_ids if business_id in self._entries}
+
+    def apply(self, business_id, upserts=(), deletes=()):
+        """
+        Apply this process's own writes to a loaded index once they commit.
+        The catalog version is bumped by an on_commit callback registered
+        earlier; the index takes the version that bump set, and only when no
+        other process bumped it since the index was current. Otherwise, or
+        when the write is rolled back, the index is stale and gets rebuilt.
+        """
+        transaction.on_commit(lambda: self._apply(business_id, upserts, deletes))
+
+    def _apply(self, business_id, upserts, deletes):
+        with self._lock:
+            entry = self._entries.get(business_id)
+        if entry is None:
+            return
+        run = own_version_run(business_id)
+        with entry.lock:
+            if not run or entry.version not in run:
+                return
+            for doc_id in deletes:
+                entry.index.remove(doc_id)
+            for row in upserts:
+                entry.index.add(row['id'], project(row), (row['name'], row['description']))
+            entry.version = run[-1]
+
+
+registry = ProductIndexRegistry()
+
+
+def _row(product):
+    row = {field: getattr(product, field) for field in INDEXED_FIELDS}
+    # Unsaved-to-python values (e.g. price='10.00') are only coerced on reload
+    row['price'] = Decimal(str(row['price']))
+    return row
+
+
+def product_saved(sender, instance, **kwargs):
+    if 'description' in instance.get_deferred_fields():
+        registry.apply(instance.business_id, deletes=[instance.pk])
+        return
+    registry.apply(instance.business_id, upserts=[_row(instance)])
+
+
+def product_deleted(sender, instance, **kwargs):
+    registry.apply(instance.business_id, deletes=[instance.pk])
+
+
+def products_bulk_changed(sender, business_ids, product_ids, **kwargs):
+    loaded = registry.loaded(business_ids)
+    if not loaded:
+        return
+    # Products not found in a loaded business were deleted or moved out of it
+    rows = Product.objects.filter(pk__in=product_ids, business_id__in=loaded).values('business_id', *INDEXED_FIELDS)
+    upserts = defaultdict(list)
+    for row in rows:
+        upserts[row.pop('business_id')].append(row)
+    for business_id in loaded:
+        found = {row['id'] for row in upserts[business_id]}
+        registry.apply(business_id, upserts=upserts[business_id], deletes=[pk for pk in product_ids if pk not in found])
@@ -1,9 +1,13 @@
 from rest_framework import serializers
+from core.performance import TimedListSerializer, TimedSerializerMixin
+from apps.products.models import Product
 from .models import ChatHistory
+from .window import CHARS_PER_TOKEN, get_window_size
 
-class ChatHistorySerializer(serializers.ModelSerializer):
+class ChatHistorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ChatHistory
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'user', 'business', 'user_message', 'ai_response', 'timestamp']
         read_only_fields = ['user', 'business', 'timestamp']
 
@@ -13,3 +17,31 @@ class ChatHistorySerializer(serializers.ModelSerializer):
         validated_data['user'] = request.user
         validated_data['business'] = request.user.business
         return super().create(validated_data)
+
+
+class ProductContextSerializer(serializers.Serializer):
+    message = serializers.CharField(max_length=2000)
+    k = serializers.IntegerField(default=5, min_value=1, max_value=20)
+    status = serializers.ChoiceField(choices=Product.STATUS_CHOICES, required=False)
+
+
+class ConversationWindowSerializer(serializers.Serializer):
+    turns = serializers.IntegerField(default=10, min_value=1)
+    max_chars = serializers.IntegerField(required=False, min_value=1)
+    max_tokens = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_turns(self, value):
+        return min(value, get_window_size())
+
+    def validate(self, data):
+        if 'max_tokens' in data:
+            budget = data.pop('max_tokens') * CHARS_PER_TOKEN
+            data['max_chars'] = min(data.get('max_chars', budget), budget)
+        return data
+
+
+class ChatCompletionSerializer(serializers.Serializer):
+    message = serializers.CharField(max_length=2000)
+    products = serializers.IntegerField(default=8, min_value=0, max_value=20)
+    turns = serializers.IntegerField(default=6, min_value=0, max_value=50)
+    cache = serializers.BooleanField(default=True)
@@ -1,7 +1,15 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import ChatHistoryViewSet
+from .views import (
+    AnswerCacheStatsView, AsyncChatHistoryListView, ChatCompletionView, ChatHistoryViewSet, ProductContextView
+)
 
 router = DefaultRouter()
 router.register(r'history', ChatHistoryViewSet, basename='chat_history')
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('history/async/', AsyncChatHistoryListView.as_view(), name='chat_history-async'),
+    path('context/', ProductContextView.as_view(), name='chat_product_context'),
+    path('completions/', ChatCompletionView.as_view(), name='chat_completions'),
+    path('answer-cache/', AnswerCacheStatsView.as_view(), name='chat_answer_cache'),
+] + router.urls
@@ -1,12 +1,221 @@
-from rest_framework import viewsets, permissions
-from .models import ChatHistory
-from .serializers import ChatHistorySerializer
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from openai import OpenAIError
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.authentication.authentication import CachedJWTAuthentication
+from apps.products.cache import get_catalog_version
+from core.async_views import AsyncReadOnlyView, error_response
+from core.throttling import throttle_wait
+from .answer_cache import answer_key, get_answer_cache
+from .models import ChatArchiveSegment, ChatHistory
+from .pagination import ArchiveKeysetPagination, ChatHistoryPagination
+from .retrieval import registry
+from .serializers import (
+    ChatCompletionSerializer, ChatHistorySerializer, ConversationWindowSerializer, ProductContextSerializer
+)
+from . import llm
+from .window import get_window, invalidate as invalidate_window, trim
+
+logger = logging.getLogger(__name__)
 
 class ChatHistoryViewSet(viewsets.ModelViewSet):
     serializer_class = ChatHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Lists page back into archived messages; other actions see only the hot table
+    pagination_class = ChatHistoryPagination
+    keyset_ordering = '-timestamp'
+    # Bucket for writes (core.throttling.EndpointRateThrottle)
+    throttle_scope = 'chat_write'
     
     def get_queryset(self):
          # User sees their own chat history or business chat history?
          # Probably wise to restrict.
-         return ChatHistory.objects.filter(user=self.request.user)
+         return ChatHistory.objects.filter(user_id=self.request.user.pk)
+
+    def get_archive_queryset(self):
+        return ChatArchiveSegment.objects.filter(user_id=self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_window(instance.user_id)
+
+    @action(detail=False, methods=['get'])
+    def window(self, request):
+        """The caller's last turns, oldest first, within an optional max_chars/max_tokens budget"""
+        serializer = ConversationWindowSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        turns, truncated = trim(get_window(request.user.pk), data['turns'], data.get('max_chars'))
+        return Response({'turns': turns, 'truncated': truncated})
+
+
+class AsyncChatHistoryListView(AsyncReadOnlyView):
+    """Async chat history list: the caller's messages, newest first, paging back into the archive"""
+    authentication_required = True
+    pagination_class = ArchiveKeysetPagination
+    keyset_ordering = '-timestamp'
+
+    def get_archive_queryset(self):
+        return ChatArchiveSegment.objects.filter(user_id=self.request.user.pk)
+
+    async def read(self, request):
+        queryset = ChatHistory.objects.filter(user_id=request.user.pk)
+        return await self.paginate(queryset, request, lambda page: ChatHistorySerializer(page, many=True).data)
+
+
+class ProductContextView(APIView):
+    """
+    The few products of the caller's business most relevant to a chat message,
+    ranked by BM25, for use as the chatbot's context.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.business_id:
+            return Response({'error': 'User does not belong to a business'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = ProductContextSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        results, total = registry.search(
+            request.user.business_id, data['message'], k=data['k'], status=data.get('status')
+        )
+        return Response({
+            'results': [dict(record, score=round(score, 4)) for score, record in results],
+            'total_products': total,
+        })
+
+
+def sse(data, event=None):
+    prefix = f'event: {event}\n' if event else ''
+    return f'{prefix}data: {json.dumps(data)}\n\n'
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """Calls on_close when the server closes the response, whether or not it was read"""
+    def __init__(self, *args, on_close=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_close = on_close
+
+    def close(self):
+        try:
+            if self.on_close is not None:
+                self.on_close()
+        finally:
+            super().close()
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ChatCompletionView(View):
+    """
+    Answer a chat message with the configured LLM, streamed as server-sent
+    events: `data: {"delta": ...}` per chunk, then `event: done` with the id of
+    the saved ChatHistory row (or `event: error`). Bearer JWT auth only.
+
+    Answers are cached per business, normalized question and catalog version;
+    a cached answer is sent as a single delta without calling the model.
+    Send "cache": false to bypass the cache.
+    """
+    # Saves chat history, so it shares the history writes' bucket
+    throttle_scope = 'chat_write'
+
+    async def post(self, request):
+        try:
+            auth = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+        except AuthenticationFailed as exc:
+            return JsonResponse({'detail': str(exc.detail)}, status=401)
+        if auth is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        user = request.user = auth[0]
+        if not user.business_id:
+            return JsonResponse({'error': 'User does not belong to a business'}, status=400)
+        wait = await sync_to_async(throttle_wait)(request, self)
+        if wait is not None:
+            return error_response(Throttled(wait))
+
+        try:
+            body = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+        serializer = ChatCompletionSerializer(data=body if isinstance(body, dict) else {})
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+        data = serializer.validated_data
+
+        turns = (await sync_to_async(get_window)(user.pk))[-data['turns']:] if data['turns'] else []
+        key = None
+        if data['cache'] and getattr(settings, 'CHAT_ANSWER_CACHE_ENABLED', True):
+            version = await sync_to_async(get_catalog_version)(user.business_id)
+            # The earlier turns change what a question means, so they are part of the key
+            key = answer_key(user.business_id, data['message'], version, turns)
+        answers = get_answer_cache()
+        cached = answers.get(key) if key else None
+        if cached is not None:
+            history = await sync_to_async(ChatHistory.objects.create)(
+                user=user, business_id=user.business_id, user_message=data['message'], ai_response=cached
+            )
+            async def replay():
+                yield sse({'delta': cached})
+                yield sse({'id': history.id, 'cached': True}, event='done')
+
+            return self.event_stream(replay())
+
+        try:
+            slot = await llm.acquire_slot(user.business_id)
+        except llm.BusinessBusy:
+            response = JsonResponse({'error': 'Too many chat requests for this business, retry shortly'}, status=429)
+            response['Retry-After'] = '1'
+            return response
+
+        try:
+            results, _ = await sync_to_async(registry.search)(user.business_id, data['message'], k=data['products'])
+        except BaseException:
+            slot.release()
+            raise
+        messages = llm.build_messages(data['message'], [record for _, record in results], turns)
+
+        async def events():
+            parts = []
+            try:
+                async for delta in llm.stream_completion(messages):
+                    parts.append(delta)
+                    yield sse({'delta': delta})
+                answer = ''.join(parts)
+                history = await sync_to_async(ChatHistory.objects.create)(
+                    user=user, business_id=user.business_id, user_message=data['message'], ai_response=answer
+                )
+                if key and answer:
+                    answers.set(key, answer)
+                yield sse({'id': history.id, 'cached': False}, event='done')
+            except OpenAIError as exc:
+                logger.warning('Chat completion failed: %s', exc)
+                yield sse({'error': 'The assistant is unavailable right now'}, event='error')
+            finally:
+                slot.release()
+
+        # A client that goes away before the first chunk never starts events(),
+        # but the server still closes the response
+        return self.event_stream(events(), on_close=slot.release)
+
+    def event_stream(self, events, on_close=None):
+        response = EventStreamResponse(events, content_type='text/event-stream', on_close=on_close)
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # let nginx pass chunks straight through
+        return response
+
+
+class AnswerCacheStatsView(APIView):
+    """Hit/miss metrics of this process's chatbot answer cache (staff only)"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_answer_cache().metrics())
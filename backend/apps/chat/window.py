@@ -0,0 +1,136 @@
+"""
+Per-user ring buffer of the latest chat turns, kept in the shared cache so
+assembling an LLM prompt does not touch the database.
+
+The buffer holds up to CHAT_WINDOW_SIZE turns, oldest first. New messages are
+appended once they commit; a missing buffer is refilled from the hot table
+(and the archive when the hot table is short) on the next read.
+
+Each user also has a generation counter, bumped with an atomic incr whenever
+one of their messages commits or changes. A buffer is stored with the
+generation read before it was loaded and is only used while that is still
+current, so a fill that raced a new message, or appends that raced each
+other, cost a reload instead of a turn that stays missing.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from apps.products.rows import format_datetime
+from .archive import seek_archive
+from .models import ChatArchiveSegment, ChatHistory
+
+WINDOW_CACHE_PREFIX = 'chat:window'
+CHARS_PER_TOKEN = 4  # rough estimate, good enough for budgeting prompts
+
+
+def get_window_cache():
+    return caches[getattr(settings, 'CHAT_WINDOW_CACHE_ALIAS', 'default')]
+
+
+def get_window_size():
+    return getattr(settings, 'CHAT_WINDOW_SIZE', 50)
+
+
+def get_window_ttl():
+    return getattr(settings, 'CHAT_WINDOW_TTL', 3600)
+
+
+def window_cache_key(user_id):
+    return f'{WINDOW_CACHE_PREFIX}:{user_id}'
+
+
+def generation_cache_key(user_id):
+    return f'{WINDOW_CACHE_PREFIX}:{user_id}:generation'
+
+
+def project(message):
+    return {
+        'id': message.id,
+        'user_message': message.user_message,
+        'ai_response': message.ai_response,
+        'timestamp': format_datetime(message.timestamp),
+    }
+
+
+def load_window(user_id):
+    size = get_window_size()
+    messages = list(ChatHistory.objects.filter(user_id=user_id).order_by('-timestamp', '-id')[:size])
+    if len(messages) < size:
+        segments = ChatArchiveSegment.objects.filter(user_id=user_id)
+        position = (messages[-1].timestamp, messages[-1].id) if messages else None
+        messages += seek_archive(segments, position, True, size - len(messages))
+    return [project(message) for message in reversed(messages)]
+
+
+def get_window(user_id):
+    cache = get_window_cache()
+    key, generation_key = window_cache_key(user_id), generation_cache_key(user_id)
+    cached = cache.get_many([key, generation_key])
+    generation, entry = cached.get(generation_key), cached.get(key)
+    if entry is not None and generation is not None and entry[0] == generation:
+        return entry[1]
+    if generation is None:
+        cache.add(generation_key, 0, get_window_ttl())
+        generation = cache.get(generation_key)
+    # The generation was read before the database, so a message committing
+    # during the load makes this buffer stale rather than silently short
+    turns = load_window(user_id)
+    if generation is not None:
+        cache.set(key, (generation, turns), get_window_ttl())
+    return turns
+
+
+def trim(turns, count, max_chars=None):
+    """
+    The newest `count` turns, dropping older ones until their messages fit in
+    max_chars. Returns (turns oldest first, whether anything was dropped).
+    """
+    selected, used = [], 0
+    for turn in reversed(turns[-count:] if count else []):
+        size = len(turn['user_message']) + len(turn['ai_response'])
+        if max_chars is not None and used + size > max_chars:
+            break
+        selected.append(turn)
+        used += size
+    selected.reverse()
+    return selected, len(selected) < min(count, len(turns))
+
+
+def append(user_id, message):
+    cache = get_window_cache()
+    try:
+        generation = cache.incr(generation_cache_key(user_id))
+    except ValueError:
+        # Without a generation no buffer is current; the next read loads one
+        return
+    key = window_cache_key(user_id)
+    entry = cache.get(key)
+    if entry is None or entry[0] != generation - 1:
+        # Missing, or behind by another message too: leave it to the next read
+        return
+    turns = entry[1]
+    if not any(turn['id'] == message.id for turn in turns):
+        # Messages may commit out of order
+        turns = sorted(turns + [project(message)], key=lambda turn: (turn['timestamp'], turn['id']))
+        turns = turns[-get_window_size():]
+    cache.set(key, (generation, turns), get_window_ttl())
+
+
+def invalidate(user_id):
+    cache = get_window_cache()
+    try:
+        cache.incr(generation_cache_key(user_id))
+    except ValueError:
+        pass
+    cache.delete(window_cache_key(user_id))
+
+
+def message_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        transaction.on_commit(lambda: append(instance.user_id, instance))
+    else:
+        invalidate(instance.user_id)
+        transaction.on_commit(lambda: invalidate(instance.user_id))
@@ -0,0 +1,27 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+class ProductsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.products'
+    label = 'products'
+
+    def ready(self):
+        from apps.authentication.models import Business
+        from . import cache, changes, stats
+        from .models import Product
+        from .search import install_search_index
+        from .signals import products_bulk_changed
+
+        post_migrate.connect(install_search_index, sender=self)
+        post_save.connect(cache.product_saved, sender=Product)
+        post_delete.connect(cache.product_deleted, sender=Product)
+        post_save.connect(cache.business_changed, sender=Business)
+        products_bulk_changed.connect(cache.products_bulk_changed)
+        post_save.connect(stats.product_saved, sender=Product)
+        post_delete.connect(stats.product_deleted, sender=Product)
+        products_bulk_changed.connect(stats.products_bulk_changed)
+        post_delete.connect(changes.product_deleted, sender=Product)
+        post_save.connect(changes.business_changed, sender=Business)
+        products_bulk_changed.connect(changes.products_bulk_changed)
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from core.db_router import replica_reads
+
+CATALOG_CACHE_PREFIX = 'catalog'
+LIST_VERSION_KEY = f'{CATALOG_CACHE_PREFIX}:list:version'
+# Versions kept per business in a thread's run of its own catalog bumps
+OWN_RUN_LENGTH = 64
+
+_own_bumps = threading.local()
+
+
+def get_catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_catalog_cache_ttl():
+    return getattr(settings, 'CATALOG_CACHE_TTL', 300)
+
+
+def is_cacheable(request):
+    """
+    Only anonymous reads are cached: they always see the same approved rows.
+    """
+    return request.method in ('GET', 'HEAD') and not request.user.is_authenticated
+
+
+def get_list_version():
+    cache = get_catalog_cache()
+    version = cache.get(LIST_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a lost version key never resurrects old entries
+        cache.add(LIST_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(LIST_VERSION_KEY)
+    return version
+
+
+def own_version_run(business_id):
+    """
+    The catalog versions of business_id from just before this thread's latest
+    unbroken run of writes to it up to the last one, oldest first, or None.
+    No other process bumped the version in between, so derived data built at
+    any of them is current at the last once it has those writes applied.
+    """
+    return getattr(_own_bumps, 'runs', {}).get(business_id)
+
+
+def _record_bumps(previous, version):
+    runs = getattr(_own_bumps, 'runs', None)
+    if runs is None:
+        runs = _own_bumps.runs = {}
+    for business_id, before in previous.items():
+        run = runs.get(business_id)
+        if run is None or before is None or run[-1] != before:
+            run = runs[business_id] = [before]
+        run.append(version)
+        del run[:-OWN_RUN_LENGTH]
+
+
+def business_version_key(business_id):
+    return f'{CATALOG_CACHE_PREFIX}:business:{business_id}:version'
+
+
+def get_catalog_version(business_id):
+    """
+    Opaque version of one business's catalog. It changes whenever any of the
+    business's products is written, so it can key derived data (search
+    indexes, cached answers) without tracking individual products.
+    """
+    cache = get_catalog_cache()
+    key = business_version_key(business_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def normalize_params(request):
+    params = []
+    for key, values in sorted(request.query_params.lists()):
+        values = sorted(value.strip() for value in values if value.strip())
+        if values:
+            params.append((key, values))
+    return params
+
+
+def list_cache_key(request):
+    # Pagination links are absolute, so the host is part of the key
+    variant = json.dumps([request.get_host(), normalize_params(request)])
+    digest = hashlib.md5(variant.encode('utf-8')).hexdigest()
+    return f'{CATALOG_CACHE_PREFIX}:list:{get_list_version()}:{digest}'
+
+
+def detail_cache_key(pk):
+    return f'{CATALOG_CACHE_PREFIX}:detail:{pk}'
+
+
+def compute_etag(data):
+    content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return quote_etag(hashlib.md5(content.encode('utf-8')).hexdigest())
+
+
+def cached_response(request, key, render):
+    """
+    Serve the response data for key from the catalog cache, calling render()
+    to build and store it on a miss. Honours If-None-Match.
+    """
+    cache = get_catalog_cache()
+    entry = cache.get(key)
+    if entry is None:
+        # A lagging replica would cache stale data until the next change
+        with replica_reads(False):
+            response = render()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        etag = compute_etag(response.data)
+        cache.set(key, (etag, response.data), get_catalog_cache_ttl())
+    else:
+        etag, data = entry
+        response = Response(data)
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if '*' in etags or etag in etags or etag.strip('"') in etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
+
+
+def _on_change(callback):
+    # Invalidate now, and again once the write is visible to other connections,
+    # so a concurrent reader cannot re-cache the old rows in between.
+    callback()
+    transaction.on_commit(callback)
+
+
+def invalidate_products(product_ids, business_ids, affects_list=True):
+    keys = [detail_cache_key(pk) for pk in product_ids]
+    business_ids = set(business_ids)
+
+    def invalidate():
+        cache = get_catalog_cache()
+        if keys:
+            cache.delete_many(keys)
+        version = time.time_ns()
+        if business_ids:
+            version_keys = {business_version_key(pk): pk for pk in business_ids}
+            previous = cache.get_many(list(version_keys))
+            cache.set_many(dict.fromkeys(version_keys, version), timeout=None)
+            _record_bumps({pk: previous.get(key) for key, pk in version_keys.items()}, version)
+        if affects_list:
+            cache.set(LIST_VERSION_KEY, version, timeout=None)
+
+    _on_change(invalidate)
+
+
+def _was_public(instance):
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or 'status' not in loaded:
+        # Unknown previous state: assume it may have been listed
+        return True
+    return loaded['status'] == 'approved'
+
+
+def product_saved(sender, instance, created=False, **kwargs):
+    public = instance.status == 'approved' or (not created and _was_public(instance))
+    invalidate_products([instance.pk], [instance.business_id], affects_list=public)
+
+
+def product_deleted(sender, instance, **kwargs):
+    public = instance.status == 'approved' or _was_public(instance)
+    invalidate_products([instance.pk], [instance.business_id], affects_list=public)
+
+
+def business_changed(sender, instance, **kwargs):
+    # business_name is rendered on every product of the business
+    from .models import Product
+    product_ids = list(Product.objects.filter(business_id=instance.pk).values_list('pk', flat=True))
+    invalidate_products(product_ids, [instance.pk])
+
+
+def products_bulk_changed(sender, business_ids, product_ids, **kwargs):
+    invalidate_products(product_ids, business_ids)
@@ -0,0 +1,132 @@
+"""
+Append-only product change log behind the change feed.
+
+Every product write adds a ProductChange row in the same transaction:
+Product.save logs upserts itself, and the receivers below log deletes, bulk
+writes and business renames (business_name is part of every product). The
+entry id is the feed cursor, so a consumer asks for the entries after the
+last id it has seen and syncs in O(changes) rather than O(catalog).
+
+Ids are handed out when a row is inserted but become visible at commit, so
+a slow transaction can commit an id below a cursor that was already handed
+out. Reads therefore stop at entries older than
+PRODUCT_CHANGES_SETTLE_SECONDS, which bounds how long a write transaction
+may stay open without being missed. The bound is not enforced: an entry
+whose transaction commits later than that is skipped by consumers already
+past it, so keep the setting well above the longest product write (bulk
+endpoints, imports) and, on PostgreSQL 17+, set transaction_timeout below it.
+
+Entries are flagged public when the product was approved before or after the
+write. The anonymous feed reads only those, so drafts never show up in it,
+not even as deletes, while approved products that leave the catalog do.
+
+The compact_product_changes command collapses entries that later entries for
+the same product supersede in every feed that serves them, which loses nothing, and truncates everything
+past the retention window. Truncation records a horizon; cursors behind it
+get a 410 and must resync.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Product, ProductChange, ProductChangeCompaction
+
+
+def record(rows, operation):
+    """Log `operation` for each (product_id, business_id, public) in rows"""
+    changed_at = timezone.now()
+    ProductChange.objects.bulk_create([
+        ProductChange(product_id=product_id, business_id=business_id, operation=operation, public=public,
+                      changed_at=changed_at)
+        for product_id, business_id, public in rows
+    ], batch_size=1000)
+
+
+def product_deleted(sender, instance, **kwargs):
+    # post_delete runs inside the collector's transaction
+    record([(instance.pk, instance.business_id, instance.touches_public_catalog())], ProductChange.DELETE)
+
+
+def business_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    rows = Product.objects.filter(business_id=instance.pk).values_list('pk', 'business_id', 'status')
+    record([(pk, business_id, status == 'approved') for pk, business_id, status in rows], ProductChange.UPSERT)
+
+
+def products_bulk_changed(sender, business_ids, product_ids, products=None, created=False, **kwargs):
+    # Senders hold the transaction of the bulk write open
+    if products is not None:
+        rows = [(product.pk, product.business_id, product.touches_public_catalog(created)) for product in products]
+    else:
+        # Without the instances the prior status is unknown
+        rows = [(pk, business_id, True) for pk, business_id in
+                Product.objects.filter(pk__in=product_ids).values_list('pk', 'business_id')]
+    record(rows, ProductChange.UPSERT)
+
+
+def settled_entries(business_id=None, public=False):
+    """Entries old enough to serve: all of them, one business's, or the public feed's"""
+    settle = getattr(settings, 'PRODUCT_CHANGES_SETTLE_SECONDS', 30)
+    entries = ProductChange.objects.filter(changed_at__lte=timezone.now() - timedelta(seconds=settle))
+    if business_id is not None:
+        entries = entries.filter(business_id=business_id)
+    if public:
+        entries = entries.filter(public=True)
+    return entries
+
+
+def head_cursor(business_id=None, public=False):
+    """Cursor to start syncing from after a full download"""
+    return settled_entries(business_id, public).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def get_horizon():
+    return ProductChangeCompaction.objects.order_by('-horizon').values_list('horizon', flat=True).first() or 0
+
+
+def read(cursor, limit, business_id=None, public=False):
+    """Up to `limit` (id, product_id, operation) entries after cursor, oldest first"""
+    entries = settled_entries(business_id, public).filter(id__gt=cursor).order_by('id')
+    return list(entries.values_list('id', 'product_id', 'operation')[:limit])
+
+
+def collapse(cutoff, batch_size):
+    """
+    Delete entries older than cutoff that a later entry for the same product
+    supersedes in every feed they appear in: their business's and, for
+    public entries, the public one.
+    """
+    later = ProductChange.objects.filter(product_id=OuterRef('product_id'), id__gt=OuterRef('id'))
+    removed = 0
+    while True:
+        ids = list(
+            ProductChange.objects.filter(changed_at__lt=cutoff)
+            .filter(Exists(later.filter(business_id=OuterRef('business_id'))))
+            .filter(Q(public=False) | Exists(later.filter(public=True)))
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        removed += ProductChange.objects.filter(id__in=ids).delete()[0]
+
+
+def truncate(cutoff, batch_size):
+    """
+    Delete every entry older than cutoff, recording the new horizon first so
+    no reader pages across the gap. Returns (horizon, entries removed).
+    """
+    horizon = ProductChange.objects.filter(changed_at__lt=cutoff).order_by('-id').values_list('id', flat=True).first()
+    if horizon is None:
+        return None, 0
+    compaction = ProductChangeCompaction.objects.create(horizon=horizon)
+    removed = 0
+    while True:
+        ids = list(ProductChange.objects.filter(id__lte=horizon).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        removed += ProductChange.objects.filter(id__in=ids).delete()[0]
+    ProductChangeCompaction.objects.filter(pk=compaction.pk).update(removed=removed)
+    return horizon, removed
@@ -0,0 +1,57 @@
+import csv
+import json
+
+from .rows import PRODUCT_COLUMNS, iter_product_rows
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# Rows per chunk handed to the WSGI server
+ROWS_PER_CHUNK = 500
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of storing it."""
+    def write(self, value):
+        return value
+
+
+def _chunked(lines):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_csv(queryset, chunk_size):
+    fields = list(PRODUCT_COLUMNS)
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(fields)
+        for values in iter_product_rows(queryset, fields, chunk_size=chunk_size):
+            yield writer.writerow(values)
+
+    return _chunked(lines())
+
+
+def stream_ndjson(queryset, chunk_size):
+    fields = list(PRODUCT_COLUMNS)
+
+    def lines():
+        for values in iter_product_rows(queryset, fields, chunk_size=chunk_size):
+            yield json.dumps(dict(zip(fields, values)), ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    return _chunked(lines())
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
@@ -1,5 +1,7 @@
 import django_filters
+from rest_framework import filters
 from .models import Product
+from .search import search_products
 
 class ProductFilter(django_filters.FilterSet):
     min_price = django_filters.NumberFilter(field_name="price", lookup_expr='gte')
@@ -9,3 +11,18 @@ class ProductFilter(django_filters.FilterSet):
     class Meta:
         model = Product
         fields = ['status', 'business', 'min_price', 'max_price']
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    ?search= backed by the database full-text index, ranked by relevance.
+    Falls back to icontains matching on databases without one.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        results = search_products(queryset, terms)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        return results
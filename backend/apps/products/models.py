@@ -1,4 +1,5 @@
-from django.db import models
+from decimal import Decimal
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 
@@ -26,12 +27,132 @@ class Product(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['business', 'status']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),
+            # Back keyset pagination of the public and per-business listings
+            models.Index(fields=['status', 'created_at', 'id']),
+            models.Index(fields=['business', 'created_at', 'id']),
+            # Lets BusinessProductStats recompute a business's price range by index seek
+            models.Index(fields=['business', 'price']),
+            models.Index(fields=['updated_at']),
         ]
         ordering = ['-created_at']
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so change handlers can see what moved
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def touches_public_catalog(self, created=False):
+        """
+        Whether writing this product changes the public catalog: it is approved
+        now or was when loaded. Assumed when the stored status is unknown,
+        unless the write creates the product.
+        """
+        if self.status == 'approved':
+            return True
+        if created:
+            return False
+        loaded = getattr(self, '_loaded_values', None)
+        return loaded is None or loaded.get('status', 'approved') == 'approved'
+
+    def save(self, *args, **kwargs):
+        public = self.touches_public_catalog(created=self._state.adding)
+        # The change log entry commits or rolls back with the write itself
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ProductChange.objects.create(product_id=self.pk, business_id=self.business_id,
+                                         operation=ProductChange.UPSERT, public=public)
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields if field.attname in self.__dict__
+        }
+
     def approve(self, user):
         self.status = 'approved'
         self.approved_by = user
         self.approved_at = timezone.now()
-        self.save()
+        self.save(update_fields=['status', 'approved_by', 'approved_at', 'updated_at'])
+
+
+class ProductChange(models.Model):
+    """
+    Append-only log of product writes behind the change feed. The id is the
+    feed cursor; see apps.products.changes.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    OPERATION_CHOICES = [
+        (UPSERT, 'Upsert'),
+        (DELETE, 'Delete'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    product_id = models.BigIntegerField()
+    # No constraint, so tombstones outlive the business they belonged to
+    business = models.ForeignKey('authentication.Business', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
+    # The product was approved before or after the write; only these reach the public feed
+    public = models.BooleanField(default=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Range scans of one business's feed and of the public feed
+            models.Index(fields=['business', 'id']),
+            models.Index(fields=['public', 'id']),
+            # Lets compaction find superseded entries by index seek
+            models.Index(fields=['product_id', 'id']),
+            models.Index(fields=['changed_at']),
+        ]
+
+
+class ProductChangeCompaction(models.Model):
+    """Entries with an id up to horizon have been compacted away"""
+    horizon = models.BigIntegerField(db_index=True)
+    removed = models.PositiveIntegerField(default=0)
+    compacted_at = models.DateTimeField(auto_now_add=True)
+
+
+class ProductImport(models.Model):
+    """
+    Progress of an import_products run, saved in the transaction of each
+    batch it writes, so a resumed import never writes a batch twice.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    path = models.TextField()
+    business = models.ForeignKey('authentication.Business', on_delete=models.CASCADE, related_name='+')
+    records = models.PositiveBigIntegerField(default=0)
+    # Byte offset just past the last record read, where a resumed import seeks to
+    offset = models.PositiveBigIntegerField(default=0)
+    imported = models.PositiveBigIntegerField(default=0)
+    rejected = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class BusinessProductStats(models.Model):
+    """
+    Per-business product summary, maintained incrementally by
+    apps.products.stats and rebuilt by the rebuild_product_stats command.
+    """
+    business = models.OneToOneField('authentication.Business', on_delete=models.CASCADE, primary_key=True, related_name='product_stats')
+    draft_count = models.PositiveIntegerField(default=0)
+    pending_approval_count = models.PositiveIntegerField(default=0)
+    approved_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    price_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    latest_approved_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def total(self):
+        return self.draft_count + self.pending_approval_count + self.approved_count + self.rejected_count
+
+    @property
+    def avg_price(self):
+        if not self.total:
+            return None
+        return (self.price_total / self.total).quantize(Decimal('0.01'))
@@ -1,30 +1,11 @@
-from rest_framework import permissions
-
-class ProductPermission(permissions.BasePermission):
-    def has_permission(self, request, view):
-        if view.action in ['list', 'retrieve']:
-            return True
-        if not request.user.is_authenticated:
-            return False
-            
-        pass_map = {
-            'create': ['admin', 'editor', 'approver'],
-            'update': ['admin', 'editor', 'approver'],
-            'partial_update': ['admin', 'editor', 'approver'],
-            'destroy': ['admin'],
-            'approve': ['admin', 'approver'],
-        }
-        
-        if view.action in pass_map:
-            return request.user.role and request.user.role.name in pass_map[view.action]
-            
-        return True
+from apps.authentication.permissions import RolePolicyPermission
 
+class ProductPermission(RolePolicyPermission):
     def has_object_permission(self, request, view, obj):
         if view.action in ['retrieve']:
             if obj.status == 'approved':
                 return True
-            if request.user.is_authenticated and obj.business == request.user.business:
+            if request.user.is_authenticated and obj.business_id == request.user.business_id:
                 return True
             return False
             
@@ -32,7 +13,7 @@ class ProductPermission(permissions.BasePermission):
             return False
             
         # Edit/Delete only own business products
-        if obj.business != request.user.business:
+        if obj.business_id != request.user.business_id:
             return False
             
         return True
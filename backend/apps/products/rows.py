@@ -0,0 +1,155 @@
+"""
+Plain-tuple projections of products, formatted exactly like ProductSerializer
+but without building serializer instances per row.
+"""
+from decimal import Decimal
+from operator import attrgetter
+
+from django.utils import timezone
+
+# API field name -> ORM path, in ProductSerializer field order
+PRODUCT_COLUMNS = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'price': 'price',
+    'status': 'status',
+    'business': 'business_id',
+    'business_name': 'business__name',
+    'created_by': 'created_by_id',
+    'created_by_name': 'created_by__username',
+    'approved_by': 'approved_by_id',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'approved_at': 'approved_at',
+}
+
+PRICE_QUANTUM = Decimal('0.01')
+
+
+def format_decimal(value):
+    # DecimalField(decimal_places=2) with COERCE_DECIMAL_TO_STRING
+    return format(value.quantize(PRICE_QUANTUM), 'f')
+
+
+def format_datetime(value):
+    # DateTimeField.to_representation: current timezone, ISO 8601, 'Z' for UTC
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+FORMATTERS = {
+    'price': format_decimal,
+    'created_at': format_datetime,
+    'updated_at': format_datetime,
+    'approved_at': format_datetime,
+}
+
+
+# API field -> model attribute path on a loaded Product
+PRODUCT_ATTRIBUTES = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'price': 'price',
+    'status': 'status',
+    'business': 'business_id',
+    'business_name': 'business.name',
+    'created_by': 'created_by_id',
+    'created_by_name': 'created_by.username',
+    'approved_by': 'approved_by_id',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'approved_at': 'approved_at',
+}
+
+# API field -> (only() path, relation to select_related)
+PRODUCT_PROJECTIONS = {
+    'business': ('business', None),
+    'business_name': ('business__name', 'business'),
+    'created_by': ('created_by', None),
+    'created_by_name': ('created_by__username', 'created_by'),
+    'approved_by': ('approved_by', None),
+}
+
+
+# Returned for fields read through a relation that is None; DRF leaves those fields out
+MISSING = object()
+
+
+def attribute_getter(field):
+    """Function returning one API field of a Product, formatted like ProductSerializer."""
+    *relations, name = PRODUCT_ATTRIBUTES[field].split('.')
+    formatter = FORMATTERS.get(field)
+    if not relations and formatter is None:
+        return attrgetter(name)
+
+    def get(product):
+        value = product
+        for relation in relations:
+            value = getattr(value, relation)
+            if value is None:
+                return MISSING
+        value = getattr(value, name)
+        return formatter(value) if formatter is not None and value is not None else value
+    return get
+
+
+PRODUCT_GETTERS = {field: attribute_getter(field) for field in PRODUCT_ATTRIBUTES}
+
+
+def _field_list(value):
+    return [field.strip() for field in value.split(',') if field.strip()]
+
+
+def parse_projection(params):
+    """
+    API fields requested with ?fields= (comma-separated) minus those in
+    ?omit=, in ProductSerializer order. None when neither is given; raises
+    ValueError for unknown fields.
+    """
+    if 'fields' not in params and 'omit' not in params:
+        return None
+    requested = _field_list(params.get('fields', '')) or list(PRODUCT_COLUMNS)
+    omitted = _field_list(params.get('omit', ''))
+    unknown = sorted(set(requested + omitted) - set(PRODUCT_COLUMNS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [field for field in PRODUCT_COLUMNS if field in requested and field not in omitted]
+
+
+def project_queryset(queryset, fields, extra=()):
+    """
+    Restrict queryset to the columns `fields` need (plus model fields in
+    `extra`), joining only the relations whose names are requested.
+    """
+    columns, related = {'id', *extra}, []
+    for field in fields:
+        column, relation = PRODUCT_PROJECTIONS.get(field, (field, None))
+        columns.add(column)
+        if relation:
+            related.append(relation)
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
+
+
+def iter_product_rows(queryset, fields=None, chunk_size=2000):
+    """
+    Yield one list of formatted values per product, reading the queryset with
+    a server-side cursor so memory stays flat however many rows there are.
+    """
+    fields = list(fields or PRODUCT_COLUMNS)
+    formatters = [(index, FORMATTERS[field]) for index, field in enumerate(fields) if field in FORMATTERS]
+    values_list = queryset.values_list(*(PRODUCT_COLUMNS[field] for field in fields))
+    for values in values_list.iterator(chunk_size=chunk_size):
+        values = list(values)
+        for index, formatter in formatters:
+            if values[index] is not None:
+                values[index] = formatter(values[index])
+        yield values
@@ -0,0 +1,147 @@
+"""
+Full-text search for products.
+
+The search index lives in the database and is maintained by the database
+itself, so it stays current for save(), bulk_create(), bulk_update() and
+queryset.update() alike:
+
+* PostgreSQL: a stored generated `search_vector` tsvector column (name weighted
+  above description) with a GIN index, ranked with ts_rank_cd.
+* SQLite: an external-content FTS5 table kept in sync by triggers, ranked with
+  bm25.
+
+Other backends fall back to DRF's icontains search.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Product
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+TABLE = Product._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+
+POSTGRES_SCHEMA = [
+    f"""
+    ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    f'CREATE INDEX IF NOT EXISTS {TABLE}_search_idx ON {TABLE} USING gin (search_vector)',
+]
+
+SQLITE_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, description, content='{TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF name, description ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def tokenize(terms):
+    tokens = []
+    for term in terms:
+        tokens.extend(token.lower() for token in TOKEN_RE.findall(term))
+    return tokens
+
+
+class PostgresSearchBackend:
+    vendor = 'postgresql'
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            for statement in POSTGRES_SCHEMA:
+                cursor.execute(statement)
+
+    def search(self, queryset, tokens):
+        # Every token must match, each as a prefix so partially typed words hit
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        vector = f'"{TABLE}"."search_vector"'
+        return queryset.filter(
+            RawSQL(f"{vector} @@ to_tsquery('english', %s)", [query], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f"ts_rank_cd({vector}, to_tsquery('english', %s))", [query], output_field=FloatField())
+        ).order_by('-search_rank', '-created_at')
+
+
+class SQLiteSearchBackend:
+    vendor = 'sqlite'
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            if cursor.fetchone():
+                return
+            for statement in SQLITE_SCHEMA:
+                cursor.execute(statement)
+
+    def search(self, queryset, tokens):
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        match = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        # bm25() is lower-is-better; negate it so both backends rank descending
+        rank = (
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{TABLE}"."id"'
+        )
+        return queryset.filter(
+            RawSQL(f'"{TABLE}"."id" IN ({match})', [query], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(rank, [query], output_field=FloatField())
+        ).order_by('-search_rank', '-created_at')
+
+
+BACKENDS = {backend.vendor: backend for backend in (PostgresSearchBackend(), SQLiteSearchBackend())}
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    return BACKENDS.get(connections[using].vendor)
+
+
+def search_products(queryset, terms):
+    """
+    Filter queryset down to products matching every search term, best match
+    first. Returns None when the database has no full-text backend.
+    """
+    backend = get_search_backend(queryset.db)
+    if backend is None:
+        return None
+    tokens = tokenize(terms)
+    if not tokens:
+        return queryset
+    return backend.search(queryset, tokens)
+
+
+def install_search_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    post_migrate handler that creates the search column/table and triggers.
+    """
+    backend = get_search_backend(using)
+    if backend is not None:
+        backend.install(connections[using])
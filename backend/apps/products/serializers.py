@@ -1,12 +1,38 @@
+from django.db import models
 from rest_framework import serializers
-from .models import Product
+from core.performance import TimedListSerializer, TimedSerializerMixin
+from .models import BusinessProductStats, Product
+from .rows import MISSING, PRODUCT_ATTRIBUTES, PRODUCT_GETTERS
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductListSerializer(TimedListSerializer):
+    """
+    Renders many products as plain dicts through precomputed attribute
+    getters instead of running every DRF field per row. The output matches
+    ProductSerializer's, sparse fieldsets included.
+    """
+    def to_representation(self, data):
+        fields = list(self.child.fields)
+        if not set(fields) <= set(PRODUCT_GETTERS):
+            return super().to_representation(data)
+        getters = [(field, PRODUCT_GETTERS[field]) for field in fields]
+        products = data.all() if isinstance(data, models.manager.BaseManager) else data
+        rows = [{field: get(product) for field, get in getters} for product in products]
+        related = [field for field in fields if '.' in PRODUCT_ATTRIBUTES[field]]
+        if related:
+            for row in rows:
+                for field in related:
+                    if row[field] is MISSING:
+                        del row[field]
+        return rows
+
+
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     business_name = serializers.CharField(source='business.name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     
     class Meta:
         model = Product
+        list_serializer_class = ProductListSerializer
         fields = [
             'id', 'name', 'description', 'price', 'status',
             'business', 'business_name',
@@ -15,6 +41,14 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['business', 'created_by', 'approved_by', 'approved_at']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Sparse fieldset chosen by the view (?fields= / ?omit=)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def validate_status(self, value):
         if value == 'approved':
             # Only allowed through the specialized approve action
@@ -23,3 +57,18 @@ class ProductSerializer(serializers.ModelSerializer):
 
 class ProductApprovalSerializer(serializers.Serializer):
     approved = serializers.BooleanField()
+
+class ProductBulkApprovalSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+class BusinessProductStatsSerializer(serializers.ModelSerializer):
+    total = serializers.IntegerField(read_only=True)
+    avg_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = BusinessProductStats
+        fields = [
+            'business', 'total',
+            'draft_count', 'pending_approval_count', 'approved_count', 'rejected_count',
+            'min_price', 'max_price', 'avg_price', 'latest_approved_at', 'updated_at'
+        ]
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent after bulk writes (bulk_create/bulk_update) that bypass post_save and
+# post_delete. Receivers get `business_ids` and `product_ids` keyword arguments,
+# and from senders that have them, `products` (the written instances, as loaded
+# before a bulk_update) and `created` (True for bulk_create).
+products_bulk_changed = Signal()
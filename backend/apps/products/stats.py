@@ -0,0 +1,212 @@
+"""
+Keeps BusinessProductStats in step with product writes.
+
+Single product saves and deletes apply a delta with F() expressions, so the
+cost does not depend on catalog size. The price range and latest approval
+are only recomputed (by index seek) when the product that held the extreme
+value moves away from it. Bulk writes apply the deltas of all their products
+in one UPDATE per business; only a business whose products' prior values the
+sender could not provide is recomputed. Decrements stop at zero, so a delta
+applied twice or against a stale row cannot break the counters' constraints.
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Max, Min, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from apps.authentication.models import Business
+from core.db_router import replica_reads
+from .models import BusinessProductStats, Product
+
+STATUSES = [value for value, label in Product.STATUS_CHOICES]
+TRACKED_FIELDS = ('business_id', 'status', 'price', 'approved_at')
+
+
+def _aggregates():
+    aggregates = {f'{status}_count': Count('id', filter=Q(status=status)) for status in STATUSES}
+    aggregates.update(
+        price_total=Coalesce(Sum('price'), Value(Decimal('0')), output_field=DecimalField()),
+        min_price=Min('price'),
+        max_price=Max('price'),
+        latest_approved_at=Max('approved_at'),
+    )
+    return aggregates
+
+
+def rebuild_stats(business_ids=None):
+    """
+    Recompute the stats of the given businesses (all when None) from the
+    products table in one grouped query. Returns the number of rows written.
+    """
+    businesses = Business.objects.all()
+    products = Product.objects.all()
+    if business_ids is not None:
+        businesses = businesses.filter(pk__in=business_ids)
+        products = products.filter(business_id__in=business_ids)
+    empty = {field: 0 for field in (f'{status}_count' for status in STATUSES)}
+    empty.update(price_total=Decimal('0'), min_price=None, max_price=None, latest_approved_at=None)
+
+    # The result is stored on the primary, so it must not come from a lagging replica
+    with replica_reads(False):
+        computed = {
+            row.pop('business_id'): row
+            for row in products.order_by().values('business_id').annotate(**_aggregates())
+        }
+        rows = [
+            BusinessProductStats(business_id=business_id, **computed.get(business_id, empty))
+            for business_id in businesses.values_list('pk', flat=True)
+        ]
+        BusinessProductStats.objects.bulk_create(
+            rows, batch_size=500, update_conflicts=True, unique_fields=['business'],
+            update_fields=[field for field in empty] + ['updated_at'],
+        )
+    return len(rows)
+
+
+def refresh_stats(business_id):
+    """Recompute an existing stats row in place; never creates one."""
+    values = Product.objects.filter(business_id=business_id).aggregate(**_aggregates())
+    BusinessProductStats.objects.filter(business_id=business_id).update(**values)
+
+
+def get_stats(business_id):
+    stats = BusinessProductStats.objects.filter(business_id=business_id).first()
+    if stats is None:
+        rebuild_stats([business_id])
+        stats = BusinessProductStats.objects.get(business_id=business_id)
+    return stats
+
+
+def _price(value):
+    return Decimal(str(value))
+
+
+def _decimal(value):
+    return Value(value, output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def _state(values):
+    return {field: values[field] for field in TRACKED_FIELDS} if values else None
+
+
+def apply_change(business_id, old, new):
+    """
+    Move one product's contribution from `old` to `new` (dicts of
+    TRACKED_FIELDS, or None for a create or delete) within one business.
+    """
+    apply_changes(business_id, [(old, new)])
+
+
+def apply_changes(business_id, changes):
+    """
+    apply_change for many (old, new) pairs of one business, in one UPDATE
+    plus a recompute of any extreme value a product moved away from.
+    """
+    counts = Counter()
+    price_delta = Decimal('0')
+    new_prices, new_approvals = [], []
+    displaced_prices, displaced_approvals = set(), set()
+    for old, new in changes:
+        if old:
+            counts[old['status']] -= 1
+            price_delta -= _price(old['price'])
+            if not new or _price(new['price']) != _price(old['price']):
+                displaced_prices.add(_price(old['price']))
+            if old['approved_at'] and (not new or new['approved_at'] != old['approved_at']):
+                displaced_approvals.add(old['approved_at'])
+        if new:
+            counts[new['status']] += 1
+            price_delta += _price(new['price'])
+            new_prices.append(_price(new['price']))
+            if new['approved_at']:
+                new_approvals.append(new['approved_at'])
+
+    stats = BusinessProductStats.objects.filter(business_id=business_id)
+    updates = {
+        f'{status}_count': F(f'{status}_count') + delta if delta > 0 else Greatest(F(f'{status}_count') + delta, 0)
+        for status, delta in counts.items() if delta
+    }
+    updates['price_total'] = F('price_total') + Value(price_delta, output_field=DecimalField(max_digits=16, decimal_places=2))
+    if new_prices:
+        low, high = _decimal(min(new_prices)), _decimal(max(new_prices))
+        updates['min_price'] = Least(Coalesce(F('min_price'), low), low)
+        updates['max_price'] = Greatest(Coalesce(F('max_price'), high), high)
+    if new_approvals:
+        approved_at = Value(max(new_approvals))
+        updates['latest_approved_at'] = Greatest(Coalesce(F('latest_approved_at'), approved_at), approved_at)
+    if not stats.update(**updates):
+        # No row yet. Build it from the table, which already holds these writes,
+        # unless nothing is left (perhaps with the business); reads build it lazily.
+        if new_prices:
+            rebuild_stats([business_id])
+        return
+
+    products = Product.objects.filter(business_id=business_id).order_by().values('business_id')
+    if displaced_prices:
+        stats.filter(min_price__in=displaced_prices).update(min_price=Subquery(products.annotate(value=Min('price')).values('value')))
+        stats.filter(max_price__in=displaced_prices).update(max_price=Subquery(products.annotate(value=Max('price')).values('value')))
+    if displaced_approvals:
+        stats.filter(latest_approved_at__in=displaced_approvals).update(
+            latest_approved_at=Subquery(products.annotate(value=Max('approved_at')).values('value'))
+        )
+
+
+def product_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    new = {field: getattr(instance, field) for field in TRACKED_FIELDS}
+    if created:
+        apply_change(instance.business_id, None, new)
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or any(field not in loaded for field in TRACKED_FIELDS):
+        # Saved without a known previous state
+        rebuild_stats([instance.business_id])
+        return
+    old = _state(loaded)
+    if old == new:
+        return
+    if old['business_id'] != new['business_id']:
+        apply_change(old['business_id'], old, None)
+        apply_change(new['business_id'], None, new)
+    else:
+        apply_change(new['business_id'], old, new)
+
+
+def product_deleted(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or any(field not in loaded for field in TRACKED_FIELDS):
+        refresh_stats(instance.business_id)
+        return
+    apply_change(loaded['business_id'], _state(loaded), None)
+
+
+def products_bulk_changed(sender, business_ids, products=None, created=False, **kwargs):
+    if products is None:
+        # The sender did not say what it wrote
+        rebuild_stats(business_ids)
+        return
+    changes, unknown = defaultdict(list), set()
+    for product in products:
+        new = {field: getattr(product, field) for field in TRACKED_FIELDS}
+        if created:
+            changes[new['business_id']].append((None, new))
+            continue
+        loaded = getattr(product, '_loaded_values', None)
+        if loaded is None or any(field not in loaded for field in TRACKED_FIELDS):
+            unknown.add(new['business_id'])
+            continue
+        old = _state(loaded)
+        if old == new:
+            continue
+        if old['business_id'] != new['business_id']:
+            changes[old['business_id']].append((old, None))
+            changes[new['business_id']].append((None, new))
+        else:
+            changes[new['business_id']].append((old, new))
+    if unknown:
+        rebuild_stats(unknown)
+    for business_id, pairs in changes.items():
+        if business_id not in unknown:
+            apply_changes(business_id, pairs)
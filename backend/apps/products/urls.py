@@ -1,7 +1,13 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet
+from .views import AsyncProductDetailView, AsyncProductInternalListView, AsyncProductListView, ProductViewSet
 
 router = DefaultRouter()
 router.register(r'', ProductViewSet, basename='product')
 
-urlpatterns = router.urls
+# Async read-only views for ASGI deployments; listed first so the router's detail route does not swallow them
+urlpatterns = [
+    path('async/', AsyncProductListView.as_view(), name='product-async-list'),
+    path('async/internal/', AsyncProductInternalListView.as_view(), name='product-async-internal'),
+    path('async/<int:pk>/', AsyncProductDetailView.as_view(), name='product-async-detail'),
+] + router.urls
@@ -1,32 +1,118 @@
 from rest_framework import viewsets, filters, status
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
 from rest_framework.response import Response
 from apps.authentication.permissions import HasRolePermission
-from .models import Product
-from .serializers import ProductSerializer, ProductApprovalSerializer
+from core.async_views import AsyncReadOnlyView
+from core.pagination import KeysetPagination, PageNumberOrKeysetPagination
+from .models import Product, ProductChange
+from .serializers import (
+    ProductSerializer, ProductApprovalSerializer, ProductBulkApprovalSerializer, BusinessProductStatsSerializer
+)
+from .signals import products_bulk_changed
+from .export import EXPORT_FORMATS, STREAMERS
 from .permissions import ProductPermission
-from .filters import ProductFilter
+from .filters import ProductFilter, ProductSearchFilter
+from .rows import parse_projection, project_queryset
+from . import cache as catalog_cache, changes as change_log
+from .stats import get_stats
 
 class ProductViewSet(viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [ProductPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, filters.OrderingFilter]
     filterset_class = ProductFilter
     search_fields = ['name', 'description']
     ordering_fields = ['created_at', 'price', 'name']
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = '-created_at'
+    # Bucket for writes (core.throttling.EndpointRateThrottle)
+    throttle_scope = 'product_write'
+    # Checked by ProductPermission against the compiled role policy
+    public_actions = ['list', 'retrieve', 'changes']
+    action_permissions = {
+        'create': 'create_product',
+        'update': 'edit_product',
+        'partial_update': 'edit_product',
+        'destroy': 'delete_product',
+        'approve': 'approve_product',
+        'bulk_create': 'create_product',
+        'bulk_update': 'edit_product',
+        'bulk_approve': 'approve_product',
+    }
     
+    # Reads that accept ?fields= / ?omit=
+    projected_actions = ['list', 'retrieve', 'list_internal', 'changes']
+
+    def get_projection(self):
+        """API fields requested for this read, or None for all of them"""
+        if not hasattr(self, '_projection'):
+            self._projection = None
+            if self.action in self.projected_actions:
+                try:
+                    self._projection = parse_projection(self.request.query_params)
+                except ValueError as exc:
+                    raise ValidationError({'fields': [str(exc)]})
+        return self._projection
+
+    def get_projection_columns(self):
+        # Model fields read outside the serializer: object permissions and keyset cursors
+        columns = ['status', 'business'] if self.action == 'retrieve' else []
+        if KeysetPagination.cursor_query_param in self.request.query_params:
+            ordering = self.request.query_params.get('ordering', '').strip().lstrip('-')
+            columns.append(ordering if ordering in self.ordering_fields else self.keyset_ordering.lstrip('-'))
+        return columns
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_projection()
+        return context
+
     def get_queryset(self):
         user = self.request.user
+        # ProductSerializer reads business.name and created_by.username on every row
+        queryset = Product.objects.select_related('business', 'created_by')
+        if self.action == 'destroy':
+            # Nothing is rendered for a delete, so skip the widest column
+            queryset = queryset.defer('description')
+        fields = self.get_projection()
+        if fields is not None:
+            # Columns nobody asked for are never fetched
+            queryset = project_queryset(queryset, fields, self.get_projection_columns())
         
-        detail_actions = ['retrieve', 'update', 'partial_update', 'destroy', 'approve']
-        if self.action in detail_actions or (self.action == 'list_internal' and user.is_authenticated):
+        detail_actions = ['retrieve', 'update', 'partial_update', 'destroy', 'approve', 'bulk_update', 'bulk_approve']
+        internal_actions = ['list_internal', 'export', 'changes']
+        if self.action in detail_actions or (self.action in internal_actions and user.is_authenticated):
             if user.is_authenticated:
-                return Product.objects.filter(business=user.business)
-            return Product.objects.filter(status='approved')
+                return queryset.filter(business_id=user.business_id)
+            return queryset.filter(status='approved')
         
         # Public list
-        return Product.objects.filter(status='approved')
+        return queryset.filter(status='approved')
+    
+    def list(self, request, *args, **kwargs):
+        if not catalog_cache.is_cacheable(request):
+            return super().list(request, *args, **kwargs)
+        return catalog_cache.cached_response(
+            request, catalog_cache.list_cache_key(request),
+            lambda: super(ProductViewSet, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        # The detail cache holds full products only
+        if not catalog_cache.is_cacheable(request) or not pk.isdigit() or self.get_projection() is not None:
+            return super().retrieve(request, *args, **kwargs)
+        return catalog_cache.cached_response(
+            request, catalog_cache.detail_cache_key(int(pk)),
+            lambda: super(ProductViewSet, self).retrieve(request, *args, **kwargs)
+        )
     
     def perform_create(self, serializer):
         # Allow initial status if provided (e.g. pending_approval)
@@ -52,10 +138,260 @@ class ProductViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def list_internal(self, request):
         """List all products for internal users with filtering"""
-        queryset = self.filter_queryset(Product.objects.filter(business=request.user.business))
+        queryset = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the business's whole catalog as CSV or NDJSON (?output=), with the usual filters"""
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        content_type, extension = EXPORT_FORMATS[output]
+        queryset = self.filter_queryset(self.get_queryset())
+        chunk_size = getattr(settings, 'PRODUCT_EXPORT_CHUNK_SIZE', 2000)
+        response = StreamingHttpResponse(STREAMERS[output](queryset, chunk_size), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="products.{extension}"'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Product upserts and deletions after ?cursor= (a change id), oldest
+        first, at most ?limit= entries at a time. Without a cursor, returns the
+        cursor to sync from after downloading the catalog. Anonymous callers
+        follow the approved catalog, users their own business.
+        """
+        max_batch = getattr(settings, 'PRODUCT_CHANGES_MAX_BATCH', 1000)
+        try:
+            cursor = request.query_params.get('cursor')
+            cursor = None if cursor in (None, '') else int(cursor)
+            limit = int(request.query_params.get('limit', max_batch // 2))
+        except ValueError:
+            return Response({'error': 'cursor and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if (cursor is not None and cursor < 0) or not 1 <= limit <= max_batch:
+            return Response(
+                {'error': f'cursor must not be negative and limit must be between 1 and {max_batch}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        public = not request.user.is_authenticated
+        if not public and not request.user.business_id:
+            return Response({'error': 'User does not belong to a business'}, status=status.HTTP_400_BAD_REQUEST)
+        business_id = None if public else request.user.business_id
+        if cursor is None:
+            return Response({'cursor': change_log.head_cursor(business_id, public)})
+        horizon = change_log.get_horizon()
+        if cursor < horizon:
+            return Response(
+                {'error': 'Cursor is older than the change log; download the catalog again', 'horizon': horizon},
+                status=status.HTTP_410_GONE
+            )
+
+        entries = change_log.read(cursor, limit + 1, business_id, public)
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        # Only the latest operation per product matters, in the order it happened
+        latest = {}
+        for _, product_id, operation in entries:
+            latest.pop(product_id, None)
+            latest[product_id] = operation
+        upserted = [product_id for product_id, operation in latest.items() if operation == ProductChange.UPSERT]
+        # Products gone from the caller's view (deleted, or no longer approved) are deletes; the public
+        # feed only holds entries of products that were approved, so it never names a draft
+        products = self.get_queryset().in_bulk(upserted) if upserted else {}
+        serializer = self.get_serializer([products[pk] for pk in upserted if pk in products], many=True)
+        return Response({
+            'cursor': entries[-1][0] if entries else cursor,
+            'has_more': has_more,
+            'upserts': serializer.data,
+            'deletes': [pk for pk in latest if pk not in products],
+        })
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Product counts by status, price range and latest approval for the caller's business"""
+        if not request.user.business_id:
+            return Response({'error': 'User does not belong to a business'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(BusinessProductStatsSerializer(get_stats(request.user.business_id)).data)
+
+    def _bulk_items(self, items):
+        """Return an error response if items is not a list within the bulk limit."""
+        max_items = getattr(settings, 'PRODUCT_BULK_MAX_ITEMS', 1000)
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list of items'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > max_items:
+            return Response({'error': f'At most {max_items} items per request'}, status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    def _bulk_changed(self, products, created=False):
+        products_bulk_changed.send(
+            sender=Product,
+            business_ids={product.business_id for product in products},
+            product_ids=[product.pk for product in products],
+            products=products,
+            created=created
+        )
+
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """Create many products in one transaction; errors are reported per item"""
+        error = self._bulk_items(request.data)
+        if error:
+            return error
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, dict):
+                # Newer DRF versions key list errors by index and omit valid items
+                errors = [errors.get(index, {}) for index in range(len(request.data))]
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        products = [
+            Product(
+                **data,
+                created_by=request.user,
+                business=request.user.business,
+            )
+            for data in serializer.validated_data
+        ]
+        with transaction.atomic():
+            Product.objects.bulk_create(products, batch_size=500)
+            self._bulk_changed(products, created=True)
+        return Response(ProductSerializer(products, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['patch'])
+    def bulk_update(self, request):
+        """Partially update many products of the caller's business in one transaction"""
+        error = self._bulk_items(request.data)
+        if error:
+            return error
+
+        ids = [item.get('id') if isinstance(item, dict) else None for item in request.data]
+        products = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int)])
+
+        errors, updates, seen = [], [], set()
+        for pk, item in zip(ids, request.data):
+            if pk not in products:
+                errors.append({'id': ['Product not found.']})
+                continue
+            if pk in seen:
+                errors.append({'id': ['Duplicate product.']})
+                continue
+            seen.add(pk)
+            serializer = self.get_serializer(products[pk], data=item, partial=True)
+            if serializer.is_valid():
+                errors.append({})
+                updates.append((products[pk], serializer.validated_data))
+            else:
+                errors.append(serializer.errors)
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        fields = {'updated_at'}
+        for product, data in updates:
+            for field, value in data.items():
+                setattr(product, field, value)
+                fields.add(field)
+            product.updated_at = now
+        updated = [product for product, _ in updates]
+        with transaction.atomic():
+            Product.objects.bulk_update(updated, sorted(fields), batch_size=500)
+            self._bulk_changed(updated)
+        return Response(ProductSerializer(updated, many=True).data)
+
+    @action(detail=False, methods=['post'])
+    def bulk_approve(self, request):
+        """Approve many products of the caller's business in one transaction"""
+        serializer = ProductBulkApprovalSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        ids = serializer.validated_data['ids']
+        error = self._bulk_items(ids)
+        if error:
+            return error
+
+        products = self.get_queryset().in_bulk(ids)
+        errors, seen = [], set()
+        for pk in ids:
+            if pk not in products:
+                errors.append({'id': ['Product not found.']})
+            elif pk in seen:
+                errors.append({'id': ['Duplicate product.']})
+            elif products[pk].status == 'approved':
+                errors.append({'id': ['Product already approved.']})
+            else:
+                errors.append({})
+            seen.add(pk)
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        approved = [products[pk] for pk in ids]
+        for product in approved:
+            product.status = 'approved'
+            product.approved_by = request.user
+            product.approved_at = now
+            product.updated_at = now
+        with transaction.atomic():
+            Product.objects.bulk_update(approved, ['status', 'approved_by', 'approved_at', 'updated_at'], batch_size=500)
+            self._bulk_changed(approved)
+        return Response(ProductSerializer(approved, many=True).data)
+
+
+def filter_products(request, queryset, view):
+    """ProductViewSet's list filters, ProductFilter and ?search=, for the async views"""
+    filterset = ProductFilter(request.GET, queryset=queryset)
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return ProductSearchFilter().filter_queryset(Request(request), filterset.qs, view)
+
+
+def serialize_products(page):
+    return ProductSerializer(page, many=True).data
+
+
+class AsyncProductListView(AsyncReadOnlyView):
+    """Async public catalog: approved products, keyset-paginated, with the usual filters"""
+    ordering_fields = ProductViewSet.ordering_fields
+    search_fields = ProductViewSet.search_fields
+
+    async def read(self, request):
+        queryset = Product.objects.select_related('business', 'created_by').filter(status='approved')
+        return await self.paginate(filter_products(request, queryset, self), request, serialize_products)
+
+
+class AsyncProductInternalListView(AsyncReadOnlyView):
+    """Async list_internal: every product of the caller's business, keyset-paginated"""
+    authentication_required = True
+    ordering_fields = ProductViewSet.ordering_fields
+    search_fields = ProductViewSet.search_fields
+
+    async def read(self, request):
+        queryset = Product.objects.select_related('business', 'created_by').filter(business_id=request.user.business_id)
+        return await self.paginate(filter_products(request, queryset, self), request, serialize_products)
+
+
+class AsyncProductDetailView(AsyncReadOnlyView):
+    """Async retrieve, visible to the same users as ProductViewSet.retrieve"""
+    async def read(self, request, pk):
+        queryset = Product.objects.select_related('business', 'created_by')
+        if request.user.is_authenticated:
+            queryset = queryset.filter(business_id=request.user.business_id)
+        else:
+            queryset = queryset.filter(status='approved')
+        try:
+            product = await queryset.aget(pk=pk)
+        except Product.DoesNotExist:
+            raise NotFound()
+        return ProductSerializer(product).data
@@ -0,0 +1,15 @@
+"""
+ASGI entry point, for async views and streaming chat completions, e.g.
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Async requests run their ORM calls on different threads, so persistent
+# connections would pile up; use DB_POOL for connection reuse instead.
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+application = get_asgi_application()
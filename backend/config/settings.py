@@ -41,6 +41,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Before anything that queries; see core/db_router.py
+    'core.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Added
@@ -51,6 +53,25 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-endpoint query budgets (see core/query_budget.py). Enabled by default in development, where
+# overruns are logged; set QUERY_BUDGET_STRICT=True (e.g. in CI) to make them raise instead.
+QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED', str(DEBUG)) == 'True'
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', 'False') == 'True'
+QUERY_BUDGETS = {}
+if QUERY_BUDGET_ENABLED:
+    MIDDLEWARE.append('core.query_budget.QueryBudgetMiddleware')
+
+# Per-route latency, query and serializer metrics (see core/performance.py), served at /api/metrics/.
+# Lower PERF_SAMPLE_RATE in production; PERF_SERVER_TIMING exposes timings to clients.
+PERF_METRICS_ENABLED = os.environ.get('PERF_METRICS_ENABLED', 'True') == 'True'
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', 1.0 if DEBUG else 0.1))
+PERF_SERVER_TIMING = os.environ.get('PERF_SERVER_TIMING', str(DEBUG)) == 'True'
+PERF_SLOW_QUERY_MS = float(os.environ.get('PERF_SLOW_QUERY_MS', 100))
+PERF_MAX_SLOW_QUERIES = int(os.environ.get('PERF_MAX_SLOW_QUERIES', 5))
+if PERF_METRICS_ENABLED:
+    # Outermost, so its latency covers the other middleware too
+    MIDDLEWARE.insert(0, 'core.performance.PerformanceMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -74,11 +95,58 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connection reuse is tuned per server mode:
+#  - WSGI (gunicorn sync workers): one persistent connection per worker, kept DB_CONN_MAX_AGE seconds.
+#  - ASGI: config/asgi.py defaults DB_CONN_MAX_AGE to 0, since async requests hop between threads
+#    and would each pin a connection; set DB_POOL=True to use psycopg 3's pool on PostgreSQL instead.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
+
+# Falls back to a local SQLite file so tests and benchmarks run without a database server
 DATABASES = {
     'default': dj_database_url.config(
-        default=os.environ.get('DATABASE_URL'),
-        conn_max_age=600
+        default=os.environ.get('DATABASE_URL') or f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        # Pooled connections are returned to the pool after each request instead
+        conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+    )
+}
+# Per database alias (each replica gets its own pool)
+DB_POOL_OPTIONS = {
+    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+}
+if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = dict(DB_POOL_OPTIONS)
+
+# Read replicas, comma separated (e.g. postgres://replica-1/db,postgres://replica-2/db), served round-robin
+# for safe-method requests; see core/db_router.py. To try it locally with SQLite, copy db.sqlite3 to
+# replica.sqlite3 and set DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 (copy again to "replicate")
+# along with a shared cache for the pins below, e.g. CACHE_BACKEND=...filebased.FileBasedCache.
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(), conn_max_age=DATABASES['default']['CONN_MAX_AGE'], conn_health_checks=DB_CONN_HEALTH_CHECKS
     )
+    if DB_POOL and DATABASES[alias]['ENGINE'] == 'django.db.backends.postgresql':
+        DATABASES[alias].setdefault('OPTIONS', {})['pool'] = dict(DB_POOL_OPTIONS)
+    # Tests run against the primary only
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# How long a client that wrote keeps reading from the primary; cover the usual replication lag
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+# Cache holding those pins; it must be shared by every worker, so replicas stay unused while it is a LocMemCache
+REPLICA_PIN_CACHE_ALIAS = os.environ.get('REPLICA_PIN_CACHE_ALIAS', 'default')
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
 }
 
 # Password validation
@@ -124,19 +192,107 @@ AUTH_USER_MODEL = 'authentication.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.ClaimsJWTAuthentication',
     ),
+    # orjson-backed JSON when installed, DRF's JSON otherwise (see core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    # Token buckets per business, anonymous IP and endpoint class (see core/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.BusinessRateThrottle',
+        'core.throttling.AnonReadRateThrottle',
+        'core.throttling.EndpointRateThrottle',
+    ],
+    # '<count>/<period>[:<burst>]'
+    'DEFAULT_THROTTLE_RATES': {
+        'business': os.environ.get('THROTTLE_RATE_BUSINESS', '1200/min:300'),
+        'anon_read': os.environ.get('THROTTLE_RATE_ANON_READ', '300/min:60'),
+        'login': os.environ.get('THROTTLE_RATE_LOGIN', '10/min:5'),
+        'chat_write': os.environ.get('THROTTLE_RATE_CHAT_WRITE', '60/min:20'),
+        'product_write': os.environ.get('THROTTLE_RATE_PRODUCT_WRITE', '300/min:100'),
+    },
+    # Proxies in front of the app, so client IPs come from X-Forwarded-For
+    'NUM_PROXIES': int(os.environ['NUM_PROXIES']) if os.environ.get('NUM_PROXIES') else None,
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(seconds=int(os.environ.get('JWT_ACCESS_TOKEN_LIFETIME', 3600))),
     'REFRESH_TOKEN_LIFETIME': timedelta(seconds=int(os.environ.get('JWT_REFRESH_TOKEN_LIFETIME', 86400))),
+    # Business, role and token-version claims (see apps/authentication/tokens.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.authentication.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.authentication.serializers.ClaimsTokenRefreshSerializer',
 }
 
+# Authenticated users (with role and business) are cached per user id
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+# How often each process checks whether another one changed a Role policy
+AUTH_POLICY_CHECK_INTERVAL = int(os.environ.get('AUTH_POLICY_CHECK_INTERVAL', 5))
+# Current token version per user, checked by safe requests instead of loading the user
+AUTH_TOKEN_VERSION_TTL = int(os.environ.get('AUTH_TOKEN_VERSION_TTL', 86400))
+
+# Largest list accepted by the product bulk_create/bulk_update/bulk_approve endpoints
+PRODUCT_BULK_MAX_ITEMS = int(os.environ.get('PRODUCT_BULK_MAX_ITEMS', 1000))
+
+# Rows fetched per server-side cursor round trip by the product export
+PRODUCT_EXPORT_CHUNK_SIZE = int(os.environ.get('PRODUCT_EXPORT_CHUNK_SIZE', 2000))
+
+# Product change feed: largest ?limit=, how old an entry must be before it is
+# served (the longest a product write transaction may stay open without its
+# entry being skipped, so keep it above the slowest bulk write or import batch),
+# and how long entries are kept by compact_product_changes
+PRODUCT_CHANGES_MAX_BATCH = int(os.environ.get('PRODUCT_CHANGES_MAX_BATCH', 1000))
+PRODUCT_CHANGES_SETTLE_SECONDS = float(os.environ.get('PRODUCT_CHANGES_SETTLE_SECONDS', 30))
+PRODUCT_CHANGES_RETENTION_DAYS = int(os.environ.get('PRODUCT_CHANGES_RETENTION_DAYS', 30))
+
+# Anonymous product list/detail responses
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 300))
+
+# In-memory product indexes behind /api/chat/context/
+CHAT_RETRIEVAL_MAX_INDEXES = int(os.environ.get('CHAT_RETRIEVAL_MAX_INDEXES', 64))
+CHAT_RETRIEVAL_MAX_AGE = int(os.environ.get('CHAT_RETRIEVAL_MAX_AGE', 300))
+
+# Chat messages older than this move to compressed archive segments (archive_chat_history)
+CHAT_ARCHIVE_AFTER_DAYS = int(os.environ.get('CHAT_ARCHIVE_AFTER_DAYS', 90))
+CHAT_ARCHIVE_SEGMENT_SIZE = int(os.environ.get('CHAT_ARCHIVE_SEGMENT_SIZE', 500))
+
+# Per-user buffer of recent turns behind /api/chat/history/window/
+CHAT_WINDOW_CACHE_ALIAS = 'default'
+CHAT_WINDOW_SIZE = int(os.environ.get('CHAT_WINDOW_SIZE', 50))
+CHAT_WINDOW_TTL = int(os.environ.get('CHAT_WINDOW_TTL', 3600))
+
+# OpenAI-compatible endpoint behind /api/chat/completions/
+CHAT_LLM_BASE_URL = os.environ.get('CHAT_LLM_BASE_URL', 'https://openrouter.ai/api/v1')
+CHAT_LLM_API_KEY = os.environ.get('CHAT_LLM_API_KEY', os.environ.get('OPENROUTER_API_KEY', ''))
+CHAT_LLM_MODEL = os.environ.get('CHAT_LLM_MODEL', 'mistralai/mistral-7b-instruct:free')
+CHAT_LLM_TIMEOUT = float(os.environ.get('CHAT_LLM_TIMEOUT', 60))
+CHAT_LLM_MAX_TOKENS = int(os.environ.get('CHAT_LLM_MAX_TOKENS', 500))
+# Completions per business at a time, counted in CHAT_LLM_SLOT_CACHE_ALIAS: point it at a shared
+# cache (Redis or Memcached) for the limit to span workers; with LocMemCache it is per process
+CHAT_LLM_MAX_CONCURRENCY = int(os.environ.get('CHAT_LLM_MAX_CONCURRENCY', 4))
+CHAT_LLM_SLOT_CACHE_ALIAS = os.environ.get('CHAT_LLM_SLOT_CACHE_ALIAS', 'default')
+CHAT_LLM_QUEUE_TIMEOUT = float(os.environ.get('CHAT_LLM_QUEUE_TIMEOUT', 5))
+
+# Per-process cache of answers to repeated questions (see apps/chat/answer_cache.py)
+CHAT_ANSWER_CACHE_ENABLED = os.environ.get('CHAT_ANSWER_CACHE_ENABLED', 'True') == 'True'
+CHAT_ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get('CHAT_ANSWER_CACHE_MAX_ENTRIES', 1000))
+CHAT_ANSWER_CACHE_TTL = int(os.environ.get('CHAT_ANSWER_CACHE_TTL', 3600))
+
+# Throttle buckets must live in a cache shared by all workers (Redis or Memcached) to hold across them
+THROTTLE_CACHE_ALIAS = os.environ.get('THROTTLE_CACHE_ALIAS', 'default')
+
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
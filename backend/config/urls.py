@@ -1,9 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
+from core.views import PerformanceMetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('apps.authentication.urls')),
     path('api/products/', include('apps.products.urls')),
     path('api/chat/', include('apps.chat.urls')),
+    path('api/metrics/', PerformanceMetricsView.as_view(), name='performance-metrics'),
 ]
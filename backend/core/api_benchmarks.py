@@ -0,0 +1,122 @@
+"""
+In-process benchmark scenarios for the hot API endpoints, driven through
+DRF's APIClient against whatever database is active.
+"""
+import itertools
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count
+from django.test.utils import override_settings
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from apps.products.models import Product
+from apps.products.signals import products_bulk_changed
+from .benchmarking import measure
+
+User = get_user_model()
+
+BENCHMARK_PASSWORD = 'password123'  # set by populate_dummy_data
+
+
+class BenchmarkRequestFailed(Exception):
+    pass
+
+
+def seed_dataset(products, businesses, chat_messages, seed):
+    call_command(
+        'populate_dummy_data', products=products, businesses=businesses,
+        chat_messages=chat_messages, seed=seed, stdout=StringIO()
+    )
+
+
+def _expect(response, status_code):
+    if response.status_code != status_code:
+        raise BenchmarkRequestFailed(
+            f'{response.request["REQUEST_METHOD"]} {response.request["PATH_INFO"]} '
+            f'returned {response.status_code}, expected {status_code}'
+        )
+    return response
+
+
+class ApiBenchmark:
+    def __init__(self, iterations=50, warmup=5):
+        self.iterations = iterations
+        self.warmup = warmup
+
+    def setup(self):
+        business_id = (
+            Product.objects.values('business_id').annotate(total=Count('id')).order_by('-total')
+            .values_list('business_id', flat=True).first()
+        )
+        self.admin = User.objects.get(business_id=business_id, role__name='admin', username__startswith='admin_')
+        self.search_term = Product.objects.filter(status='approved').values_list('name', flat=True).first().split()[0]
+        self.product_id = Product.objects.filter(status='approved').values_list('id', flat=True).first()
+        self.last_page = max(1, -(-Product.objects.filter(status='approved').count() // api_settings.PAGE_SIZE))
+
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        tokens = _expect(self.client.post(
+            '/api/auth/login/', {'username': self.admin.username, 'password': BENCHMARK_PASSWORD}
+        ), 200).data
+        self.refresh_token = tokens['refresh']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        # Fresh drafts so every approve iteration has something to approve
+        drafts = [
+            Product(
+                name=f'Benchmark draft {index}', description='Benchmark', price='10.00',
+                status='pending_approval', business_id=business_id, created_by=self.admin
+            )
+            for index in range(self.iterations + self.warmup)
+        ]
+        Product.objects.bulk_create(drafts)
+        products_bulk_changed.send(
+            sender=Product, business_ids={business_id}, product_ids=[draft.pk for draft in drafts],
+            products=drafts, created=True
+        )
+        self.drafts = iter(drafts)
+        self.counter = itertools.count()
+
+    def scenarios(self):
+        anonymous, client = self.anonymous, self.client
+        return {
+            'product_list': lambda: _expect(anonymous.get('/api/products/'), 200),
+            'product_list_cached': lambda: _expect(anonymous.get('/api/products/', {'cached': '1'}), 200),
+            'product_list_search': lambda: _expect(anonymous.get('/api/products/', {'search': self.search_term}), 200),
+            'product_list_filter': lambda: _expect(anonymous.get('/api/products/', {'min_price': '100', 'max_price': '400'}), 200),
+            'product_list_ordering': lambda: _expect(anonymous.get('/api/products/', {'ordering': '-price'}), 200),
+            'product_list_deep_page': lambda: _expect(anonymous.get('/api/products/', {'page': self.last_page}), 200),
+            'product_retrieve': lambda: _expect(anonymous.get(f'/api/products/{self.product_id}/'), 200),
+            'product_list_internal': lambda: _expect(client.get('/api/products/list_internal/'), 200),
+            'product_create': lambda: _expect(client.post('/api/products/', {
+                'name': f'Benchmark product {next(self.counter)}', 'description': 'Benchmark', 'price': '12.50'
+            }), 201),
+            'product_approve': lambda: _expect(client.post(
+                f'/api/products/{next(self.drafts).id}/approve/', {'approved': True}
+            ), 200),
+            'chat_history_list': lambda: _expect(client.get('/api/chat/history/'), 200),
+            'chat_history_create': lambda: _expect(client.post('/api/chat/history/', {
+                'user_message': 'What do you sell?', 'ai_response': 'Lots of things.'
+            }), 201),
+            'jwt_login': lambda: _expect(anonymous.post('/api/auth/login/', {
+                'username': self.admin.username, 'password': BENCHMARK_PASSWORD
+            }), 200),
+            'jwt_refresh': lambda: _expect(anonymous.post('/api/auth/refresh/', {'refresh': self.refresh_token}), 200),
+        }
+
+    def run(self, only=None):
+        results = {}
+        # Repeating a request faster than any client would trips the throttles; with no rates they all pass
+        rest_framework = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+        for name, operation in self.scenarios().items():
+            if only and name not in only:
+                continue
+            # Anonymous catalog reads are measured uncached unless the scenario says otherwise
+            ttl = 300 if name.endswith('_cached') else 0
+            with override_settings(CATALOG_CACHE_TTL=ttl, REST_FRAMEWORK=rest_framework):
+                results[name] = measure(operation, self.iterations, self.warmup)
+        return results
@@ -0,0 +1,70 @@
+"""
+Async read-only JSON views for ASGI deployments.
+
+DRF views are synchronous, so under ASGI Django runs each of them in a worker
+thread for the whole request. AsyncReadOnlyView keeps the request on the
+event loop instead: bearer tokens are checked with ClaimsJWTAuthentication
+(claims tokens only read the cache on GETs), the default DRF throttles apply,
+and every ORM step is awaited, so a request waiting on the database does not
+hold a thread in between.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.exceptions import APIException, NotAuthenticated, Throttled
+from rest_framework.request import Request
+
+from apps.authentication.authentication import ClaimsJWTAuthentication
+from .pagination import KeysetPagination
+from .throttling import throttle_wait
+
+
+def error_response(exc):
+    detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+    response = JsonResponse(detail, status=exc.status_code)
+    if getattr(exc, 'wait', None):
+        response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+class AsyncReadOnlyView(View):
+    """
+    Subclasses implement `async def read(self, request, *args, **kwargs)`
+    returning JSON-serializable data. request.user is set before it runs, and
+    DRF exceptions raised from it become the usual error responses.
+    """
+    http_method_names = ['get', 'head', 'options']
+    authentication_class = ClaimsJWTAuthentication
+    authentication_required = False
+    pagination_class = KeysetPagination
+    keyset_ordering = '-created_at'
+    ordering_fields = []
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+            if self.authentication_required and not request.user.is_authenticated:
+                raise NotAuthenticated()
+            wait = await sync_to_async(throttle_wait)(request, self)
+            if wait is not None:
+                raise Throttled(wait)
+            return JsonResponse(await self.read(request, *args, **kwargs), safe=False)
+        except APIException as exc:
+            return error_response(exc)
+
+    async def authenticate(self, request):
+        auth = await sync_to_async(self.authentication_class().authenticate)(request)
+        return auth[0] if auth is not None else AnonymousUser()
+
+    async def read(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    async def paginate(self, queryset, request, serialize):
+        """
+        One keyset page of queryset as {'next', 'previous', 'results'}, the
+        same shape as the DRF views' cursor pages.
+        """
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, Request(request), view=self)
+        return paginator.get_paginated_response(serialize(page)).data
@@ -0,0 +1,109 @@
+"""
+Helpers shared by the benchmark management commands: timing, percentiles,
+JSON result files and baseline comparison.
+"""
+import json
+import platform
+import statistics
+import time
+
+import django
+from django.db import connection
+
+from .query_budget import QueryCounter
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies, queries=None):
+    """
+    Summarize per-iteration latencies (seconds) as milliseconds and throughput.
+    """
+    total = sum(latencies)
+    summary = {
+        'iterations': len(latencies),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3) if latencies else 0.0,
+        'throughput_per_s': round(len(latencies) / total, 1) if total else 0.0,
+    }
+    if queries is not None:
+        summary['queries'] = max(queries) if queries else 0
+    return summary
+
+
+def measure(operation, iterations, warmup=0, count_queries=True):
+    """
+    Run operation() warmup + iterations times and summarize the timed runs.
+    operation() should raise if the call it makes does not succeed.
+    """
+    for _ in range(warmup):
+        operation()
+    latencies, queries = [], []
+    for _ in range(iterations):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - started)
+        queries.append(counter.count)
+    return summarize(latencies, queries if count_queries else None)
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def write_results(path, results):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def compare(results, baseline, tolerance=0.2, metric='p50_ms'):
+    """
+    Compare the 'scenarios' of two result files. Returns one row per scenario
+    present in both: (name, baseline value, current value, ratio, regressed).
+    A scenario regresses when its metric grows by more than `tolerance` or it
+    runs more queries than before.
+    """
+    rows = []
+    for name, current in sorted(results.get('scenarios', {}).items()):
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None or metric not in previous:
+            continue
+        before, after = previous[metric], current[metric]
+        ratio = after / before if before else float('inf') if after else 1.0
+        regressed = ratio > 1 + tolerance or current.get('queries', 0) > previous.get('queries', current.get('queries', 0))
+        rows.append((name, before, after, ratio, regressed))
+    return rows
+
+
+def format_comparison(rows, metric='p50_ms'):
+    lines = [f"{'scenario':<32} {'baseline':>12} {'current':>12} {'ratio':>8}"]
+    for name, before, after, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        lines.append(f'{name:<32} {before:>12.3f} {after:>12.3f} {ratio:>8.2f}{flag}')
+    lines.append(f'({metric})')
+    return '\n'.join(lines)
@@ -0,0 +1,164 @@
+"""
+Read-replica routing.
+
+Settings list the replica aliases in DATABASE_REPLICAS. ReplicaRouter sends
+reads to them, round-robin, only while replica reads are allowed for the
+current context; everything else (writes, migrations, management commands,
+reads inside a transaction) stays on the primary, so code that reads what it
+just wrote keeps working unless it opts in.
+
+ReplicaRoutingMiddleware allows replica reads for safe-method requests. Any
+unsafe request pins its client to the primary for REPLICA_PIN_SECONDS, so the
+client reads its own writes while the replicas catch up. Clients are
+recognised by their bearer token's user id, pinned in REPLICA_PIN_CACHE_ALIAS,
+and by a cookie for token-less clients such as browsers logging in.
+
+A pin must reach every worker, so replicas are left unused (with a warning)
+while that cache is a per-process LocMemCache; point it at Redis, Memcached
+or another shared backend.
+"""
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+PIN_COOKIE = 'db_pin'
+
+logger = logging.getLogger(__name__)
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_warned = False
+
+
+def get_pin_cache():
+    return caches[getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', 'default')]
+
+
+def get_replicas():
+    """Replica aliases, or none while pins could not be shared between workers"""
+    global _warned
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    if replicas and isinstance(get_pin_cache(), LocMemCache):
+        if not _warned:
+            _warned = True
+            logger.warning('Read replicas are unused: REPLICA_PIN_CACHE_ALIAS is a per-process LocMemCache')
+        return []
+    return replicas
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    """Allow (or forbid) replica reads for the enclosed block"""
+    token = _replica_reads.set(allowed)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads_allowed():
+    return _replica_reads.get()
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._replicas = None
+        self._cycle = None
+
+    def next_replica(self):
+        replicas = get_replicas()
+        with self._lock:
+            if replicas != self._replicas:
+                self._replicas = list(replicas)
+                self._cycle = itertools.cycle(self._replicas)
+            return next(self._cycle)
+
+    def db_for_read(self, model, **hints):
+        if not get_replicas() or not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        # A transaction on the primary must see its own uncommitted writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return self.next_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data, so objects may relate across aliases
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def pin_key(user_id):
+    return f'db:pin:user:{user_id}'
+
+
+def bearer_user_id(request):
+    """User id from the request's access token, or None"""
+    header = request.headers.get('Authorization', '').split()
+    if len(header) != 2 or header[0] not in jwt_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        return AccessToken(header[1]).get(jwt_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Allows replica reads for safe requests from clients that have not
+    written recently, and pins clients that write. A no-op without replicas.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_replicas():
+            return self.get_response(request)
+        user_id = bearer_user_id(request)
+        with replica_reads(self.use_replicas(request, user_id)):
+            response = self.get_response(request)
+        return self.finish(request, response, user_id)
+
+    async def __acall__(self, request):
+        if not get_replicas():
+            return await self.get_response(request)
+        user_id = bearer_user_id(request)
+        with replica_reads(self.use_replicas(request, user_id)):
+            response = await self.get_response(request)
+        return self.finish(request, response, user_id)
+
+    def use_replicas(self, request, user_id):
+        if request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES:
+            return user_id is None or not get_pin_cache().get(pin_key(user_id))
+        return False
+
+    def finish(self, request, response, user_id):
+        if request.method not in SAFE_METHODS:
+            seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+            if user_id is not None:
+                get_pin_cache().set(pin_key(user_id), True, seconds)
+            response.set_cookie(PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+        return response
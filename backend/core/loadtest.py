@@ -0,0 +1,83 @@
+"""
+Closed-loop HTTP load generator for comparing server setups, e.g. gunicorn
+sync workers serving config.wsgi against uvicorn workers serving config.asgi.
+
+Each client thread keeps one keep-alive connection per host and sends GETs
+back to back, cycling through the target's URLs, until the duration is up.
+"""
+import http.client
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from .benchmarking import summarize
+
+
+def _connect(parts, timeout):
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    return connection_class(parts.hostname, parts.port, timeout=timeout)
+
+
+def run_load(urls, concurrency=32, duration=10.0, headers=None, timeout=30):
+    """
+    Load `urls` from `concurrency` clients for `duration` seconds. Returns the
+    latency summary of completed requests with overall throughput, status
+    counts and the number of failed connections.
+    """
+    targets = []
+    for url in urls:
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        targets.append((parts, f'{path}?{parts.query}' if parts.query else path))
+
+    lock = threading.Lock()
+    latencies, statuses, failures = [], Counter(), [0]
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        connections = {}
+        local_latencies, local_statuses, local_failures = [], Counter(), 0
+        sent = offset
+        while time.perf_counter() < deadline:
+            parts, path = targets[sent % len(targets)]
+            sent += 1
+            connection = connections.get(parts.netloc)
+            if connection is None:
+                connection = connections[parts.netloc] = _connect(parts, timeout)
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers or {})
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                del connections[parts.netloc]
+                local_failures += 1
+                continue
+            local_latencies.append(time.perf_counter() - started)
+            local_statuses[response.status] += 1
+            if response.will_close:
+                connection.close()
+                del connections[parts.netloc]
+        for connection in connections.values():
+            connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+            failures[0] += local_failures
+
+    threads = [threading.Thread(target=client, args=(index,), daemon=True) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies)
+    # summarize() assumes sequential calls; with concurrent clients throughput is requests over wall time
+    summary['throughput_per_s'] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    summary['statuses'] = {str(code): count for code, count in sorted(statuses.items())}
+    summary['errors'] = failures[0] + sum(count for code, count in statuses.items() if code >= 400)
+    return summary
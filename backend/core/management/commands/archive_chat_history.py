@@ -0,0 +1,32 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.chat.archive import archive_batch
+
+
+class Command(BaseCommand):
+    help = 'Move old chat messages into compressed archive segments, in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=None, help='Defaults to CHAT_ARCHIVE_AFTER_DAYS')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Messages archived per transaction')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+
+    def handle(self, *args, **options):
+        days = options['older_than_days']
+        if days is None:
+            days = getattr(settings, 'CHAT_ARCHIVE_AFTER_DAYS', 90)
+        if days < 0 or options['batch_size'] < 1:
+            raise CommandError('--older-than-days must not be negative and --batch-size must be positive')
+        cutoff = timezone.now() - timedelta(days=days)
+
+        total = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            archived = archive_batch(cutoff, batch_size=options['batch_size'])
+            if not archived:
+                break
+            total += archived
+            batches += 1
+            self.stdout.write(f'  batch {batches}: {archived} messages')
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} messages older than {days} days in {batches} batch(es)'))
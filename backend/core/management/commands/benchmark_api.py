@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from core.api_benchmarks import ApiBenchmark, seed_dataset
+from core.benchmarking import compare, environment, format_comparison, load_results, write_results
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot API endpoints in-process against a freshly seeded test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--businesses', type=int, default=5)
+        parser.add_argument('--chat-messages', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenario', action='append', dest='scenarios', help='Only run this scenario (repeatable)')
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+        parser.add_argument('--baseline', help='Results file to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p50 slowdown before flagging, e.g. 0.2 = 20%%')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        # A throwaway test database (in-memory for SQLite) keeps real data untouched
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Seeding {options['products']} products...")
+            seed_dataset(options['products'], options['businesses'], options['chat_messages'], options['seed'])
+            benchmark = ApiBenchmark(iterations=options['iterations'], warmup=options['warmup'])
+            benchmark.setup()
+            scenarios = benchmark.run(only=options['scenarios'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        results = {
+            'environment': environment(),
+            'dataset': {key: options[key] for key in ('products', 'businesses', 'chat_messages', 'seed')},
+            'scenarios': scenarios,
+        }
+        write_results(options['output'], results)
+
+        self.stdout.write(f"{'scenario':<32} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'req/s':>9} {'queries':>8}")
+        for name, summary in scenarios.items():
+            self.stdout.write(
+                f"{name:<32} {summary['p50_ms']:>9.2f} {summary['p90_ms']:>9.2f} {summary['p99_ms']:>9.2f} "
+                f"{summary['throughput_per_s']:>9.1f} {summary['queries']:>8}"
+            )
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            rows = compare(results, load_results(options['baseline']), options['tolerance'])
+            self.stdout.write(format_comparison(rows))
+            regressions = [row[0] for row in rows if row[4]]
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"Regressions: {', '.join(regressions)}")
@@ -0,0 +1,70 @@
+import time
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand
+from apps.authentication.policy import registry
+from apps.products.permissions import ProductPermission
+from apps.products.views import ProductViewSet
+
+ACTIONS = ['list', 'create', 'partial_update', 'destroy', 'approve', 'bulk_approve', 'stats']
+ROLES = ['admin', 'editor', 'approver', 'viewer']
+
+
+def legacy_has_permission(request, view):
+    # ProductPermission.has_permission as it was before the compiled policy
+    if view.action in ['list', 'retrieve']:
+        return True
+    if not request.user.is_authenticated:
+        return False
+
+    pass_map = {
+        'create': ['admin', 'editor', 'approver'],
+        'update': ['admin', 'editor', 'approver'],
+        'partial_update': ['admin', 'editor', 'approver'],
+        'destroy': ['admin'],
+        'approve': ['admin', 'approver'],
+        'bulk_create': ['admin', 'editor', 'approver'],
+        'bulk_update': ['admin', 'editor', 'approver'],
+        'bulk_approve': ['admin', 'approver'],
+    }
+
+    if view.action in pass_map:
+        return request.user.role and request.user.role.name in pass_map[view.action]
+
+    return True
+
+
+class Command(BaseCommand):
+    help = 'Compare the per-check cost of the compiled role policy with the old inline role maps'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200000)
+
+    def handle(self, *args, **options):
+        cases = []
+        for role in ROLES:
+            user = SimpleNamespace(is_authenticated=True, role=SimpleNamespace(name=role))
+            for action in ACTIONS:
+                view = SimpleNamespace(
+                    action=action, public_actions=ProductViewSet.public_actions,
+                    action_permissions=ProductViewSet.action_permissions
+                )
+                cases.append((SimpleNamespace(user=user), view))
+
+        compiled = ProductPermission().has_permission
+        registry.table()  # compile outside the timed loop
+        mismatches = [(r.user.role.name, v.action) for r, v in cases if bool(compiled(r, v)) != bool(legacy_has_permission(r, v))]
+
+        results = {}
+        for label, check in (('legacy', legacy_has_permission), ('compiled', compiled)):
+            rounds = max(1, options['iterations'] // len(cases))
+            started = time.perf_counter()
+            for _ in range(rounds):
+                for request, view in cases:
+                    check(request, view)
+            elapsed = time.perf_counter() - started
+            results[label] = elapsed / (rounds * len(cases)) * 1e9
+            self.stdout.write(f'{label:<10} {results[label]:>8.1f} ns/check')
+
+        self.stdout.write(f"speedup    {results['legacy'] / results['compiled']:>8.2f}x")
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f'Decisions differ from the legacy maps for: {mismatches}'))
@@ -0,0 +1,63 @@
+import io
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from apps.products.models import Product
+from apps.products.serializers import ProductSerializer
+from core.api_benchmarks import seed_dataset
+from core.benchmarking import measure
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+
+PAGE_SIZES = [10, 50, 100, 500, 1000]
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF\'s JSONRenderer/JSONParser with the orjson-backed ones on product list pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--page-size', type=int, action='append', dest='page_sizes')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; the fast classes fall back to DRF\'s'))
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Seeding {options['products']} products...")
+            seed_dataset(options['products'], 1, 0, options['seed'])
+            queryset = Product.objects.select_related('business', 'created_by').order_by('-created_at', '-id')
+            pages = {
+                size: {'count': options['products'], 'next': None, 'previous': None,
+                       'results': ProductSerializer(queryset[:size], many=True).data}
+                for size in options['page_sizes'] or PAGE_SIZES
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        iterations, warmup = options['iterations'], options['warmup']
+        self.stdout.write(
+            f"{'page size':>9} {'bytes':>9} {'render ms':>10} {'fast ms':>9} {'speedup':>8}"
+            f" | {'parse ms':>9} {'fast ms':>9} {'speedup':>8}"
+        )
+        for size, page in pages.items():
+            body = JSONRenderer().render(page)
+            if FastJSONRenderer().render(page) != body:
+                self.stdout.write(self.style.WARNING(f'Rendered bytes differ at page size {size}'))
+            render, fast_render = (
+                measure(lambda renderer=renderer: renderer.render(page), iterations, warmup, count_queries=False)['p50_ms']
+                for renderer in (JSONRenderer(), FastJSONRenderer())
+            )
+            parse, fast_parse = (
+                measure(lambda parser=parser: parser.parse(io.BytesIO(body)), iterations, warmup, count_queries=False)['p50_ms']
+                for parser in (JSONParser(), FastJSONParser())
+            )
+            self.stdout.write(
+                f'{size:>9} {len(body):>9} {render:>10.3f} {fast_render:>9.3f} {render / fast_render:>7.2f}x'
+                f' | {parse:>9.3f} {fast_parse:>9.3f} {parse / fast_parse:>7.2f}x'
+            )
+        self.stdout.write('(p50 ms per page)')
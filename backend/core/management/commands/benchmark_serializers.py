@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework import serializers
+from apps.products.models import Product
+from apps.products.rows import parse_projection, project_queryset
+from apps.products.serializers import ProductSerializer
+from core.api_benchmarks import seed_dataset
+from core.benchmarking import measure
+
+PAGE_SIZES = [10, 50, 100, 250, 500, 1000]
+SPARSE_FIELDS = 'id,name,price,status'
+
+
+class DRFProductSerializer(ProductSerializer):
+    """ProductSerializer with DRF's stock ListSerializer, as before the fast path"""
+    class Meta(ProductSerializer.Meta):
+        list_serializer_class = serializers.ListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare fetching and serializing product pages with DRF fields, the fast path and a sparse fieldset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--page-size', type=int, action='append', dest='page_sizes')
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Seeding {options['products']} products...")
+            seed_dataset(options['products'], 1, 0, options['seed'])
+            rows = self.run(options['page_sizes'] or PAGE_SIZES, options['iterations'], options['warmup'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{'page size':>9} {'drf ms':>9} {'fast ms':>9} {'speedup':>8} {'sparse ms':>10} {'speedup':>8}"
+            f" | {'drf ser':>8} {'fast ser':>9} {'speedup':>8}"
+        )
+        for size, drf, fast, sparse, drf_only, fast_only in rows:
+            self.stdout.write(
+                f'{size:>9} {drf:>9.2f} {fast:>9.2f} {drf / fast:>7.2f}x {sparse:>10.2f} {drf / sparse:>7.2f}x'
+                f' | {drf_only:>8.2f} {fast_only:>9.2f} {drf_only / fast_only:>7.2f}x'
+            )
+        self.stdout.write(
+            f'(p50 ms per page: fetch + serialize, then serialize only; sparse = ?fields={SPARSE_FIELDS})'
+        )
+
+    def run(self, page_sizes, iterations, warmup):
+        queryset = Product.objects.select_related('business', 'created_by').order_by('-created_at', '-id')
+        fields = parse_projection({'fields': SPARSE_FIELDS})
+        sparse_queryset = project_queryset(queryset, fields)
+        rows = []
+        for size in page_sizes:
+            def drf():
+                return DRFProductSerializer(list(queryset[:size]), many=True).data
+
+            def fast():
+                return ProductSerializer(list(queryset[:size]), many=True).data
+
+            def sparse():
+                return ProductSerializer(list(sparse_queryset[:size]), many=True, context={'fields': fields}).data
+
+            page = list(queryset[:size])
+
+            def drf_only():
+                return DRFProductSerializer(page, many=True).data
+
+            def fast_only():
+                return ProductSerializer(page, many=True).data
+
+            if drf_only() != fast_only():
+                self.stdout.write(self.style.WARNING(f'Fast path output differs from DRF at page size {size}'))
+            timings = [
+                measure(operation, iterations, warmup, count_queries=False)['p50_ms']
+                for operation in (drf, fast, sparse, drf_only, fast_only)
+            ]
+            rows.append((size, *timings))
+        return rows
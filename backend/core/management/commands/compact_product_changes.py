@@ -0,0 +1,29 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.products.changes import collapse, truncate
+
+
+class Command(BaseCommand):
+    help = 'Collapse superseded product change log entries and drop those past the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Retention; defaults to PRODUCT_CHANGES_RETENTION_DAYS')
+        parser.add_argument('--collapse-after-hours', type=int, default=24,
+                            help='Collapse superseded entries older than this')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Entries deleted per statement')
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = getattr(settings, 'PRODUCT_CHANGES_RETENTION_DAYS', 30)
+        if days < 0 or options['collapse_after_hours'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--days and --collapse-after-hours must not be negative and --batch-size must be positive')
+        now = timezone.now()
+
+        horizon, truncated = truncate(now - timedelta(days=days), options['batch_size'])
+        if horizon is not None:
+            self.stdout.write(f'Dropped {truncated} entries older than {days} days; cursors below {horizon} must resync')
+        collapsed = collapse(now - timedelta(hours=options['collapse_after_hours']), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Collapsed {collapsed} superseded entries'))
@@ -0,0 +1,196 @@
+import csv
+import json
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.authentication.models import Business
+from apps.products.models import Product, ProductImport
+from apps.products.signals import products_bulk_changed
+
+User = get_user_model()
+
+IMPORTED_FIELDS = ['name', 'description', 'price', 'status']
+MAX_REPORTED_REJECTS = 10
+
+
+class Command(BaseCommand):
+    help = 'Stream products for a business from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or NDJSON file')
+        parser.add_argument('--business', required=True, help='Business id or name')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and written per transaction')
+        parser.add_argument('--checkpoint', help="Name the progress is saved under (default: the file's absolute path)")
+        parser.add_argument('--resume', action='store_true', help='Continue after the rows recorded in the checkpoint')
+        parser.add_argument('--rejects', help='Write rejected rows and their errors to this NDJSON file')
+        parser.add_argument('--default-created-by', help='Username used when a row has no created_by_name')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        business = self.get_business(options['business'])
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+        # One lookup table for created_by instead of a query per row
+        self.users = dict(User.objects.filter(business=business).values_list('username', 'id'))
+        self.default_created_by = None
+        if options['default_created_by']:
+            if options['default_created_by'] not in self.users:
+                raise CommandError(f"User {options['default_created_by']} does not belong to {business.name}")
+            self.default_created_by = self.users[options['default_created_by']]
+
+        progress = self.get_progress(options['checkpoint'] or os.path.abspath(path), path, business, options['resume'])
+        if progress.records:
+            self.stdout.write(f'Resuming after record {progress.records}')
+
+        rejects = open(options['rejects'], 'a', encoding='utf-8') if options['rejects'] else None
+        started = time.monotonic()
+        imported_at_start = progress.imported
+        try:
+            with open(path, 'rb') as handle:
+                records = self.read_records(handle, file_format, progress.offset)
+                batch = []
+                for number, (record, offset) in enumerate(records, progress.records + 1):
+                    batch.append((number, record, offset))
+                    if len(batch) >= options['batch_size']:
+                        self.import_batch(business, batch, progress, rejects)
+                        self.report(progress, started, imported_at_start)
+                        batch = []
+                if batch:
+                    self.import_batch(business, batch, progress, rejects)
+        finally:
+            if rejects:
+                rejects.close()
+
+        self.report(progress, started, imported_at_start)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {progress.imported} products into {business.name} ({progress.rejected} rejected)'
+        ))
+
+    def get_business(self, value):
+        lookup = {'pk': int(value)} if value.isdigit() else {'name': value}
+        try:
+            return Business.objects.get(**lookup)
+        except Business.DoesNotExist:
+            raise CommandError(f'Business {value} does not exist')
+
+    def get_progress(self, name, path, business, resume):
+        """The saved progress to resume from, or a fresh record of it"""
+        progress = ProductImport.objects.filter(name=name).first()
+        if resume and progress is not None:
+            if progress.path != os.path.abspath(path) or progress.business_id != business.pk:
+                raise CommandError(f'Checkpoint {name} belongs to {progress.path} for business {progress.business_id}')
+            return progress
+        progress = ProductImport(pk=progress.pk if progress else None, name=name, path=os.path.abspath(path), business=business)
+        progress.save()
+        return progress
+
+    def read_lines(self, handle):
+        # readline() rather than iteration keeps handle.tell() exact
+        while True:
+            line = handle.readline()
+            if not line:
+                return
+            yield line.decode('utf-8')
+
+    def read_records(self, handle, file_format, offset=0):
+        """(record, byte offset just past it) for each record after offset"""
+        lines = self.read_lines(handle)
+        if file_format == 'csv':
+            # csv.reader pulls exactly the lines of each row, so tell() lands on row boundaries
+            reader = csv.reader(lines)
+            fieldnames = next(reader, None)
+            if fieldnames is None:
+                return
+            if offset:
+                handle.seek(offset)
+            for row in reader:
+                if row:
+                    yield dict(zip(fieldnames, row)), handle.tell()
+            return
+        if offset:
+            handle.seek(offset)
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else {'__invalid__': line}, handle.tell()
+
+    def clean_record(self, record):
+        if '__invalid__' in record:
+            return None, {'non_field_errors': ['Line is not a JSON object.']}
+
+        data, errors = {}, {}
+        for name in IMPORTED_FIELDS:
+            field = Product._meta.get_field(name)
+            value = record.get(name)
+            if value in (None, '') and field.has_default():
+                data[name] = field.get_default()
+                continue
+            try:
+                data[name] = field.clean(value, None)
+            except ValidationError as e:
+                errors[name] = e.messages
+        if data.get('status') == 'approved':
+            # Same rule as the API: approval goes through the approve flow
+            errors['status'] = ['Cannot set status to approved directly.']
+
+        username = record.get('created_by_name')
+        if username:
+            if username not in self.users:
+                errors['created_by_name'] = [f'Unknown user {username}.']
+            data['created_by_id'] = self.users.get(username)
+        else:
+            data['created_by_id'] = self.default_created_by
+        return data, errors
+
+    def import_batch(self, business, batch, progress, rejects):
+        products = []
+        for number, record, _ in batch:
+            data, errors = self.clean_record(record)
+            if errors:
+                progress.rejected += 1
+                self.reject(number, record, errors, progress, rejects)
+                continue
+            products.append(Product(business=business, **data))
+
+        # The progress commits with the batch, so resuming never writes it twice
+        with transaction.atomic():
+            Product.objects.bulk_create(products, batch_size=len(batch))
+            products_bulk_changed.send(
+                sender=Product,
+                business_ids={business.pk},
+                product_ids=[product.pk for product in products],
+                products=products,
+                created=True
+            )
+            progress.records, _, progress.offset = batch[-1]
+            progress.imported += len(products)
+            progress.save(update_fields=['records', 'offset', 'imported', 'rejected', 'updated_at'])
+
+    def reject(self, number, record, errors, progress, rejects):
+        if rejects:
+            rejects.write(json.dumps({'record': number, 'errors': errors, 'row': record}) + '\n')
+        if progress.rejected <= MAX_REPORTED_REJECTS:
+            self.stderr.write(f'Record {number} rejected: {json.dumps(errors)}')
+
+    def report(self, progress, started, imported_at_start):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        rate = (progress.imported - imported_at_start) / elapsed
+        self.stdout.write(
+            f'{progress.records} records read, {progress.imported} imported, '
+            f'{progress.rejected} rejected, {rate:.0f} rows/s'
+        )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmarking import environment, write_results
+from core.loadtest import run_load
+
+
+class Command(BaseCommand):
+    help = (
+        'Load running servers with concurrent clients and compare their throughput, e.g. '
+        '--target wsgi=http://127.0.0.1:8000/api/products/ '
+        '--target asgi=http://127.0.0.1:8001/api/products/async/. '
+        'Start the servers with THROTTLE_RATE_* raised, or most responses will be 429s'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', dest='targets', required=True, metavar='NAME=URL',
+            help='Server setup to load; repeat a name to cycle through several URLs'
+        )
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per target')
+        parser.add_argument('--token', help='JWT access token sent as a Bearer header')
+        parser.add_argument('--output', default='loadtest_results.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        targets = {}
+        for spec in options['targets']:
+            name, _, url = spec.partition('=')
+            if not name or not url.startswith(('http://', 'https://')):
+                raise CommandError(f'Invalid target {spec!r}, expected NAME=http://host:port/path')
+            targets.setdefault(name, []).append(url)
+        headers = {'Authorization': f"Bearer {options['token']}"} if options['token'] else None
+
+        results = {}
+        for name, urls in targets.items():
+            self.stdout.write(f"Loading {name} with {options['concurrency']} clients for {options['duration']}s...")
+            results[name] = run_load(urls, options['concurrency'], options['duration'], headers)
+            results[name]['urls'] = urls
+
+        write_results(options['output'], {
+            'environment': environment(),
+            'concurrency': options['concurrency'],
+            'duration': options['duration'],
+            'targets': results,
+        })
+
+        self.stdout.write(f"{'target':<16} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'requests':>9} {'errors':>7}")
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<16} {summary['throughput_per_s']:>9.1f} {summary['p50_ms']:>9.2f} {summary['p90_ms']:>9.2f} "
+                f"{summary['p99_ms']:>9.2f} {summary['iterations']:>9} {summary['errors']:>7}"
+            )
+        baseline_name, baseline = next(iter(results.items()))
+        for name, summary in list(results.items())[1:]:
+            if baseline['throughput_per_s']:
+                ratio = summary['throughput_per_s'] / baseline['throughput_per_s']
+                self.stdout.write(f'{name}: {ratio:.2f}x the throughput of {baseline_name}')
+        self.stdout.write(f"Results written to {options['output']}")
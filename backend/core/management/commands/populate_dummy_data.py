@@ -1,77 +1,218 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
 from apps.authentication.models import Business, Role
 from apps.products.models import Product
+from apps.products.signals import products_bulk_changed
 from apps.chat.models import ChatHistory
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
 from faker import Faker
+import multiprocessing
 import random
+import time
 
 User = get_user_model()
-fake = Faker()
+
+ROLES = ['admin', 'editor', 'approver', 'viewer']
+STATUSES = ['draft', 'pending_approval', 'approved', 'rejected']
+# Faker is slow per call, so rows are assembled from pools of pre-generated text
+TEXT_POOL_SIZE = 1000
+
+
+def build_text_pools(seed):
+    fake = Faker()
+    fake.seed_instance(seed)
+    return {
+        'product_names': [fake.bs().title() for _ in range(TEXT_POOL_SIZE)],  # 'bs' gives somewhat business-y phrases
+        'descriptions': [fake.catch_phrase() for _ in range(TEXT_POOL_SIZE)],
+        'user_messages': [fake.sentence() for _ in range(TEXT_POOL_SIZE)],
+        'ai_responses': [fake.paragraph() for _ in range(TEXT_POOL_SIZE)],
+    }
+
+
+def generate_products(shard, count, seed, businesses, batch_size):
+    """
+    Insert `count` products spread over `businesses`, a list of
+    (business_id, creator_ids, approver_ids). Runs in-process or in a worker.
+    """
+    rng = random.Random(f'{seed}-products-{shard}')
+    pools = build_text_pools(seed)
+    now = timezone.now()
+    created = 0
+    while created < count:
+        batch = []
+        for _ in range(min(batch_size, count - created)):
+            business_id, creator_ids, approver_ids = rng.choice(businesses)
+            status = rng.choice(STATUSES)
+            approved = status == 'approved'
+            batch.append(Product(
+                name=rng.choice(pools['product_names']),
+                description=rng.choice(pools['descriptions']),
+                price=Decimal(f'{rng.uniform(10.0, 500.0):.2f}'),
+                status=status,
+                business_id=business_id,
+                created_by_id=rng.choice(creator_ids),
+                approved_by_id=rng.choice(approver_ids) if approved else None,
+                approved_at=now if approved else None,
+            ))
+        with transaction.atomic():
+            Product.objects.bulk_create(batch)
+            products_bulk_changed.send(
+                sender=Product,
+                business_ids={product.business_id for product in batch},
+                product_ids=[product.pk for product in batch],
+                products=batch,
+                created=True
+            )
+        created += len(batch)
+    return created
+
+
+def generate_chat_messages(shard, count, seed, users, batch_size):
+    """
+    Insert `count` chat messages for `users`, a list of (user_id, business_id).
+    """
+    rng = random.Random(f'{seed}-chat-{shard}')
+    pools = build_text_pools(seed)
+    created = 0
+    while created < count:
+        batch = []
+        for _ in range(min(batch_size, count - created)):
+            user_id, business_id = rng.choice(users)
+            batch.append(ChatHistory(
+                user_id=user_id,
+                business_id=business_id,
+                user_message=rng.choice(pools['user_messages']),
+                ai_response=rng.choice(pools['ai_responses']),
+            ))
+        ChatHistory.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def split(total, parts):
+    size, extra = divmod(total, parts)
+    return [size + (1 if index < extra else 0) for index in range(parts)]
+
 
 class Command(BaseCommand):
     help = 'Populate the database with dummy data'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=3)
+        parser.add_argument('--users-per-role', type=int, default=1, help='Users created per role in each business')
+        parser.add_argument('--products', type=int, default=20)
+        parser.add_argument('--chat-messages', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible data')
+        parser.add_argument('--workers', type=int, default=1, help='Processes used to insert products and chat messages')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
     def handle(self, *args, **options):
+        for option in ('businesses', 'users_per_role', 'workers', 'batch_size'):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be positive")
+        seed = options['seed'] if options['seed'] is not None else random.randrange(2 ** 32)
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite allows a single writer; using one worker'))
+            workers = 1
+        if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            self.stdout.write(self.style.WARNING('Worker processes need fork(); using one worker'))
+            workers = 1
+        started = time.monotonic()
+
         self.stdout.write('Creating roles...')
-        roles = ['admin', 'editor', 'approver', 'viewer']
         role_objs = {}
-        for role_name in roles:
+        for role_name in ROLES:
             role, created = Role.objects.get_or_create(name=role_name)
             role_objs[role_name] = role
-        
+
         self.stdout.write('Creating businesses...')
-        businesses = []
-        for _ in range(3):
-            business = Business.objects.create(name=fake.company())
-            businesses.append(business)
+        businesses = self.create_businesses(options['businesses'], seed)
 
         self.stdout.write('Creating users...')
-        users = []
+        users = self.create_users(businesses, role_objs, options['users_per_role'])
+        business_pools = []
+        for business in businesses:
+            members = [u for u in users if u['business_id'] == business.id]
+            business_pools.append((
+                business.id,
+                [u['id'] for u in members if u['role__name'] in ['admin', 'editor']],
+                [u['id'] for u in members if u['role__name'] in ['admin', 'approver']],
+            ))
+        chat_users = [(u['id'], u['business_id']) for u in users]
+
+        self.stdout.write(f"Creating {options['products']} products with {workers} worker(s)...")
+        phase = time.monotonic()
+        count = self.run_sharded(generate_products, options['products'], workers, seed, business_pools, options['batch_size'])
+        self.report('products', count, phase)
+
+        self.stdout.write(f"Creating {options['chat_messages']} chat messages...")
+        phase = time.monotonic()
+        count = self.run_sharded(generate_chat_messages, options['chat_messages'], workers, seed, chat_users, options['batch_size'])
+        self.report('chat messages', count, phase)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully populated database in {time.monotonic() - started:.1f}s (seed {seed})'
+        ))
+
+    def create_businesses(self, count, seed):
+        fake = Faker()
+        fake.seed_instance(seed)
+        used = set(Business.objects.values_list('name', flat=True))
+        names = []
+        for index in range(count):
+            name = fake.company()
+            if name in used:
+                name = f'{name} {index + 1}'
+            while name in used:
+                name = f'{fake.company()} {index + 1}'
+            used.add(name)
+            names.append(name)
+        Business.objects.bulk_create([Business(name=name) for name in names])
+        return list(Business.objects.filter(name__in=names).order_by('id'))
+
+    def create_users(self, businesses, role_objs, users_per_role):
+        # Hashing is deliberately slow, so every dummy user shares one hash
+        password = make_password('password123')
+        new_users = []
         for business in businesses:
             # Create users for each role in each business
             for role_name, role_obj in role_objs.items():
-                username = f"{role_name}_{business.id}"
-                email = f"{role_name}_{business.id}@example.com"
-                if not User.objects.filter(username=username).exists():
-                    user = User.objects.create_user(
-                        username=username,
-                        email=email,
-                        password='password123',
+                for index in range(users_per_role):
+                    suffix = f'_{index + 1}' if index else ''
+                    new_users.append(User(
+                        username=f'{role_name}_{business.id}{suffix}',
+                        email=f'{role_name}_{business.id}{suffix}@example.com',
+                        password=password,
                         business=business,
                         role=role_obj,
                         is_business_admin=(role_name == 'admin')
-                    )
-                    users.append(user)
-
-        self.stdout.write('Creating products...')
-        statuses = ['draft', 'pending_approval', 'approved', 'rejected']
-        for _ in range(20):
-            business = random.choice(businesses)
-            creator = random.choice([u for u in users if u.business == business and u.role.name in ['admin', 'editor']])
-            status = random.choice(statuses)
-            
-            product = Product.objects.create(
-                name=fake.bs().title(), # 'bs' gives somewhat business-y phrases
-                description=fake.catch_phrase(),
-                price=round(random.uniform(10.0, 500.0), 2),
-                status=status,
-                business=business,
-                created_by=creator
-            )
-            
-            if status == 'approved':
-                approver = random.choice([u for u in users if u.business == business and u.role.name in ['admin', 'approver']])
-                product.approve(approver) # This uses the model method
-
-        self.stdout.write('Creating chat history...')
-        for _ in range(10):
-            user = random.choice(users)
-            ChatHistory.objects.create(
-                user=user,
-                business=user.business,
-                user_message=fake.sentence(),
-                ai_response=fake.paragraph()
-            )
+                    ))
+        User.objects.bulk_create(new_users, batch_size=1000, ignore_conflicts=True)
+        return list(
+            User.objects.filter(business__in=businesses, role__isnull=False)
+            .values('id', 'business_id', 'role__name')
+        )
+
+    def run_sharded(self, generate, total, workers, seed, pool, batch_size):
+        if total <= 0 or not pool:
+            return 0
+        if workers == 1:
+            return generate(0, total, seed, pool, batch_size)
+        # Forked workers open their own connections instead of sharing the parent's sockets
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(generate, shard, count, seed, pool, batch_size)
+                for shard, count in enumerate(split(total, workers)) if count
+            ]
+            return sum(future.result() for future in futures)
 
-        self.stdout.write(self.style.SUCCESS('Successfully populated database'))
+    def report(self, label, count, started):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(f'  {count} {label} in {elapsed:.1f}s ({count / elapsed:.0f} rows/s)')
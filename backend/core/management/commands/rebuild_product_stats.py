@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.products.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-business product statistics from the products table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, action='append', dest='businesses', help='Only this business id (repeatable)')
+
+    def handle(self, *args, **options):
+        count = rebuild_stats(options['businesses'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt product stats for {count} business(es)'))
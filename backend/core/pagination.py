@@ -0,0 +1,165 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination over (ordering field, id).
+
+    Each page is fetched with a WHERE clause on the last row seen instead of an
+    OFFSET, and no COUNT(*) is run, so every page costs the same as the first.
+    The ordering comes from the view's `keyset_ordering` (e.g. '-created_at')
+    unless the request asks for one of the view's `ordering_fields`.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    ordering_param = api_settings.ORDERING_PARAM
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        seek, descending = self.start_page(queryset, request, view)
+        return self.finish_page(self.get_rows(queryset, seek, descending, self.page_size + 1, view))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views, fetching the page with aget_rows()"""
+        seek, descending = self.start_page(queryset, request, view)
+        return self.finish_page(await self.aget_rows(queryset, seek, descending, self.page_size + 1, view))
+
+    def start_page(self, queryset, request, view):
+        """Decode the request's cursor; returns the seek position and direction."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        model_field = queryset.model._meta.get_field(self.field)
+
+        self.position = self.decode_cursor(request, model_field)
+        self.reverse = self.position is not None and self.position[2]
+        seek = self.position[:2] if self.position is not None else None
+        return seek, self.descending != self.reverse
+
+    def finish_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.page = results
+        return results
+
+    def seek(self, queryset, position, descending):
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+        if position is not None:
+            value, pk = position
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}': value}) |
+                Q(**{self.field: value, f'id__{lookup}': pk})
+            )
+        return queryset
+
+    def get_rows(self, queryset, position, descending, limit, view=None):
+        """
+        Up to `limit` rows strictly past `position` ((value, id), or None for
+        the start) in the given direction.
+        """
+        return list(self.seek(queryset, position, descending)[:limit])
+
+    async def aget_rows(self, queryset, position, descending, limit, view=None):
+        return [row async for row in self.seek(queryset, position, descending)[:limit]]
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'keyset_ordering', self.default_ordering)
+        requested = request.query_params.get(self.ordering_param, '').strip()
+        allowed = getattr(view, 'ordering_fields', None) or []
+        if requested and ',' not in requested and requested.lstrip('-') in allowed:
+            ordering = requested
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def decode_cursor(self, request, model_field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if data['f'] != self.field:
+                raise ValueError('cursor was issued for another ordering')
+            value = model_field.to_python(data['v'])
+            pk = int(data['id'])
+            reverse = bool(data.get('r', False))
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk, reverse
+
+    def encode_cursor(self, obj, reverse):
+        model_field = obj._meta.get_field(self.field)
+        data = {'f': self.field, 'v': model_field.value_to_string(obj), 'id': obj.pk}
+        if reverse:
+            data['r'] = True
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('ascii'))
+        return encoded.decode('ascii').rstrip('=')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return replace_query_param(self.base_url, self.cursor_query_param, '')
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[0], True))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; clients opt into keyset pagination per
+    request by sending a `cursor` parameter (empty for the first page).
+    """
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
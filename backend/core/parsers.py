@@ -0,0 +1,25 @@
+import codecs
+import io
+
+from rest_framework.parsers import JSONParser, get_encoding
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser backed by orjson for UTF-8 bodies. Other encodings, bodies
+    orjson rejects and installs without orjson go through DRF's parser, so
+    what is accepted and the error messages stay the same.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None or not self.strict or codecs.lookup(get_encoding(parser_context or {})).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # json accepts a little more (e.g. integers beyond 64 bits) and words its errors as before
+            return super().parse(io.BytesIO(body), media_type, parser_context)
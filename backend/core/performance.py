@@ -0,0 +1,245 @@
+"""
+Per-route request metrics without an external APM.
+
+PerformanceMiddleware times a sample of requests (PERF_SAMPLE_RATE) and
+records, per method and URL name: a latency histogram, database query count
+and time, serializer and render time, response size, and the slowest queries
+over PERF_SLOW_QUERY_MS. Metrics live in this process only; each worker
+reports its own through the metrics endpoint.
+
+Serializer time is collected from serializers using TimedSerializerMixin.
+Query stats come from execute wrappers on every database alias, so they
+cover sync views; async views report latency, serializer time and size only.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework import serializers
+
+from .query_budget import execute_wrapper_all
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+_current = ContextVar('performance_request', default=None)
+
+
+class RequestMetrics:
+    """Timings of one sampled request; also the execute wrapper recording its queries."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.slow_queries = []
+        self.spans = {}
+        self.slow_query_s = getattr(settings, 'PERF_SLOW_QUERY_MS', 100) / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.query_time += elapsed
+            if elapsed >= self.slow_query_s:
+                self.slow_queries.append((elapsed, sql))
+
+    def add(self, name, elapsed):
+        self.spans[name] = self.spans.get(name, 0.0) + elapsed
+
+
+@contextmanager
+def span(name):
+    """Add the block's duration to `name` on the current sampled request, if any."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - started)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Counts the time spent building .data towards the request's serializer
+    time. Pair with `list_serializer_class = TimedListSerializer` in Meta so
+    many=True serializers are timed as well.
+    """
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
+
+
+class RouteStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.queries = 0
+        self.query_ms = 0.0
+        self.spans_ms = {}
+        self.response_bytes = 0
+        self.slow_queries = []
+
+    def record(self, status, elapsed_ms, metrics, size, max_slow_queries):
+        self.count += 1
+        self.errors += status >= 500
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[index] += 1
+                break
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.queries += metrics.queries
+        self.query_ms += metrics.query_time * 1000
+        for name, elapsed in metrics.spans.items():
+            self.spans_ms[name] = self.spans_ms.get(name, 0.0) + elapsed * 1000
+        self.response_bytes += size or 0
+        if metrics.slow_queries:
+            self.slow_queries += [(round(elapsed * 1000, 3), sql) for elapsed, sql in metrics.slow_queries]
+            self.slow_queries = sorted(self.slow_queries, reverse=True)[:max_slow_queries]
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th percentile request"""
+        rank = self.count * pct / 100
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return bound if bound != float('inf') else round(self.max_ms, 3)
+        return 0.0
+
+    def as_dict(self):
+        count = self.count or 1
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': round(self.total_ms / count, 3),
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'histogram_ms': {
+                ('+Inf' if bound == float('inf') else str(bound)): bucket
+                for bound, bucket in zip(LATENCY_BUCKETS_MS, self.buckets)
+            },
+            'queries_per_request': round(self.queries / count, 2),
+            'query_ms_per_request': round(self.query_ms / count, 3),
+            **{f'{name}_ms_per_request': round(total / count, 3) for name, total in sorted(self.spans_ms.items())},
+            'response_bytes_per_request': round(self.response_bytes / count),
+            'slow_queries': [{'ms': elapsed, 'sql': sql} for elapsed, sql in self.slow_queries],
+        }
+
+
+class PerformanceRegistry:
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, status, elapsed_ms, metrics, size):
+        max_slow_queries = getattr(settings, 'PERF_MAX_SLOW_QUERIES', 5)
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+            stats.record(status, elapsed_ms, metrics, size, max_slow_queries)
+
+    def snapshot(self):
+        with self._lock:
+            return {route: stats.as_dict() for route, stats in sorted(self._routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = PerformanceRegistry()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return f"{request.method} {match.url_name if match and match.url_name else '<unresolved>'}"
+
+
+def server_timing(elapsed_ms, metrics):
+    entries = [f'total;dur={elapsed_ms:.1f}', f'db;dur={metrics.query_time * 1000:.1f};desc="{metrics.queries} queries"']
+    entries += [f'{name};dur={elapsed * 1000:.1f}' for name, elapsed in sorted(metrics.spans.items())]
+    return ', '.join(entries)
+
+
+class PerformanceMiddleware:
+    """
+    Records metrics for a PERF_SAMPLE_RATE share of requests and, with
+    PERF_SERVER_TIMING, reports them in a Server-Timing header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = getattr(settings, 'PERF_SAMPLE_RATE', 1.0)
+        return rate >= 1 or random.random() < rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with execute_wrapper_all(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that separately
+        metrics = _current.get()
+        if metrics is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: metrics.add('render', time.perf_counter() - started))
+        return response
+
+    def finish(self, request, response, metrics):
+        elapsed_ms = (time.perf_counter() - metrics.started) * 1000
+        size = None if response.streaming else len(response.content)
+        registry.record(route_name(request), response.status_code, elapsed_ms, metrics, size)
+        if getattr(settings, 'PERF_SERVER_TIMING', False):
+            response['Server-Timing'] = server_timing(elapsed_ms, metrics)
+        return response
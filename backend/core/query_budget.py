@@ -0,0 +1,101 @@
+import logging
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of queries per request, keyed by URL name. Authentication
+# queries count towards the budget.
+DEFAULT_QUERY_BUDGETS = {
+    'product-list': 3,
+    'product-detail': 3,
+    'product-approve': 6,  # lookup, savepoint, update, stats, change log, release
+    'product-list-internal': 3,
+    'product-stats': 2,
+    'product-changes': 3,  # horizon, entries, products
+    'chat_history-list': 4,  # hot count, archive count, rows, user
+    'chat_history-window': 1,
+    'chat_product_context': 3,
+    'user-list': 3,
+}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """
+    Execute wrapper that counts the queries run on a connection.
+    """
+    def __init__(self):
+        self.count = 0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def execute_wrapper_all(wrapper):
+    """Install an execute wrapper on every database alias, replicas included"""
+    with ExitStack() as stack:
+        for alias_connection in connections.all():
+            stack.enter_context(alias_connection.execute_wrapper(wrapper))
+        yield
+
+
+def get_query_budget(url_name):
+    budgets = {**DEFAULT_QUERY_BUDGETS, **getattr(settings, 'QUERY_BUDGETS', {})}
+    return budgets.get(url_name)
+
+
+def _budget_message(label, budget, counter):
+    queries = '\n'.join(f'  {i}. {sql}' for i, sql in enumerate(counter.queries, 1))
+    return f'{label} ran {counter.count} queries, budget is {budget}:\n{queries}'
+
+
+@contextmanager
+def assert_query_budget(url_name, budget=None):
+    """
+    Fail if the wrapped block runs more queries than the budget for url_name.
+
+        with assert_query_budget('product-list'):
+            api_client.get('/api/products/')
+    """
+    if budget is None:
+        budget = get_query_budget(url_name)
+    counter = QueryCounter()
+    with execute_wrapper_all(counter):
+        yield counter
+    if budget is not None and counter.count > budget:
+        raise AssertionError(_budget_message(url_name, budget, counter))
+
+
+class QueryBudgetMiddleware:
+    """
+    Development middleware that checks every request against its query budget.
+
+    Logs a warning, or raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is
+    enabled (meant for tests and CI).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with execute_wrapper_all(counter):
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        budget = get_query_budget(match.url_name) if match else None
+        if budget is not None and counter.count > budget:
+            message = _budget_message(f'{request.method} {request.path}', budget, counter)
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
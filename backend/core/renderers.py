@@ -0,0 +1,48 @@
+"""
+JSON renderer backed by orjson, falling back to DRF's JSONRenderer when
+orjson is not installed or a request asks for something it cannot match
+(indentation, ASCII-only or non-compact output).
+
+Output is byte-for-byte the same as JSONRenderer's for everything the API
+serializes. Datetimes, Decimals and other non-JSON types are passed to DRF's
+JSONEncoder, so they keep DRF's formatting ('Z' for UTC, Decimals as
+numbers). Only float spelling can differ: orjson writes 1e-5 where json
+writes 1e-05, and NaN becomes null instead of raising.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    if orjson is not None:
+        # Datetimes go through DRF's encoder rather than orjson's RFC 3339 format
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=self.options)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which json handles
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict-javascript-subset escaping as JSONRenderer
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
@@ -0,0 +1,165 @@
+"""
+Token-bucket throttles.
+
+A bucket holds up to `burst` tokens and refills at a steady rate; each request
+takes one. Rates are set per scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+as '<count>/<period>[:<burst>]', e.g. '600/min:100' (burst defaults to count).
+
+Buckets are stored GCRA-style as one integer per key, the time (in
+microseconds) at which the bucket will be full again, and moved with the
+cache's atomic incr/decr so every worker sharing THROTTLE_CACHE_ALIAS sees
+the same buckets. Use a shared backend such as Redis or Memcached in
+production; the default LocMemCache is per process. Only a bucket that has
+refilled completely is reset with a plain set, where racing requests can at
+worst each get the token they would have been given anyway.
+
+Denied requests get DRF's 429 with a Retry-After header for when the next
+token arrives.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Keys outlive refills by this much, so a busy client's bucket is not dropped mid-burst
+MIN_BUCKET_TTL = 3600
+
+
+def get_throttle_cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+
+def parse_rate(rate):
+    """'<count>/<period>[:<burst>]' as (tokens per second, burst)"""
+    rate, _, burst = rate.partition(':')
+    count, period = rate.split('/')
+    count = int(count)
+    return count / PERIODS[period[0]], int(burst) if burst else count
+
+
+class TokenBucket:
+    def __init__(self, rate):
+        per_second, self.burst = parse_rate(rate)
+        self.interval = max(1, round(1_000_000 / per_second))
+        self.tolerance = self.burst * self.interval
+        self.ttl = max(MIN_BUCKET_TTL, math.ceil(2 * self.tolerance / 1_000_000))
+
+    def take(self, key, now=None):
+        """Take a token from the bucket at key; return 0, or seconds until one is available"""
+        cache = get_throttle_cache()
+        now = int((time.time() if now is None else now) * 1_000_000)
+        try:
+            full_at = cache.incr(key, self.interval)
+        except ValueError:
+            full_at = None
+        if full_at is None or full_at - self.interval < now:
+            # Missing or already full: start again from now
+            cache.set(key, now + self.interval, self.ttl)
+            return 0
+        if full_at - now <= self.tolerance:
+            return 0
+        # Denied requests do not spend a token
+        try:
+            cache.decr(key, self.interval)
+        except ValueError:
+            pass
+        return (full_at - self.tolerance - now) / 1_000_000
+
+
+_buckets = {}
+
+
+def get_bucket(rate):
+    bucket = _buckets.get(rate)
+    if bucket is None:
+        bucket = _buckets[rate] = TokenBucket(rate)
+    return bucket
+
+
+def client_key(throttle, request):
+    """Business for authenticated users (user when they have none), IP address otherwise"""
+    user = request.user
+    if user.is_authenticated:
+        return f'b{user.business_id}' if user.business_id else f'u{user.pk}'
+    return f'ip{throttle.get_ident(request)}'
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Subclasses pick the scope for a request and the identity whose bucket
+    it draws from; either may be None to skip the throttle.
+    """
+    scope = None
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.delay = 0
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        if rate is None:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        self.delay = get_bucket(rate).take(f'throttle:{scope}:{key}')
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+class BusinessRateThrottle(TokenBucketThrottle):
+    """All requests of a business's users share one bucket"""
+    scope = 'business'
+
+    def get_key(self, request, view):
+        return client_key(self, request) if request.user.is_authenticated else None
+
+
+class AnonReadRateThrottle(TokenBucketThrottle):
+    """Anonymous catalog reads, per client IP"""
+    scope = 'anon_read'
+
+    def get_key(self, request, view):
+        if request.user.is_authenticated or request.method not in SAFE_METHODS:
+            return None
+        return client_key(self, request)
+
+
+class EndpointRateThrottle(TokenBucketThrottle):
+    """
+    Unsafe requests to views with a `throttle_scope` (login, chat and product
+    writes), per business or anonymous client IP.
+    """
+    def get_scope(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        return getattr(view, 'throttle_scope', None)
+
+    def get_key(self, request, view):
+        return client_key(self, request)
+
+
+def throttle_wait(request, view, throttle_classes=None):
+    """
+    Run throttle classes (the DRF defaults unless given) against a plain
+    Django request with `user` set; return the longest wait, or None.
+    """
+    if throttle_classes is None:
+        throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    waits = []
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view):
+            waits.append(throttle.wait())
+    return max(waits) if waits else None
@@ -0,0 +1,21 @@
+from django.conf import settings
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .performance import registry
+
+
+class PerformanceMetricsView(APIView):
+    """Per-route request metrics of this process (staff only); DELETE resets them"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'sample_rate': getattr(settings, 'PERF_SAMPLE_RATE', 1.0),
+            'routes': registry.snapshot(),
+        })
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,36 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from apps.authentication.models import Role, Business
+from apps.authentication.policy import registry as policy_registry
+
+User = get_user_model()
+
+@pytest.fixture(autouse=True)
+def fast_password_hasher(settings):
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    policy_registry.invalidate()
+    yield
+    cache.clear()
+    policy_registry.invalidate()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def business():
+    return Business.objects.create(name="Test Business")
+
+@pytest.fixture
+def admin_role():
+    return Role.objects.create(name='admin', permissions={})
+
+@pytest.fixture
+def user(business, admin_role):
+    return User.objects.create_user(username='testuser', password='password', business=business, role=admin_role)
@@ -0,0 +1,145 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import AsyncClient
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.authentication.models import Business
+from apps.chat.archive import archive_batch
+from apps.chat.models import ChatHistory
+from apps.products.models import Product
+from core.loadtest import run_load
+
+User = get_user_model()
+
+async def _get(path, headers=None):
+    return await AsyncClient().get(path, headers=headers or {})
+
+def get(path, headers=None):
+    return async_to_sync(_get)(path, headers)
+
+@pytest.fixture
+def auth_header(user):
+    return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+@pytest.fixture
+def catalog(business, user):
+    other = Business.objects.create(name='Other Business')
+    owner = User.objects.create_user(username='other', email='other@example.com', password='password', business=other)
+    products = [
+        Product.objects.create(name=f'Product {index}', description='d', price='10.00', status='approved',
+                               business=business, created_by=user)
+        for index in range(12)
+    ]
+    products.append(Product.objects.create(name='Draft', description='d', price='5.00', business=business, created_by=user))
+    products.append(Product.objects.create(name='Foreign', description='d', price='7.00', status='approved',
+                                           business=other, created_by=owner))
+    return products
+
+@pytest.mark.django_db
+class TestAsyncProductViews:
+    def test_public_list_matches_sync_cursor_pages(self, api_client, catalog):
+        response = get('/api/products/async/')
+        assert response.status_code == 200
+        data = response.json()
+        sync = json.loads(api_client.get('/api/products/', {'cursor': ''}).content)
+        assert data['results'] == sync['results']
+        assert 'Draft' not in [item['name'] for item in data['results']]
+
+        seen = [item['id'] for item in data['results']]
+        while data['next']:
+            data = get(data['next']).json()
+            seen += [item['id'] for item in data['results']]
+        assert len(seen) == len(set(seen)) == 13
+
+    def test_filters_and_ordering(self, catalog):
+        data = get('/api/products/async/?max_price=7.50&ordering=price').json()
+        assert [item['name'] for item in data['results']] == ['Foreign']
+        assert get('/api/products/async/?min_price=abc').status_code == 400
+
+    def test_search(self, business, user):
+        for name in ('Red Gadget', 'Blue Widget'):
+            Product.objects.create(name=name, description='d', price='10.00', status='approved',
+                                   business=business, created_by=user)
+        data = get('/api/products/async/?search=widget').json()
+        assert [item['name'] for item in data['results']] == ['Blue Widget']
+
+    def test_internal_list_is_scoped_to_business(self, catalog, auth_header):
+        assert get('/api/products/async/internal/').status_code == 401
+        data = get('/api/products/async/internal/?status=draft', auth_header).json()
+        assert [item['name'] for item in data['results']] == ['Draft']
+
+    def test_detail_visibility(self, catalog, auth_header):
+        draft, foreign = catalog[-2], catalog[-1]
+        assert get(f'/api/products/async/{foreign.pk}/').json()['name'] == 'Foreign'
+        assert get(f'/api/products/async/{draft.pk}/').status_code == 404
+        assert get(f'/api/products/async/{draft.pk}/', auth_header).json()['status'] == 'draft'
+        assert get(f'/api/products/async/{foreign.pk}/', auth_header).status_code == 404
+
+    def test_invalid_token_is_rejected(self, catalog):
+        assert get('/api/products/async/', {'Authorization': 'Bearer nope'}).status_code == 401
+
+
+@pytest.mark.django_db
+def test_async_chat_history_pages_into_archive(user, business, auth_header):
+    now = timezone.now()
+    for index in range(15):
+        message = ChatHistory.objects.create(user=user, business=business, user_message=f'q{index}', ai_response='a')
+        ChatHistory.objects.filter(pk=message.pk).update(timestamp=now - timedelta(days=200 - index))
+    archive_batch(now - timedelta(days=190), segment_size=3)
+    assert ChatHistory.objects.count() == 5
+    assert get('/api/chat/history/async/').status_code == 401
+
+    data = get('/api/chat/history/async/', auth_header).json()
+    messages = [item['user_message'] for item in data['results']]
+    while data['next']:
+        data = get(data['next'], auth_header).json()
+        messages += [item['user_message'] for item in data['results']]
+    assert messages == [f'q{index}' for index in reversed(range(15))]
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{}' if self.path.startswith('/ok') else b'{"detail": "missing"}'
+        self.send_response(200 if self.path.startswith('/ok') else 404)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def http_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+def test_run_load_reports_throughput_and_errors(http_server):
+    summary = run_load([f'{http_server}/ok', f'{http_server}/missing'], concurrency=4, duration=0.3)
+    assert summary['iterations'] > 0
+    assert summary['throughput_per_s'] > 0
+    assert set(summary['statuses']) == {'200', '404'}
+    assert summary['errors'] == summary['statuses']['404']
+
+@pytest.mark.django_db
+def test_loadtest_command_compares_targets(http_server, tmp_path, capsys):
+    output = tmp_path / 'load.json'
+    call_command(
+        'loadtest', '--target', f'wsgi={http_server}/ok', '--target', f'asgi={http_server}/ok?x=1',
+        '--concurrency', '2', '--duration', '0.2', '--output', str(output)
+    )
+    results = json.loads(output.read_text())
+    assert set(results['targets']) == {'wsgi', 'asgi'}
+    assert 'the throughput of wsgi' in capsys.readouterr().out
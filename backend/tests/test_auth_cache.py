@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.authentication.models import Role
+
+def _user_queries(context):
+    return [q['sql'] for q in context.captured_queries if 'FROM "authentication_user"' in q['sql']]
+
+@pytest.fixture
+def token_client(api_client, user):
+    response = api_client.post('/api/auth/login/', {'username': 'testuser', 'password': 'password'})
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+    return api_client
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    def test_user_role_and_business_load_in_one_query(self, token_client):
+        with CaptureQueriesContext(connection) as context:
+            response = token_client.get('/api/auth/me/')
+        assert response.status_code == 200
+        assert response.data['business']['name'] == 'Test Business'
+        assert response.data['role'] == 'admin'
+        assert len(context) == 1
+
+    def test_steady_state_makes_no_auth_queries(self, token_client):
+        token_client.get('/api/products/list_internal/')
+        with CaptureQueriesContext(connection) as context:
+            response = token_client.get('/api/products/list_internal/')
+        assert response.status_code == 200
+        assert _user_queries(context) == []
+
+    def test_role_change_invalidates_cached_user(self, api_client, user):
+        tokens = api_client.post('/api/auth/login/', {'username': 'testuser', 'password': 'password'}).data
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        api_client.get('/api/auth/me/')
+        user.role = Role.objects.create(name='viewer')
+        user.save()
+        # Outstanding access tokens carry the old role and must be refreshed
+        assert api_client.get('/api/auth/me/').status_code == 401
+        access = api_client.post('/api/auth/refresh/', {'refresh': tokens['refresh']}).data['access']
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        assert api_client.get('/api/auth/me/').data['role'] == 'viewer'
+
+    def test_business_rename_invalidates_cached_user(self, token_client, business):
+        token_client.get('/api/auth/me/')
+        business.name = 'Renamed Business'
+        business.save()
+        assert token_client.get('/api/auth/me/').data['business']['name'] == 'Renamed Business'
+
+    def test_inactive_user_is_rejected(self, token_client, user):
+        token_client.get('/api/auth/me/')
+        user.is_active = False
+        user.save()
+        assert token_client.get('/api/auth/me/').status_code == 401
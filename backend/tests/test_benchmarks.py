@@ -0,0 +1,37 @@
+import pytest
+from core.api_benchmarks import ApiBenchmark, seed_dataset
+from core.benchmarking import compare, percentile, summarize
+
+def test_percentile_interpolates():
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5], 99) == 5
+
+def test_summarize_reports_milliseconds_and_throughput():
+    summary = summarize([0.01, 0.02, 0.03], queries=[2, 3, 2])
+    assert summary['p50_ms'] == 20.0
+    assert summary['throughput_per_s'] == pytest.approx(50.0)
+    assert summary['queries'] == 3
+
+def test_compare_flags_slowdowns_and_extra_queries():
+    baseline = {'scenarios': {'a': {'p50_ms': 10.0, 'queries': 2}, 'b': {'p50_ms': 10.0, 'queries': 2}}}
+    current = {'scenarios': {'a': {'p50_ms': 11.0, 'queries': 2}, 'b': {'p50_ms': 10.0, 'queries': 3}}}
+    rows = compare(current, baseline, tolerance=0.2)
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [('a', False), ('b', True)]
+
+@pytest.mark.django_db
+def test_api_suite_runs_every_scenario():
+    seed_dataset(products=60, businesses=2, chat_messages=10, seed=1)
+    benchmark = ApiBenchmark(iterations=2, warmup=1)
+    benchmark.setup()
+    results = benchmark.run()
+    assert set(results) == set(benchmark.scenarios())
+    assert results['product_list_cached']['queries'] == 0
+    assert all(result['iterations'] == 2 for result in results.values())
+
+@pytest.mark.django_db
+def test_default_iterations_are_not_throttled():
+    seed_dataset(products=60, businesses=2, chat_messages=10, seed=1)
+    benchmark = ApiBenchmark()
+    benchmark.setup()
+    results = benchmark.run()
+    assert all(result['iterations'] == benchmark.iterations for result in results.values())
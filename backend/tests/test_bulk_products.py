@@ -0,0 +1,91 @@
+import pytest
+from django.contrib.auth import get_user_model
+from apps.products.models import Product
+from apps.authentication.models import Business, Role
+
+User = get_user_model()
+
+def _product(business, user, name, status='draft'):
+    return Product.objects.create(
+        name=name, description='Desc', price='10.00', status=status, business=business, created_by=user
+    )
+
+@pytest.mark.django_db
+class TestBulkProducts:
+    def test_bulk_create(self, api_client, user):
+        api_client.force_authenticate(user=user)
+        items = [{'name': f'Item {i}', 'description': 'Desc', 'price': '9.99'} for i in range(5)]
+        response = api_client.post('/api/products/bulk_create/', items, format='json')
+        assert response.status_code == 201
+        assert len(response.data) == 5
+        assert all(row['business_name'] == 'Test Business' for row in response.data)
+        assert Product.objects.filter(business=user.business, created_by=user, status='draft').count() == 5
+
+    def test_bulk_create_reports_errors_per_item_and_writes_nothing(self, api_client, user):
+        api_client.force_authenticate(user=user)
+        items = [
+            {'name': 'Good', 'description': 'Desc', 'price': '1.00'},
+            {'name': 'Bad', 'description': 'Desc', 'price': '-1.00'},
+            {'name': 'Sneaky', 'description': 'Desc', 'price': '1.00', 'status': 'approved'},
+        ]
+        response = api_client.post('/api/products/bulk_create/', items, format='json')
+        assert response.status_code == 400
+        errors = response.data['errors']
+        assert errors[0] == {}
+        assert 'price' in errors[1]
+        assert 'status' in errors[2]
+        assert Product.objects.count() == 0
+
+    def test_bulk_update(self, api_client, user):
+        first = _product(user.business, user, 'First')
+        second = _product(user.business, user, 'Second')
+        api_client.force_authenticate(user=user)
+        response = api_client.patch('/api/products/bulk_update/', [
+            {'id': first.id, 'price': '20.00'},
+            {'id': second.id, 'name': 'Second Renamed', 'status': 'pending_approval'},
+        ], format='json')
+        assert response.status_code == 200
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert str(first.price) == '20.00'
+        assert (second.name, second.status) == ('Second Renamed', 'pending_approval')
+
+    def test_bulk_update_cannot_touch_other_business(self, api_client, user):
+        other = Business.objects.create(name='Other Business')
+        foreign = _product(other, None, 'Foreign')
+        api_client.force_authenticate(user=user)
+        response = api_client.patch('/api/products/bulk_update/', [{'id': foreign.id, 'name': 'Mine'}], format='json')
+        assert response.status_code == 400
+        assert 'id' in response.data['errors'][0]
+        foreign.refresh_from_db()
+        assert foreign.name == 'Foreign'
+
+    def test_bulk_approve(self, api_client, user):
+        products = [_product(user.business, user, f'P{i}', status='pending_approval') for i in range(3)]
+        api_client.force_authenticate(user=user)
+        response = api_client.post('/api/products/bulk_approve/', {'ids': [p.id for p in products]}, format='json')
+        assert response.status_code == 200
+        assert set(Product.objects.values_list('status', flat=True)) == {'approved'}
+        assert all(row['approved_by'] == user.id for row in response.data)
+        # The public catalog sees the change straight away
+        assert api_client.logout() is None
+        assert api_client.get('/api/products/').data['count'] == 3
+
+    def test_bulk_approve_rejects_already_approved(self, api_client, user):
+        approved = _product(user.business, user, 'Done', status='approved')
+        pending = _product(user.business, user, 'Pending', status='pending_approval')
+        api_client.force_authenticate(user=user)
+        response = api_client.post('/api/products/bulk_approve/', {'ids': [pending.id, approved.id]}, format='json')
+        assert response.status_code == 400
+        assert response.data['errors'][0] == {}
+        pending.refresh_from_db()
+        assert pending.status == 'pending_approval'
+
+    def test_bulk_approve_requires_approver_role(self, api_client, business):
+        editor = User.objects.create_user(
+            username='editor', password='password', business=business, role=Role.objects.create(name='editor')
+        )
+        product = _product(business, editor, 'Pending', status='pending_approval')
+        api_client.force_authenticate(user=editor)
+        response = api_client.post('/api/products/bulk_approve/', {'ids': [product.id]}, format='json')
+        assert response.status_code == 403
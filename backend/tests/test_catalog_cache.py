@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.products.models import Product
+
+@pytest.fixture
+def product(user):
+    return Product.objects.create(
+        name='Cached Product', description='Desc', price='10.00', status='approved',
+        business=user.business, created_by=user
+    )
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    def test_repeat_list_is_served_from_cache(self, api_client, product):
+        first = api_client.get('/api/products/', {'ordering': 'price'})
+        with CaptureQueriesContext(connection) as context:
+            second = api_client.get('/api/products/', {'ordering': 'price', 'search': ''})
+        assert len(context) == 0
+        assert second.data == first.data
+        assert second['ETag'] == first['ETag']
+
+    def test_if_none_match_returns_304(self, api_client, product):
+        etag = api_client.get(f'/api/products/{product.id}/')['ETag']
+        response = api_client.get(f'/api/products/{product.id}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+    def test_update_invalidates_list_and_detail(self, api_client, product):
+        api_client.get('/api/products/')
+        api_client.get(f'/api/products/{product.id}/')
+        product.name = 'Renamed Product'
+        product.save()
+        assert api_client.get('/api/products/').data['results'][0]['name'] == 'Renamed Product'
+        assert api_client.get(f'/api/products/{product.id}/').data['name'] == 'Renamed Product'
+
+    def test_approve_and_delete_invalidate_list(self, api_client, user, product):
+        draft = Product.objects.create(
+            name='Draft', description='Desc', price='5.00', status='draft',
+            business=user.business, created_by=user
+        )
+        assert api_client.get('/api/products/').data['count'] == 1
+        draft.approve(user)
+        assert api_client.get('/api/products/').data['count'] == 2
+        draft.delete()
+        assert api_client.get('/api/products/').data['count'] == 1
+
+    def test_unpublishing_invalidates_list(self, api_client, product):
+        assert api_client.get('/api/products/').data['count'] == 1
+        product = Product.objects.get(pk=product.pk)
+        product.status = 'draft'
+        product.save()
+        assert api_client.get('/api/products/').data['count'] == 0
+
+    def test_business_rename_invalidates_detail(self, api_client, business, product):
+        api_client.get(f'/api/products/{product.id}/')
+        business.name = 'Renamed Business'
+        business.save()
+        assert api_client.get(f'/api/products/{product.id}/').data['business_name'] == 'Renamed Business'
+
+    def test_authenticated_requests_bypass_cache(self, api_client, user, product):
+        api_client.force_authenticate(user=user)
+        assert 'ETag' not in api_client.get('/api/products/')
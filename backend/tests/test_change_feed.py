@@ -0,0 +1,166 @@
+from datetime import timedelta
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.authentication.models import Business
+from apps.products.models import Product, ProductChange
+
+@pytest.fixture(autouse=True)
+def no_settle_delay(settings):
+    settings.PRODUCT_CHANGES_SETTLE_SECONDS = 0
+
+def _entries():
+    return list(ProductChange.objects.order_by('id').values_list('product_id', 'operation'))
+
+def _create(business, user, name, status='approved'):
+    return Product.objects.create(name=name, description='d', price='10.00', status=status,
+                                  business=business, created_by=user)
+
+@pytest.mark.django_db
+class TestChangeLog:
+    def test_save_approve_and_delete_are_logged(self, business, user):
+        product = _create(business, user, 'Kettle', status='draft')
+        product.approve(user)
+        pk = product.pk
+        product.delete()
+        assert _entries() == [(pk, 'upsert'), (pk, 'upsert'), (pk, 'delete')]
+        assert ProductChange.objects.get(operation='delete').business_id == business.pk
+
+    def test_rolled_back_write_leaves_no_entry(self, business, user):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                _create(business, user, 'Kettle')
+                raise RuntimeError
+        assert _entries() == []
+
+    def test_bulk_writes_and_business_renames_are_logged(self, api_client, business, user):
+        api_client.force_authenticate(user=user)
+        items = [{'name': f'Item {index}', 'description': 'd', 'price': '1.00'} for index in range(3)]
+        created = api_client.post('/api/products/bulk_create/', items, format='json')
+        ids = [item['id'] for item in created.data]
+        assert _entries() == [(pk, 'upsert') for pk in ids]
+        business.name = 'Renamed'
+        business.save()
+        assert len(_entries()) == 6
+
+
+@pytest.mark.django_db
+class TestChangeFeed:
+    def test_head_cursor_then_changes(self, api_client, business, user):
+        _create(business, user, 'Before')
+        cursor = api_client.get('/api/products/changes/').data['cursor']
+        updated = _create(business, user, 'Updated')
+        deleted = _create(business, user, 'Deleted')
+        updated.name = 'Updated again'
+        updated.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+
+        response = api_client.get('/api/products/changes/', {'cursor': cursor})
+        assert response.status_code == 200
+        assert [item['name'] for item in response.data['upserts']] == ['Updated again']
+        assert response.data['deletes'] == [deleted_pk]
+        assert response.data['has_more'] is False
+        assert response.data['cursor'] == ProductChange.objects.latest('id').pk
+
+        again = api_client.get('/api/products/changes/', {'cursor': response.data['cursor']})
+        assert again.data['upserts'] == [] and again.data['cursor'] == response.data['cursor']
+
+    def test_pages_with_limit(self, api_client, business, user):
+        products = [_create(business, user, f'Product {index}') for index in range(5)]
+        first = api_client.get('/api/products/changes/', {'cursor': 0, 'limit': 3, 'fields': 'id'})
+        assert first.data['has_more'] is True
+        second = api_client.get('/api/products/changes/', {'cursor': first.data['cursor'], 'limit': 3})
+        assert second.data['has_more'] is False
+        assert first.data['upserts'][0] == {'id': products[0].pk}
+        assert [item['id'] for item in first.data['upserts'] + second.data['upserts']] == [p.pk for p in products]
+
+    def test_public_feed_turns_unapproved_products_into_deletes(self, api_client, business, user):
+        withdrawn = _create(business, user, 'Withdrawn')
+        withdrawn.status = 'draft'
+        withdrawn.save()
+        response = api_client.get('/api/products/changes/', {'cursor': 0})
+        assert response.data['upserts'] == [] and response.data['deletes'] == [withdrawn.pk]
+
+    def test_public_feed_never_names_drafts(self, api_client, business, user):
+        cursor = api_client.get('/api/products/changes/').data['cursor']
+        draft = _create(business, user, 'Draft', status='draft')
+        draft.name = 'Draft again'
+        draft.save()
+        Product.objects.get(pk=draft.pk).delete()
+        response = api_client.get('/api/products/changes/', {'cursor': cursor})
+        assert response.data['upserts'] == [] and response.data['deletes'] == []
+        assert response.data['cursor'] == cursor
+
+    def test_users_follow_their_own_business(self, api_client, business, user):
+        other = Business.objects.create(name='Other')
+        _create(other, None, 'Theirs')
+        draft = _create(business, user, 'Draft', status='draft')
+        api_client.force_authenticate(user=user)
+        response = api_client.get('/api/products/changes/', {'cursor': 0})
+        assert [item['id'] for item in response.data['upserts']] == [draft.pk]
+        assert response.data['deletes'] == []
+
+    def test_users_without_a_business_are_refused(self, api_client, business, user):
+        _create(business, user, 'Draft', status='draft')
+        user.business = None
+        user.save()
+        api_client.force_authenticate(user=user)
+        assert api_client.get('/api/products/changes/', {'cursor': 0}).status_code == 400
+
+    def test_query_budget(self, api_client, business, user):
+        for index in range(4):
+            _create(business, user, f'Product {index}')
+        with CaptureQueriesContext(connection) as context:
+            api_client.get('/api/products/changes/', {'cursor': 0})
+        assert len(context.captured_queries) <= 3
+
+    def test_rejects_bad_parameters(self, api_client, settings):
+        settings.PRODUCT_CHANGES_MAX_BATCH = 10
+        assert api_client.get('/api/products/changes/', {'cursor': 'x'}).status_code == 400
+        assert api_client.get('/api/products/changes/', {'cursor': 0, 'limit': 11}).status_code == 400
+
+    def test_unsettled_entries_are_held_back(self, api_client, business, user, settings):
+        settings.PRODUCT_CHANGES_SETTLE_SECONDS = 60
+        _create(business, user, 'Fresh')
+        response = api_client.get('/api/products/changes/', {'cursor': 0})
+        assert response.data['upserts'] == [] and response.data['cursor'] == 0
+
+
+@pytest.mark.django_db
+class TestCompaction:
+    def test_collapses_superseded_entries(self, business, user):
+        product = _create(business, user, 'Kettle', status='draft')
+        product.approve(user)
+        kept = _create(business, user, 'Other')
+        latest = ProductChange.objects.filter(product_id=product.pk).latest('id').pk
+        ProductChange.objects.update(changed_at=timezone.now() - timedelta(days=2))
+        call_command('compact_product_changes', stdout=open('/dev/null', 'w'))
+        assert _entries() == [(product.pk, 'upsert'), (kept.pk, 'upsert')]
+        assert ProductChange.objects.get(product_id=product.pk).pk == latest
+
+    def test_public_entries_outlive_later_private_ones(self, api_client, business, user):
+        product = _create(business, user, 'Kettle')
+        product.status = 'draft'
+        product.save()
+        product.name = 'Kettle draft'
+        product.save()
+        ProductChange.objects.update(changed_at=timezone.now() - timedelta(days=2))
+        call_command('compact_product_changes', stdout=open('/dev/null', 'w'))
+        assert _entries() == [(product.pk, 'upsert'), (product.pk, 'upsert')]
+        response = api_client.get('/api/products/changes/', {'cursor': 0})
+        assert response.data['deletes'] == [product.pk]
+
+    def test_truncation_expires_old_cursors(self, api_client, business, user):
+        _create(business, user, 'Old')
+        ProductChange.objects.update(changed_at=timezone.now() - timedelta(days=40))
+        fresh = _create(business, user, 'Fresh')
+        call_command('compact_product_changes', '--days', '30', stdout=open('/dev/null', 'w'))
+        assert _entries() == [(fresh.pk, 'upsert')]
+
+        gone = api_client.get('/api/products/changes/', {'cursor': 0})
+        assert gone.status_code == 410
+        response = api_client.get('/api/products/changes/', {'cursor': gone.data['horizon']})
+        assert [item['name'] for item in response.data['upserts']] == ['Fresh']
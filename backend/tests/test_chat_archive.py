@@ -0,0 +1,79 @@
+from datetime import timedelta
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from apps.chat.archive import archive_batch, decode_segment
+from apps.chat.models import ChatArchiveSegment, ChatHistory
+
+@pytest.fixture
+def messages(user):
+    created = [
+        ChatHistory.objects.create(user=user, business=user.business, user_message=f'q{i}', ai_response=f'a{i}')
+        for i in range(30)
+    ]
+    # The 22 oldest are past the archive cutoff; a few share a timestamp
+    now = timezone.now()
+    for i, message in enumerate(created):
+        age = timedelta(days=200 - min(i, 20)) if i < 22 else timedelta(minutes=30 - i)
+        ChatHistory.objects.filter(pk=message.pk).update(timestamp=now - age)
+    return created
+
+def expected_ids():
+    return list(ChatHistory.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+
+def walk(api_client, params):
+    seen, response = [], api_client.get('/api/chat/history/', params)
+    while True:
+        assert response.status_code == 200
+        seen.extend(row['id'] for row in response.data['results'])
+        if not response.data['next']:
+            return seen, response
+        response = api_client.get(response.data['next'])
+
+@pytest.mark.django_db
+class TestChatArchive:
+    def test_command_archives_in_batches(self, user, messages):
+        call_command('archive_chat_history', older_than_days=90, batch_size=5, stdout=None)
+        assert ChatHistory.objects.count() == 8
+        segments = list(ChatArchiveSegment.objects.order_by('first_timestamp', 'first_message_id'))
+        # Partial segments are topped up across batches
+        assert [segment.message_count for segment in segments] == [22]
+        archived = decode_segment(segments[0])
+        assert [m.user_message for m in archived] == [f'q{i}' for i in range(22)]
+
+    def test_max_batches_bounds_work(self, user, messages):
+        call_command('archive_chat_history', older_than_days=90, batch_size=5, max_batches=2, stdout=None)
+        assert ChatHistory.objects.count() == 20
+
+    def test_segments_are_split_at_segment_size(self, user, messages):
+        archive_batch(timezone.now() - timedelta(days=90), segment_size=10)
+        assert sorted(ChatArchiveSegment.objects.values_list('message_count', flat=True)) == [2, 10, 10]
+
+    def test_page_numbers_span_both_tiers(self, api_client, user, messages):
+        before = expected_ids()
+        archive_batch(timezone.now() - timedelta(days=90), segment_size=7)
+        api_client.force_authenticate(user=user)
+        seen, response = walk(api_client, {})
+        assert seen == before
+        assert response.data['count'] == 30
+
+    def test_cursor_spans_both_tiers(self, api_client, user, messages):
+        before = expected_ids()
+        archive_batch(timezone.now() - timedelta(days=90), segment_size=7)
+        api_client.force_authenticate(user=user)
+        seen, last = walk(api_client, {'cursor': ''})
+        assert seen == before
+
+        # And back again through previous links
+        back, response = [], last
+        while response.data['previous']:
+            response = api_client.get(response.data['previous'])
+            back = [row['id'] for row in response.data['results']] + back
+        assert back == before[:len(back)]
+        assert len(back) == 20
+
+    def test_other_users_archive_is_hidden(self, api_client, user, messages, django_user_model):
+        archive_batch(timezone.now() - timedelta(days=90))
+        other = django_user_model.objects.create_user(username='other', email='other@example.com', password='password', business=user.business)
+        api_client.force_authenticate(user=other)
+        assert api_client.get('/api/chat/history/').data['count'] == 0
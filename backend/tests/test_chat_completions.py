@@ -0,0 +1,217 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.chat import llm
+from apps.chat.answer_cache import AnswerCache, get_answer_cache, normalize_message
+from apps.chat.models import ChatHistory
+from apps.products.models import Product
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /chat/completions that streams canned chunks."""
+    chunks = ['Our ', 'kettle ', 'costs 10.00.']
+    delay = 0
+    fail = False
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        type(self).requests.append(body)
+        if self.fail:
+            self.send_response(500)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{"error": {"message": "boom"}}')
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for index, text in enumerate(self.chunks):
+            time.sleep(self.delay)
+            chunk = {
+                'id': 'chatcmpl-1', 'object': 'chat.completion.chunk', 'created': 0, 'model': body['model'],
+                'choices': [{'index': 0, 'delta': {'content': text}, 'finish_reason': None}],
+            }
+            self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+            self.wfile.flush()
+        self.wfile.write(b'data: [DONE]\n\n')
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def fake_llm(settings):
+    FakeLLMHandler.requests = []
+    FakeLLMHandler.delay = 0
+    FakeLLMHandler.fail = False
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeLLMHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.CHAT_LLM_BASE_URL = f'http://127.0.0.1:{server.server_address[1]}/v1'
+    settings.CHAT_LLM_API_KEY = 'test'
+    settings.CHAT_LLM_MAX_RETRIES = 0
+    yield FakeLLMHandler
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(autouse=True)
+def clear_answer_cache():
+    get_answer_cache().clear()
+    yield
+    get_answer_cache().clear()
+
+@pytest.fixture
+def auth_header(user):
+    return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines.get('event', 'message'), json.loads(lines['data'])))
+    return events
+
+async def _post(headers, payload):
+    response = await AsyncClient().post(
+        '/api/chat/completions/', json.dumps(payload), content_type='application/json', headers=headers
+    )
+    if response.streaming:
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+    else:
+        body = response.content.decode()
+    return response, body
+
+post = async_to_sync(_post)
+
+@pytest.mark.django_db(transaction=True)
+class TestChatCompletions:
+    def test_streams_tokens_and_saves_history(self, fake_llm, user, auth_header):
+        Product.objects.create(
+            name='Steel Kettle', description='Boils water', price='10.00', status='approved',
+            business=user.business, created_by=user
+        )
+        response, body = post(auth_header, {'message': 'How much is the kettle?'})
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'text/event-stream'
+        events = parse_events(body)
+        assert [data['delta'] for event, data in events if event == 'message'] == fake_llm.chunks
+        assert events[-1][0] == 'done'
+        history = ChatHistory.objects.get(pk=events[-1][1]['id'])
+        assert history.ai_response == 'Our kettle costs 10.00.'
+        assert history.user == user
+        # The product context and the question reached the model
+        sent = fake_llm.requests[0]['messages']
+        assert 'Steel Kettle' in sent[0]['content']
+        assert sent[-1] == {'role': 'user', 'content': 'How much is the kettle?'}
+
+    def test_includes_recent_turns(self, fake_llm, user, auth_header):
+        ChatHistory.objects.create(user=user, business=user.business, user_message='Hi', ai_response='Hello!')
+        post(auth_header, {'message': 'Anything new?', 'turns': 2})
+        roles = [message['role'] for message in fake_llm.requests[0]['messages']]
+        assert roles == ['system', 'user', 'assistant', 'user']
+
+    def test_llm_failure_is_reported_as_event(self, fake_llm, user, auth_header):
+        fake_llm.fail = True
+        response, body = post(auth_header, {'message': 'Hello?'})
+        assert parse_events(body)[-1][0] == 'error'
+        assert not ChatHistory.objects.exists()
+
+    def test_per_business_concurrency_limit(self, fake_llm, user, auth_header, settings):
+        settings.CHAT_LLM_MAX_CONCURRENCY = 1
+        settings.CHAT_LLM_QUEUE_TIMEOUT = 0.05
+        fake_llm.delay = 0.1
+
+        async def both():
+            import asyncio
+            return await asyncio.gather(
+                _post(auth_header, {'message': 'one'}), _post(auth_header, {'message': 'two'})
+            )
+        statuses = sorted(response.status_code for response, _ in async_to_sync(both)())
+        assert statuses == [200, 429]
+
+    def test_unread_response_gives_its_slot_back(self, fake_llm, user, auth_header, settings):
+        settings.CHAT_LLM_MAX_CONCURRENCY = 1
+        settings.CHAT_LLM_QUEUE_TIMEOUT = 0
+        dropped = async_to_sync(AsyncClient().post)(
+            '/api/chat/completions/', json.dumps({'message': 'one'}), content_type='application/json',
+            headers=auth_header
+        )
+        assert dropped.status_code == 200
+        assert post(auth_header, {'message': 'two', 'cache': False})[0].status_code == 429
+        # The client went away without reading anything; the server closes the response
+        dropped.close()
+        assert post(auth_header, {'message': 'three', 'cache': False})[0].status_code == 200
+
+    def test_concurrency_limit_spans_event_loops(self, user, settings):
+        # Under WSGI every request runs on its own event loop
+        settings.CHAT_LLM_MAX_CONCURRENCY = 1
+        settings.CHAT_LLM_QUEUE_TIMEOUT = 0
+        slot = async_to_sync(llm.acquire_slot)(user.business_id)
+        with pytest.raises(llm.BusinessBusy):
+            async_to_sync(llm.acquire_slot)(user.business_id)
+        slot.release()
+        slot.release()
+        async_to_sync(llm.acquire_slot)(user.business_id).release()
+
+    def test_requires_authentication(self, fake_llm):
+        response, _ = post({}, {'message': 'Hello?'})
+        assert response.status_code == 401
+
+    def test_validates_body(self, fake_llm, auth_header):
+        response, _ = post(auth_header, {'message': ''})
+        assert response.status_code == 400
+
+    def test_repeated_question_is_answered_from_cache(self, fake_llm, user, auth_header):
+        post(auth_header, {'message': 'Do you sell kettles?', 'turns': 0})
+        response, body = post(auth_header, {'message': '  do you SELL kettles!! ', 'turns': 0})
+        events = parse_events(body)
+        assert events[0][1]['delta'] == 'Our kettle costs 10.00.'
+        assert events[-1][1]['cached'] is True
+        assert len(fake_llm.requests) == 1
+        assert ChatHistory.objects.count() == 2
+        metrics = get_answer_cache().metrics()
+        assert (metrics['hits'], metrics['misses']) == (1, 1)
+
+    def test_follow_ups_are_cached_per_conversation(self, fake_llm, user, auth_header):
+        post(auth_header, {'message': 'How much is it?'})
+        ChatHistory.objects.create(user=user, business=user.business, user_message='Any lamps?', ai_response='Yes.')
+        post(auth_header, {'message': 'How much is it?'})
+        assert len(fake_llm.requests) == 2
+        assert [message['role'] for message in fake_llm.requests[1]['messages']][1:3] == ['user', 'assistant']
+
+    def test_catalog_change_invalidates_answers(self, fake_llm, user, auth_header):
+        post(auth_header, {'message': 'Do you sell kettles?'})
+        Product.objects.create(
+            name='Kettle', description='New', price='5.00', business=user.business, created_by=user
+        )
+        post(auth_header, {'message': 'Do you sell kettles?'})
+        assert len(fake_llm.requests) == 2
+
+    def test_cache_can_be_bypassed(self, fake_llm, user, auth_header):
+        post(auth_header, {'message': 'Do you sell kettles?'})
+        post(auth_header, {'message': 'Do you sell kettles?', 'cache': False})
+        assert len(fake_llm.requests) == 2
+
+
+def test_normalize_message():
+    assert normalize_message('What is the PRICE of the kettle?') == normalize_message('what is price of kettle!')
+    assert normalize_message('Where is the lamp?') != normalize_message('Why is the lamp?')
+
+
+def test_answer_cache_lru_and_ttl(monkeypatch):
+    cache = AnswerCache(max_entries=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    now = time.monotonic()
+    monkeypatch.setattr('apps.chat.answer_cache.time.monotonic', lambda: now + 11)
+    assert cache.get('a') is None
+    assert cache.metrics()['evictions'] == 1
+    assert cache.metrics()['expirations'] == 1
@@ -0,0 +1,116 @@
+import time
+import pytest
+from django.contrib.auth import get_user_model
+from apps.authentication.models import Business
+from apps.chat import retrieval
+from apps.chat.retrieval import BM25Index, registry
+from apps.products.cache import business_version_key, get_catalog_cache
+from apps.products.models import Product
+from apps.products.signals import products_bulk_changed
+
+User = get_user_model()
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    registry.clear()
+    yield
+    registry.clear()
+
+@pytest.fixture
+def auth_client(api_client, user):
+    api_client.force_authenticate(user=user)
+    return api_client
+
+def make_product(user, name, description='Desc', status='approved', business=None):
+    return Product.objects.create(
+        name=name, description=description, price='10.00', status=status,
+        business=business or user.business, created_by=user
+    )
+
+def names(response):
+    return [result['name'] for result in response.data['results']]
+
+@pytest.mark.django_db
+class TestProductContext:
+    def test_ranks_matching_products(self, auth_client, user):
+        make_product(user, 'Red Running Shoes', 'Lightweight shoes for running')
+        make_product(user, 'Blue Denim Jacket', 'Classic jacket')
+        make_product(user, 'Trail Shoes', 'Grippy soles')
+        response = auth_client.post('/api/chat/context/', {'message': 'Do you have running shoes?'})
+        assert response.status_code == 200
+        assert names(response) == ['Red Running Shoes', 'Trail Shoes']
+        assert response.data['total_products'] == 3
+        assert set(response.data['results'][0]) == {'id', 'name', 'price', 'status', 'description', 'score'}
+
+    def test_k_and_status(self, auth_client, user):
+        for index in range(4):
+            make_product(user, f'Lamp {index}')
+        make_product(user, 'Draft Lamp', status='draft')
+        response = auth_client.post('/api/chat/context/', {'message': 'lamp', 'k': 2})
+        assert len(response.data['results']) == 2
+        response = auth_client.post('/api/chat/context/', {'message': 'lamp', 'status': 'draft'})
+        assert names(response) == ['Draft Lamp']
+
+    def test_only_searches_own_business(self, auth_client, user):
+        other = Business.objects.create(name='Other Business')
+        make_product(user, 'Other Kettle', business=other)
+        make_product(user, 'Our Kettle')
+        assert names(auth_client.post('/api/chat/context/', {'message': 'kettle'})) == ['Our Kettle']
+
+    def test_writes_update_index(self, auth_client, user, django_capture_on_commit_callbacks):
+        kettle = make_product(user, 'Steel Kettle')
+        auth_client.post('/api/chat/context/', {'message': 'kettle'})
+        with django_capture_on_commit_callbacks(execute=True):
+            kettle.name = 'Steel Teapot'
+            kettle.save()
+            make_product(user, 'Copper Kettle')
+        entry = registry.get(user.business_id)
+        assert names(auth_client.post('/api/chat/context/', {'message': 'kettle'})) == ['Copper Kettle']
+        assert registry.get(user.business_id) is entry  # updated in place, not rebuilt
+        with django_capture_on_commit_callbacks(execute=True):
+            kettle.delete()
+        assert names(auth_client.post('/api/chat/context/', {'message': 'teapot'})) == []
+
+    def test_bulk_writes_update_index(self, auth_client, user, django_capture_on_commit_callbacks):
+        auth_client.post('/api/chat/context/', {'message': 'kettle'})
+        products = Product.objects.bulk_create([
+            Product(name='Bulk Kettle', description='Desc', price='1.00', business=user.business, created_by=user)
+        ])
+        with django_capture_on_commit_callbacks(execute=True):
+            products_bulk_changed.send(sender=Product, business_ids={user.business_id}, product_ids=[products[0].pk])
+        assert names(auth_client.post('/api/chat/context/', {'message': 'kettle'})) == ['Bulk Kettle']
+
+    def test_other_processes_writes_force_a_rebuild(self, auth_client, user, django_capture_on_commit_callbacks):
+        auth_client.post('/api/chat/context/', {'message': 'kettle'})
+        entry = registry.get(user.business_id)
+        # Another process wrote a product this one never saw
+        get_catalog_cache().set(business_version_key(user.business_id), 1, timeout=None)
+        with django_capture_on_commit_callbacks(execute=True):
+            make_product(user, 'Copper Kettle')
+        assert registry.get(user.business_id) is not entry
+
+    def test_bulk_writes_skip_unloaded_businesses(self, user, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            retrieval.products_bulk_changed(sender=Product, business_ids={user.business_id}, product_ids=[1, 2])
+
+    def test_requires_authentication(self, api_client):
+        assert api_client.post('/api/chat/context/', {'message': 'kettle'}).status_code == 401
+
+    def test_user_without_business(self, api_client):
+        api_client.force_authenticate(user=User.objects.create_user(username='loner', password='password'))
+        assert api_client.post('/api/chat/context/', {'message': 'kettle'}).status_code == 400
+
+
+def test_search_stays_fast_on_a_large_catalog():
+    index = BM25Index()
+    words = [f'word{number}' for number in range(2000)]
+    for doc_id in range(100000):
+        name = f'{words[doc_id % 2000]} {words[(doc_id * 7) % 2000]} product'
+        description = ' '.join(words[(doc_id * step) % 2000] for step in (3, 11, 13, 17))
+        index.add(doc_id, {'id': doc_id, 'status': 'approved'}, (name, description))
+    started = time.perf_counter()
+    for _ in range(10):
+        results = index.search('do you have a word5 or word77 product', k=5)
+    assert len(results) == 5
+    # Generous bound so slow CI machines pass; typically a few milliseconds
+    assert (time.perf_counter() - started) / 10 < 0.2
@@ -0,0 +1,103 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.chat import window as chat_window
+from apps.chat.models import ChatHistory
+
+@pytest.fixture
+def auth_client(api_client, user):
+    api_client.force_authenticate(user=user)
+    return api_client
+
+def say(user, text, reply='ok'):
+    return ChatHistory.objects.create(user=user, business=user.business, user_message=text, ai_response=reply)
+
+def window(client, **params):
+    response = client.get('/api/chat/history/window/', params)
+    assert response.status_code == 200
+    return response.data
+
+@pytest.mark.django_db
+class TestConversationWindow:
+    def test_returns_last_turns_oldest_first(self, auth_client, user):
+        for i in range(5):
+            say(user, f'q{i}')
+        data = window(auth_client, turns=3)
+        assert [turn['user_message'] for turn in data['turns']] == ['q2', 'q3', 'q4']
+        assert set(data['turns'][0]) == {'id', 'user_message', 'ai_response', 'timestamp'}
+        assert data['truncated'] is False
+
+    def test_budget_drops_oldest_turns(self, auth_client, user):
+        say(user, 'x' * 50)
+        say(user, 'short', 'reply')
+        data = window(auth_client, max_chars=20)
+        assert [turn['user_message'] for turn in data['turns']] == ['short']
+        assert data['truncated'] is True
+        assert window(auth_client, max_tokens=1)['turns'] == []
+
+    def test_warm_window_touches_no_database(self, auth_client, user, django_capture_on_commit_callbacks):
+        say(user, 'first')
+        window(auth_client)
+        with django_capture_on_commit_callbacks(execute=True):
+            say(user, 'second')
+        with CaptureQueriesContext(connection) as context:
+            data = window(auth_client)
+        assert len(context) == 0
+        assert [turn['user_message'] for turn in data['turns']] == ['first', 'second']
+
+    def test_buffer_is_bounded(self, auth_client, user, settings, django_capture_on_commit_callbacks):
+        settings.CHAT_WINDOW_SIZE = 3
+        window(auth_client)
+        with django_capture_on_commit_callbacks(execute=True):
+            for i in range(5):
+                say(user, f'q{i}')
+        data = window(auth_client, turns=10)
+        assert [turn['user_message'] for turn in data['turns']] == ['q2', 'q3', 'q4']
+
+    def test_message_committed_during_fill_is_not_lost(self, auth_client, user, monkeypatch,
+                                                       django_capture_on_commit_callbacks):
+        say(user, 'first')
+        load_window = chat_window.load_window
+
+        def racing_load(user_id):
+            turns = load_window(user_id)
+            # Commits after the fill read the table, before it stores the buffer
+            with django_capture_on_commit_callbacks(execute=True):
+                say(user, 'second')
+            return turns
+
+        monkeypatch.setattr(chat_window, 'load_window', racing_load)
+        assert [turn['user_message'] for turn in window(auth_client)['turns']] == ['first']
+        monkeypatch.setattr(chat_window, 'load_window', load_window)
+        assert [turn['user_message'] for turn in window(auth_client)['turns']] == ['first', 'second']
+
+    def test_appends_keep_message_order(self, auth_client, user, django_capture_on_commit_callbacks):
+        window(auth_client)
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            say(user, 'one')
+            say(user, 'two')
+        callbacks[1]()
+        callbacks[0]()
+        with CaptureQueriesContext(connection) as context:
+            turns = window(auth_client)['turns']
+        assert len(context) == 0
+        assert [turn['user_message'] for turn in turns] == ['one', 'two']
+
+    def test_racing_append_forces_reload(self, auth_client, user, django_capture_on_commit_callbacks):
+        window(auth_client)
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            say(user, 'one')
+            say(user, 'two')
+        # The append for 'two' bumped the generation, then lost the race to store its buffer
+        chat_window.get_window_cache().incr(chat_window.generation_cache_key(user.pk))
+        callbacks[0]()
+        assert [turn['user_message'] for turn in window(auth_client)['turns']] == ['one', 'two']
+
+    def test_delete_invalidates(self, auth_client, user):
+        message = say(user, 'gone')
+        window(auth_client)
+        auth_client.delete(f'/api/chat/history/{message.id}/')
+        assert window(auth_client)['turns'] == []
+
+    def test_requires_authentication(self, api_client):
+        assert api_client.get('/api/chat/history/window/').status_code == 401
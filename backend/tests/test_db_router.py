@@ -0,0 +1,87 @@
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.products.models import Product
+from apps.products.stats import rebuild_stats
+from core.db_router import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, replica_reads, replica_reads_allowed
+
+@pytest.fixture
+def replicas(settings, tmp_path):
+    settings.DATABASE_REPLICAS = ['replica1', 'replica2']
+    settings.REPLICA_PIN_SECONDS = 5
+    # Pins need a cache every worker shares; the file cache is one
+    settings.CACHES = {**settings.CACHES, 'pins': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path),
+    }}
+    settings.REPLICA_PIN_CACHE_ALIAS = 'pins'
+
+@pytest.fixture
+def middleware():
+    seen = []
+
+    def view(request):
+        seen.append(replica_reads_allowed())
+        return HttpResponse()
+    return ReplicaRoutingMiddleware(view), seen
+
+def _bearer(user_id):
+    token = AccessToken()
+    token['user_id'] = user_id
+    return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+def test_reads_round_robin_only_when_allowed(replicas):
+    router = ReplicaRouter()
+    assert router.db_for_read(Product) == 'default'
+    with replica_reads():
+        assert [router.db_for_read(Product) for _ in range(3)] == ['replica1', 'replica2', 'replica1']
+        assert router.db_for_write(Product) == 'default'
+        with replica_reads(False):
+            assert router.db_for_read(Product) == 'default'
+
+def test_no_replicas_means_primary(settings):
+    settings.DATABASE_REPLICAS = []
+    with replica_reads():
+        assert ReplicaRouter().db_for_read(Product) == 'default'
+
+def test_local_memory_pins_keep_reads_on_primary(settings):
+    settings.DATABASE_REPLICAS = ['replica1']
+    settings.REPLICA_PIN_CACHE_ALIAS = 'default'
+    with replica_reads():
+        assert ReplicaRouter().db_for_read(Product) == 'default'
+
+@pytest.mark.django_db
+def test_transactions_read_the_primary(replicas):
+    # pytest-django wraps the test in a transaction on the primary
+    with replica_reads():
+        assert ReplicaRouter().db_for_read(Product) == 'default'
+
+def test_safe_requests_use_replicas_and_writes_pin_the_client(replicas, middleware):
+    handler, seen = middleware
+    factory = RequestFactory()
+    handler(factory.get('/api/products/', **_bearer(7)))
+    response = handler(factory.post('/api/products/', **_bearer(7)))
+    assert response.cookies[PIN_COOKIE]['max-age'] == 5
+    handler(factory.get('/api/products/', **_bearer(7)))
+    handler(factory.get('/api/products/', **_bearer(8)))
+    assert seen == [True, False, False, True]
+
+def test_pin_cookie_keeps_tokenless_clients_on_primary(replicas, middleware):
+    handler, seen = middleware
+    request = RequestFactory().get('/api/products/')
+    request.COOKIES[PIN_COOKIE] = '1'
+    handler(request)
+    handler(RequestFactory().get('/api/products/'))
+    assert seen == [False, True]
+
+def test_middleware_is_inert_without_replicas(settings, middleware):
+    settings.DATABASE_REPLICAS = []
+    handler, seen = middleware
+    response = handler(RequestFactory().post('/api/products/'))
+    assert seen == [False] and PIN_COOKIE not in response.cookies
+
+@pytest.mark.django_db(transaction=True)
+def test_stats_rebuilds_read_the_primary(replicas, business):
+    # replica1 is not a configured database, so any read routed to it would fail
+    with replica_reads():
+        assert rebuild_stats([business.pk]) == 1
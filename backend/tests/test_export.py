@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+import pytest
+from apps.products.models import Product
+from apps.products.serializers import ProductSerializer
+from apps.authentication.models import Business
+
+def _content(response):
+    return b''.join(response.streaming_content).decode('utf-8')
+
+@pytest.fixture
+def products(user):
+    products = [
+        Product.objects.create(
+            name=f'Product {i}', description='Line one, "quoted"\nline two', price=f'{i}.5',
+            status='draft' if i % 2 else 'approved', business=user.business, created_by=user
+        )
+        for i in range(6)
+    ]
+    products[0].approve(user)
+    other = Business.objects.create(name='Other Business')
+    Product.objects.create(name='Foreign', description='Desc', price='1.00', business=other)
+    return products
+
+@pytest.mark.django_db
+class TestProductExport:
+    def test_ndjson_matches_serializer_output(self, api_client, user, products):
+        api_client.force_authenticate(user=user)
+        response = api_client.get('/api/products/export/', {'output': 'ndjson'})
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in _content(response).splitlines()]
+        expected = ProductSerializer(Product.objects.filter(business=user.business), many=True).data
+        assert rows == [dict(row) for row in expected]
+
+    def test_csv_honours_filters(self, api_client, user, products):
+        api_client.force_authenticate(user=user)
+        response = api_client.get('/api/products/export/', {'status': 'draft', 'min_price': '2'})
+        assert response['Content-Disposition'] == 'attachment; filename="products.csv"'
+        rows = list(csv.DictReader(io.StringIO(_content(response))))
+        assert sorted(row['name'] for row in rows) == ['Product 3', 'Product 5']
+        assert rows[0]['description'] == 'Line one, "quoted"\nline two'
+        assert rows[0]['price'] in ('3.50', '5.50')
+
+    def test_unknown_output_is_rejected(self, api_client, user):
+        api_client.force_authenticate(user=user)
+        response = api_client.get('/api/products/export/', {'output': 'xml'})
+        assert response.status_code == 400
+
+    def test_requires_authentication(self, api_client):
+        assert api_client.get('/api/products/export/').status_code == 401
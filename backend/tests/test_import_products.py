@@ -0,0 +1,74 @@
+import json
+import pytest
+from django.core.management import call_command
+from apps.products.models import Product, ProductImport
+
+CSV_ROWS = [
+    'name,description,price,status,created_by_name',
+    'Lamp,"Warm, bright",12.50,,testuser',
+    'Chair,Wooden,40,pending_approval,',
+    'Broken,Too cheap,-1,draft,testuser',
+    'Ghost,Unknown owner,5,draft,nobody',
+    'Table,Oak,99.99,draft,testuser',
+]
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'products.csv'
+    path.write_text('\n'.join(CSV_ROWS) + '\n')
+    return path
+
+@pytest.mark.django_db
+class TestImportProducts:
+    def test_imports_valid_rows_and_reports_rejects(self, business, user, csv_file, tmp_path):
+        rejects = tmp_path / 'rejects.ndjson'
+        call_command('import_products', str(csv_file), business=business.name, batch_size=2, rejects=str(rejects))
+
+        products = {p.name: p for p in Product.objects.filter(business=business)}
+        assert sorted(products) == ['Chair', 'Lamp', 'Table']
+        assert products['Lamp'].created_by == user
+        assert products['Lamp'].status == 'draft'
+        assert products['Chair'].created_by is None
+        assert products['Chair'].status == 'pending_approval'
+
+        rejected = [json.loads(line) for line in rejects.read_text().splitlines()]
+        assert [(r['record'], sorted(r['errors'])) for r in rejected] == [(3, ['price']), (4, ['created_by_name'])]
+
+        progress = ProductImport.objects.get(name=str(csv_file))
+        assert (progress.records, progress.imported, progress.rejected) == (5, 3, 2)
+        assert progress.offset == csv_file.stat().st_size
+
+    def test_resume_seeks_past_checkpointed_records(self, business, user, csv_file):
+        offset = len(('\n'.join(CSV_ROWS[:5]) + '\n').encode())
+        ProductImport.objects.create(name=str(csv_file), path=str(csv_file), business=business,
+                                     records=4, offset=offset, imported=2, rejected=2)
+        call_command('import_products', str(csv_file), business=str(business.pk), resume=True)
+        assert list(Product.objects.values_list('name', flat=True)) == ['Table']
+        assert ProductImport.objects.get().imported == 3
+
+    def test_crashed_batch_is_written_once_on_resume(self, business, user, csv_file, monkeypatch):
+        bulk_create = Product.objects.bulk_create
+        calls = []
+
+        def crash_on_second_batch(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('crash')
+            return bulk_create(*args, **kwargs)
+        monkeypatch.setattr(Product.objects, 'bulk_create', crash_on_second_batch)
+        with pytest.raises(RuntimeError):
+            call_command('import_products', str(csv_file), business=business.name, batch_size=2)
+        monkeypatch.undo()
+        call_command('import_products', str(csv_file), business=business.name, batch_size=2, resume=True)
+        assert sorted(Product.objects.values_list('name', flat=True)) == ['Chair', 'Lamp', 'Table']
+
+    def test_ndjson(self, business, user, tmp_path):
+        path = tmp_path / 'products.ndjson'
+        path.write_text('\n'.join([
+            json.dumps({'name': 'Lamp', 'description': 'Warm', 'price': 12.5}),
+            'not json',
+            json.dumps({'name': 'Sneaky', 'description': 'Desc', 'price': '1', 'status': 'approved'}),
+        ]))
+        call_command('import_products', str(path), business=business.name, default_created_by='testuser')
+        lamp = Product.objects.get()
+        assert (lamp.name, str(lamp.price), lamp.created_by) == ('Lamp', '12.50', user)
@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from apps.authentication.models import Role
+from apps.products.models import Product
+
+def _auth_queries(context):
+    return [q['sql'] for q in context.captured_queries if 'FROM "authentication_' in q['sql']]
+
+@pytest.fixture
+def tokens(api_client, user):
+    return api_client.post('/api/auth/login/', {'username': 'testuser', 'password': 'password'}).data
+
+@pytest.fixture
+def claims_client(api_client, tokens):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+    return api_client
+
+@pytest.mark.django_db
+class TestJWTClaims:
+    def test_token_carries_claims(self, tokens, user, business):
+        token = AccessToken(tokens['access'])
+        assert token['business_id'] == business.id
+        assert token['role'] == 'admin'
+        assert token['is_business_admin'] is False
+        assert token['tv']
+
+    def test_get_makes_no_auth_queries(self, claims_client, business, user):
+        Product.objects.create(name='Widget', description='d', price='5.00', business=business, created_by=user)
+        claims_client.get('/api/products/list_internal/')
+        with CaptureQueriesContext(connection) as context:
+            response = claims_client.get('/api/products/list_internal/')
+        assert response.status_code == 200
+        assert len(response.data['results']) == 1
+        assert _auth_queries(context) == []
+
+    def test_write_loads_full_user(self, claims_client, user):
+        claims_client.get('/api/products/list_internal/')
+        with CaptureQueriesContext(connection) as context:
+            response = claims_client.post('/api/products/', {'name': 'New', 'description': 'd', 'price': '1.00'})
+        assert response.status_code == 201
+        assert Product.objects.get().created_by_id == user.id
+        assert context.captured_queries
+
+    def test_role_change_outdates_token_until_refresh(self, api_client, claims_client, tokens, user):
+        assert claims_client.get('/api/products/list_internal/').status_code == 200
+        user.role = Role.objects.create(name='viewer')
+        user.save()
+        response = claims_client.get('/api/products/list_internal/')
+        assert response.status_code == 401
+        assert response.data['code'] == 'token_outdated'
+        refreshed = api_client.post('/api/auth/refresh/', {'refresh': tokens['refresh']}).data
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed['access']}")
+        assert api_client.get('/api/products/list_internal/').status_code == 200
+
+    def test_password_change_outdates_token(self, claims_client, user):
+        user.set_password('changed')
+        user.save()
+        assert claims_client.get('/api/products/list_internal/').status_code == 401
+
+    def test_token_without_claims_still_works(self, api_client, user):
+        access = RefreshToken.for_user(user).access_token
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        assert api_client.get('/api/auth/me/').data['username'] == 'testuser'
+        assert api_client.get('/api/products/list_internal/').status_code == 200
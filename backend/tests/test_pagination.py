@@ -0,0 +1,61 @@
+import pytest
+from django.utils import timezone
+from apps.products.models import Product
+from apps.chat.models import ChatHistory
+
+def _walk(api_client, url, params):
+    seen = []
+    response = api_client.get(url, params)
+    while True:
+        assert response.status_code == 200
+        assert 'count' not in response.data
+        seen.extend(row['id'] for row in response.data['results'])
+        if not response.data['next']:
+            return seen, response
+        response = api_client.get(response.data['next'])
+
+@pytest.fixture
+def products(user):
+    created = [
+        Product.objects.create(
+            name=f'Product {i:02d}', description='Desc', price=f'{i}.00', status='approved',
+            business=user.business, created_by=user
+        )
+        for i in range(25)
+    ]
+    # Identical timestamps force the id tiebreaker to do the work
+    Product.objects.filter(id__in=[p.id for p in created[:12]]).update(created_at=timezone.now())
+    return created
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_walks_every_row_once(self, api_client, products):
+        seen, _ = _walk(api_client, '/api/products/', {'cursor': ''})
+        expected = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        assert seen == expected
+
+    def test_follows_requested_ordering(self, api_client, products):
+        seen, _ = _walk(api_client, '/api/products/', {'cursor': '', 'ordering': 'price'})
+        assert seen == [p.id for p in sorted(products, key=lambda p: float(p.price))]
+
+    def test_previous_link_returns_prior_page(self, api_client, products):
+        first = api_client.get('/api/products/', {'cursor': ''})
+        assert first.data['previous'] is None
+        second = api_client.get(first.data['next'])
+        back = api_client.get(second.data['previous'])
+        assert [row['id'] for row in back.data['results']] == [row['id'] for row in first.data['results']]
+
+    def test_invalid_cursor(self, api_client, products):
+        response = api_client.get('/api/products/', {'cursor': 'not-a-cursor'})
+        assert response.status_code == 404
+
+    def test_page_number_remains_default(self, api_client, products):
+        response = api_client.get('/api/products/', {'page': 2})
+        assert response.data['count'] == 25
+
+    def test_chat_history_cursor(self, api_client, user):
+        for i in range(15):
+            ChatHistory.objects.create(user=user, business=user.business, user_message=f'q{i}', ai_response='a')
+        api_client.force_authenticate(user=user)
+        seen, _ = _walk(api_client, '/api/chat/history/', {'cursor': ''})
+        assert seen == list(ChatHistory.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
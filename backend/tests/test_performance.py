@@ -0,0 +1,95 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+from apps.products.models import Product
+from core.performance import RequestMetrics, RouteStats, registry
+
+User = get_user_model()
+
+@pytest.fixture(autouse=True)
+def metrics(settings):
+    settings.PERF_SAMPLE_RATE = 1.0
+    settings.PERF_SERVER_TIMING = True
+    registry.reset()
+    yield registry
+    registry.reset()
+
+@pytest.fixture
+def products(business, user):
+    return [
+        Product.objects.create(name=f'Product {index}', description='d', price='10.00', status='approved',
+                               business=business, created_by=user)
+        for index in range(3)
+    ]
+
+@pytest.mark.django_db
+class TestPerformanceMiddleware:
+    def test_records_route_metrics_and_server_timing(self, api_client, user, products, metrics):
+        api_client.force_authenticate(user=user)
+        response = api_client.get('/api/products/list_internal/')
+        assert response.status_code == 200
+        timing = response['Server-Timing']
+        assert 'total;dur=' in timing and 'db;dur=' in timing
+        assert 'serialize;dur=' in timing and 'render;dur=' in timing
+
+        route = metrics.snapshot()['GET product-list-internal']
+        assert route['count'] == 1
+        assert route['queries_per_request'] >= 1
+        assert route['serialize_ms_per_request'] > 0
+        assert route['response_bytes_per_request'] == len(response.content)
+        assert sum(route['histogram_ms'].values()) == 1
+
+    def test_unsampled_requests_are_not_recorded(self, api_client, products, metrics, settings):
+        settings.PERF_SAMPLE_RATE = 0.0
+        response = api_client.get('/api/products/')
+        assert 'Server-Timing' not in response
+        assert metrics.snapshot() == {}
+
+    def test_server_timing_is_optional(self, api_client, products, metrics, settings):
+        settings.PERF_SERVER_TIMING = False
+        assert 'Server-Timing' not in api_client.get('/api/products/')
+        assert metrics.snapshot()['GET product-list']['count'] == 1
+
+    def test_keeps_slowest_queries(self, api_client, user, products, metrics, settings):
+        settings.PERF_SLOW_QUERY_MS = 0
+        settings.PERF_MAX_SLOW_QUERIES = 2
+        api_client.force_authenticate(user=user)
+        api_client.get('/api/chat/history/')
+        slow = metrics.snapshot()['GET chat_history-list']['slow_queries']
+        assert len(slow) == 2
+        assert slow[0]['ms'] >= slow[1]['ms'] and 'SELECT' in slow[0]['sql']
+
+    def test_async_views_are_recorded(self, products, metrics):
+        response = async_to_sync(AsyncClient().get)('/api/products/async/')
+        assert response.status_code == 200
+        route = metrics.snapshot()['GET product-async-list']
+        assert route['count'] == 1 and route['serialize_ms_per_request'] > 0
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_staff_only(self, api_client, user):
+        api_client.force_authenticate(user=user)
+        assert api_client.get('/api/metrics/').status_code == 403
+
+    def test_lists_and_resets_routes(self, api_client, business, products, metrics):
+        staff = User.objects.create_user(username='staff', email='staff@example.com', password='password',
+                                         business=business, is_staff=True)
+        api_client.get('/api/products/')
+        api_client.force_authenticate(user=staff)
+        data = api_client.get('/api/metrics/').data
+        assert data['sample_rate'] == 1.0
+        assert data['routes']['GET product-list']['count'] == 1
+        assert api_client.delete('/api/metrics/').status_code == 204
+        assert list(metrics.snapshot()) == ['DELETE performance-metrics']
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    stats = RouteStats()
+    for elapsed_ms in [3, 4, 8, 40, 700]:
+        stats.record(200, elapsed_ms, RequestMetrics(), 10, 5)
+    data = stats.as_dict()
+    assert data['histogram_ms']['5'] == 2 and data['histogram_ms']['1000'] == 1
+    assert data['p50_ms'] == 10
+    assert data['p99_ms'] == 1000
@@ -0,0 +1,67 @@
+from io import StringIO
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.authentication.models import Role
+from apps.authentication.policy import compile_policy, registry, role_has_permission
+from apps.products.models import Product
+
+User = get_user_model()
+
+def test_compile_policy_applies_overrides():
+    table = compile_policy([
+        ('editor', {'approve_product': True, 'edit_product': False}),
+        ('viewer', ['create_product']),
+    ])
+    assert 'editor' in table['approve_product']
+    assert 'editor' not in table['edit_product']
+    assert table['create_product'] >= {'viewer', 'editor', 'admin', 'approver'}
+    # Default roles without a row keep their defaults
+    assert 'admin' in table['delete_product']
+    with pytest.raises(TypeError):
+        table['delete_product'] = frozenset()
+
+@pytest.mark.django_db
+class TestRolePolicy:
+    @pytest.fixture
+    def editor(self, business):
+        role = Role.objects.create(name='editor')
+        return User.objects.create_user(username='editor', password='password', business=business, role=role)
+
+    def test_compiled_once_per_process(self, editor):
+        registry.table()
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(10):
+                role_has_permission('editor', 'create_product')
+        assert len(context) == 0
+
+    def test_role_save_recompiles(self, api_client, editor):
+        product = Product.objects.create(
+            name='P', description='D', price='1.00', status='pending_approval',
+            business=editor.business, created_by=editor
+        )
+        api_client.force_authenticate(user=editor)
+        assert api_client.post(f'/api/products/{product.id}/approve/', {'approved': True}).status_code == 403
+        editor.role.permissions = {'approve_product': True}
+        editor.role.save()
+        assert api_client.post(f'/api/products/{product.id}/approve/', {'approved': True}).status_code == 200
+
+    def test_revoked_permission_denies(self, api_client, user):
+        user.role.permissions = {'create_product': False}
+        user.role.save()
+        api_client.force_authenticate(user=user)
+        response = api_client.post('/api/products/', {'name': 'P', 'description': 'D', 'price': '1.00'})
+        assert response.status_code == 403
+
+    def test_user_without_role_is_denied(self, api_client, business):
+        api_client.force_authenticate(user=User.objects.create_user(username='norole', password='password', business=business))
+        response = api_client.post('/api/products/', {'name': 'P', 'description': 'D', 'price': '1.00'})
+        assert response.status_code == 403
+
+    def test_benchmark_command_agrees_with_legacy_maps(self):
+        out = StringIO()
+        call_command('benchmark_permissions', iterations=500, stdout=out)
+        assert 'compiled' in out.getvalue()
+        assert 'differ' not in out.getvalue()
@@ -0,0 +1,41 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from apps.authentication.models import Business
+from apps.products.models import Product
+from apps.chat.models import ChatHistory
+
+User = get_user_model()
+
+@pytest.mark.django_db
+class TestPopulateDummyData:
+    def test_defaults_match_original_dataset(self):
+        call_command('populate_dummy_data', seed=1)
+        assert Business.objects.count() == 3
+        assert User.objects.count() == 12
+        assert Product.objects.count() == 20
+        assert ChatHistory.objects.count() == 10
+        assert User.objects.get(username=f'admin_{Business.objects.first().id}').check_password('password123')
+
+    def test_scale_parameters(self):
+        call_command(
+            'populate_dummy_data', businesses=2, users_per_role=2, products=250,
+            chat_messages=40, batch_size=100, seed=7
+        )
+        assert User.objects.count() == 2 * 4 * 2
+        assert Product.objects.count() == 250
+        assert ChatHistory.objects.count() == 40
+        for product in Product.objects.select_related('created_by__role', 'approved_by__role'):
+            assert product.created_by.business_id == product.business_id
+            assert product.created_by.role.name in ['admin', 'editor']
+            if product.status == 'approved':
+                assert product.approved_by.role.name in ['admin', 'approver']
+                assert product.approved_at is not None
+
+    def test_seed_is_reproducible(self):
+        call_command('populate_dummy_data', products=30, seed=3)
+        first = list(Product.objects.order_by('id').values_list('name', 'price', 'status'))
+        Product.objects.all().delete()
+        call_command('populate_dummy_data', products=30, seed=3)
+        second = list(Product.objects.order_by('id').values_list('name', 'price', 'status'))
+        assert first == second
@@ -0,0 +1,109 @@
+from decimal import Decimal
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.authentication.models import Business
+from apps.products.models import BusinessProductStats, Product
+from apps.products.stats import apply_change, rebuild_stats
+
+STAT_FIELDS = [
+    'draft_count', 'pending_approval_count', 'approved_count', 'rejected_count',
+    'price_total', 'min_price', 'max_price', 'latest_approved_at'
+]
+
+def make_product(user, price, status='draft'):
+    return Product.objects.create(
+        name='Product', description='Desc', price=price, status=status,
+        business=user.business, created_by=user
+    )
+
+def snapshot(business):
+    stats = BusinessProductStats.objects.get(business=business)
+    return {field: getattr(stats, field) for field in STAT_FIELDS}
+
+@pytest.mark.django_db
+class TestProductStats:
+    def test_incremental_updates_match_rebuild(self, user, business):
+        cheap = make_product(user, '5.00')
+        make_product(user, '20.00', status='pending_approval')
+        expensive = make_product(user, '90.00')
+        expensive = Product.objects.get(pk=expensive.pk)
+        expensive.approve(user)
+        cheap = Product.objects.get(pk=cheap.pk)
+        cheap.price = '12.00'
+        cheap.status = 'rejected'
+        cheap.save()
+        Product.objects.get(pk=expensive.pk).delete()
+
+        incremental = snapshot(business)
+        assert incremental['min_price'] == Decimal('12.00')
+        assert incremental['max_price'] == Decimal('20.00')
+        assert incremental['approved_count'] == 0
+        assert incremental['latest_approved_at'] is None
+        rebuild_stats()
+        assert snapshot(business) == incremental
+
+    def test_repeated_deltas_do_not_go_below_zero(self, user, business):
+        product = make_product(user, '5.00')
+        old = {'business_id': business.pk, 'status': 'draft', 'price': product.price, 'approved_at': None}
+        for _ in range(2):
+            apply_change(business.pk, old, None)
+        assert snapshot(business)['draft_count'] == 0
+
+    def test_endpoint(self, api_client, user):
+        make_product(user, '10.00', status='pending_approval')
+        make_product(user, '30.00').approve(user)
+        api_client.force_authenticate(user=user)
+        response = api_client.get('/api/products/stats/')
+        assert response.status_code == 200
+        assert response.data['total'] == 2
+        assert response.data['pending_approval_count'] == 1
+        assert response.data['approved_count'] == 1
+        assert response.data['min_price'] == '10.00'
+        assert response.data['max_price'] == '30.00'
+        assert response.data['avg_price'] == '20.00'
+        assert response.data['latest_approved_at'] is not None
+
+    def test_endpoint_requires_authentication(self, api_client):
+        assert api_client.get('/api/products/stats/').status_code == 401
+
+    def test_bulk_changes_apply_deltas(self, api_client, user, business):
+        make_product(user, '2.00')
+        api_client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as context:
+            created = api_client.post('/api/products/bulk_create/', [
+                {'name': 'A', 'description': 'Desc', 'price': '1.00'},
+                {'name': 'B', 'description': 'Desc', 'price': '3.00'},
+            ], format='json')
+        # One delta UPDATE, no aggregate over the catalog
+        aggregates = [q['sql'] for q in context.captured_queries
+                      if 'FROM "products_product"' in q['sql'] and ('SUM(' in q['sql'] or 'COUNT(' in q['sql'])]
+        assert aggregates == []
+        assert snapshot(business)['draft_count'] == 3
+        assert snapshot(business)['max_price'] == Decimal('3.00')
+
+        ids = [item['id'] for item in created.data]
+        api_client.patch('/api/products/bulk_update/', [
+            {'id': ids[0], 'price': '5.00'}, {'id': ids[1], 'status': 'pending_approval'},
+        ], format='json')
+        api_client.post('/api/products/bulk_approve/', {'ids': ids}, format='json')
+        incremental = snapshot(business)
+        assert incremental['min_price'] == Decimal('2.00')
+        assert incremental['max_price'] == Decimal('5.00')
+        assert incremental['approved_count'] == 2
+        rebuild_stats()
+        assert snapshot(business) == incremental
+
+    def test_command_rebuilds_missing_rows(self, user, business):
+        make_product(user, '7.00')
+        empty = Business.objects.create(name='Empty Business')
+        BusinessProductStats.objects.all().delete()
+        call_command('rebuild_product_stats', stdout=None)
+        assert snapshot(business)['draft_count'] == 1
+        assert snapshot(empty)['draft_count'] == 0
+
+    def test_deleting_business_cascades(self, user, business):
+        make_product(user, '7.00')
+        business.delete()
+        assert not BusinessProductStats.objects.exists()
@@ -1,28 +1,10 @@
 import pytest
 from django.contrib.auth import get_user_model
-from rest_framework.test import APIClient
 from rest_framework import status
 from apps.products.models import Product
-from apps.authentication.models import Role, Business
 
 User = get_user_model()
 
-@pytest.fixture
-def api_client():
-    return APIClient()
-
-@pytest.fixture
-def business():
-    return Business.objects.create(name="Test Business")
-
-@pytest.fixture
-def admin_role():
-    return Role.objects.create(name='admin', permissions={})
-
-@pytest.fixture
-def user(business, admin_role):
-    return User.objects.create_user(username='testuser', password='password', business=business, role=admin_role)
-
 @pytest.mark.django_db
 class TestProductAPI:
     def test_create_product(self, api_client, user):
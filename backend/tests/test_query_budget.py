@@ -0,0 +1,78 @@
+import pytest
+from django.contrib.auth import get_user_model
+from apps.products.models import Product
+from apps.authentication.models import Business
+from apps.authentication.policy import registry as policy_registry
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+from core.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, assert_query_budget
+
+User = get_user_model()
+
+@pytest.fixture
+def catalog(business, user):
+    other_business = Business.objects.create(name="Other Business")
+    other_user = User.objects.create_user(username='otheruser', password='password', business=other_business)
+    for i in range(30):
+        owner = user if i % 2 else other_user
+        Product.objects.create(
+            name=f'Product {i}',
+            description='Desc',
+            price='10.00',
+            status='approved' if i % 3 else 'draft',
+            business=owner.business,
+            created_by=owner
+        )
+    # Budgets are for steady state; the role policy compiles once per process
+    policy_registry.table()
+
+@pytest.mark.django_db
+class TestProductQueryBudget:
+    def test_public_list_within_budget(self, api_client, catalog):
+        with assert_query_budget('product-list'):
+            response = api_client.get('/api/products/')
+        assert response.status_code == 200
+        assert response.data['count'] == 20
+
+    def test_list_internal_within_budget(self, api_client, user, catalog):
+        api_client.force_authenticate(user=user)
+        with assert_query_budget('product-list-internal'):
+            response = api_client.get('/api/products/list_internal/')
+        assert response.status_code == 200
+        assert all(row['business_name'] == 'Test Business' for row in response.data['results'])
+
+    def test_approve_within_budget(self, api_client, user, catalog):
+        product = Product.objects.filter(business=user.business, status='draft').first()
+        api_client.force_authenticate(user=user)
+        with assert_query_budget('product-approve'):
+            response = api_client.post(f'/api/products/{product.id}/approve/', {'approved': True})
+        assert response.status_code == 200
+        assert response.data['created_by_name'] == 'testuser'
+
+    def test_budget_exceeded_fails(self, api_client, catalog):
+        with pytest.raises(AssertionError):
+            with assert_query_budget('product-list', budget=0):
+                api_client.get('/api/products/')
+
+
+@pytest.mark.django_db
+class TestQueryBudgetMiddleware:
+    @pytest.fixture
+    def handler(self, settings):
+        settings.QUERY_BUDGETS = {'product-list': 0}
+
+        def view(request):
+            request.resolver_match = resolve(request.path)
+            list(Product.objects.all())
+            return HttpResponse()
+        return QueryBudgetMiddleware(view)
+
+    def test_overruns_are_logged_by_default(self, handler, caplog):
+        assert handler(RequestFactory().get('/api/products/')).status_code == 200
+        assert 'budget is 0' in caplog.text
+
+    def test_strict_mode_raises(self, handler, settings):
+        settings.QUERY_BUDGET_STRICT = True
+        with pytest.raises(QueryBudgetExceeded):
+            handler(RequestFactory().get('/api/products/'))
@@ -0,0 +1,74 @@
+import datetime
+import io
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from core import parsers, renderers
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+SAMPLE = OrderedDict([
+    ('count', 2),
+    ('next', 'http://testserver/api/products/?page=2'),
+    ('results', [
+        {'price': '10.50', 'created_at': '2026-01-02T03:04:05.123456Z', 'name': 'Kettle – électrique'},
+        {'price': Decimal('3.10'), 'created_at': timezone.make_aware(datetime.datetime(2026, 1, 2, 3, 4, 5, 120000),
+                                                                    datetime.timezone.utc)},
+    ]),
+    ('when', datetime.date(2026, 1, 2)),
+    ('at', datetime.time(3, 4, 5)),
+    ('id', uuid.UUID(int=1)),
+    ('detail', gettext_lazy('Not found.')),
+    ('separators', 'a\u2028b\u2029c'),
+    (1, 'integer key'),
+])
+
+@pytest.fixture(params=[True, False], ids=['orjson', 'fallback'])
+def backend(request, monkeypatch):
+    if request.param and renderers.orjson is None:
+        pytest.skip('orjson is not installed')
+    if not request.param:
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+    return request.param
+
+def test_renders_same_bytes_as_drf(backend):
+    assert FastJSONRenderer().render(SAMPLE) == JSONRenderer().render(SAMPLE)
+    assert FastJSONRenderer().render(None) == b''
+
+def test_indent_and_big_integers_match_drf(backend):
+    assert FastJSONRenderer().render(SAMPLE, 'application/json; indent=2') == JSONRenderer().render(SAMPLE, 'application/json; indent=2')
+    data = {'big': 2 ** 70}
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+def test_parses_like_drf(backend):
+    body = '{"name": "Kettle – électrique", "price": "10.50", "ids": [1, 2], "big": 1180591620717411303424}'.encode()
+    assert FastJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+
+def test_rejects_invalid_json_like_drf(backend):
+    for body in (b'{"a": NaN}', b'{"a": '):
+        with pytest.raises(ParseError) as fast:
+            FastJSONParser().parse(io.BytesIO(body))
+        with pytest.raises(ParseError) as drf:
+            JSONParser().parse(io.BytesIO(body))
+        assert str(fast.value) == str(drf.value)
+
+def test_non_utf8_bodies_use_drf_parser():
+    body = '{"name": "café"}'.encode('latin-1')
+    assert FastJSONParser().parse(io.BytesIO(body), parser_context={'encoding': 'latin-1'}) == {'name': 'café'}
+
+@pytest.mark.django_db
+def test_api_responses_use_fast_renderer(api_client, business, user):
+    api_client.force_authenticate(user=user)
+    created = api_client.post('/api/products/', {'name': 'Kettle', 'description': 'd', 'price': '10.5'}, format='json')
+    assert created.status_code == 201
+    assert created.data['price'] == '10.50'
+    response = api_client.get('/api/products/list_internal/')
+    assert response.accepted_renderer.__class__ is FastJSONRenderer
+    assert response.content == JSONRenderer().render(response.data)
@@ -0,0 +1,44 @@
+import pytest
+from apps.products.models import Product
+
+def _product(user, name, description='Plain description', status='approved'):
+    return Product(
+        name=name, description=description, price='10.00', status=status,
+        business=user.business, created_by=user
+    )
+
+def _search(api_client, term):
+    response = api_client.get('/api/products/', {'search': term})
+    assert response.status_code == 200
+    return [row['name'] for row in response.data['results']]
+
+@pytest.mark.django_db
+class TestProductSearch:
+    def test_matches_word_prefixes_in_name_and_description(self, api_client, user):
+        _product(user, 'Blue Widget').save()
+        _product(user, 'Red Gadget', description='Pairs well with a widget').save()
+        _product(user, 'Green Sprocket').save()
+        assert sorted(_search(api_client, 'wid')) == ['Blue Widget', 'Red Gadget']
+
+    def test_name_matches_rank_first(self, api_client, user):
+        _product(user, 'Red Gadget', description='Pairs well with a widget').save()
+        _product(user, 'Blue Widget').save()
+        assert _search(api_client, 'widget') == ['Blue Widget', 'Red Gadget']
+
+    def test_all_terms_must_match(self, api_client, user):
+        _product(user, 'Blue Widget').save()
+        _product(user, 'Blue Gadget').save()
+        assert _search(api_client, 'blue gadget') == ['Blue Gadget']
+
+    def test_index_follows_bulk_writes_and_deletes(self, api_client, user):
+        Product.objects.bulk_create([_product(user, 'Imported Lamp'), _product(user, 'Imported Chair')])
+        assert sorted(_search(api_client, 'imported')) == ['Imported Chair', 'Imported Lamp']
+
+        Product.objects.filter(name='Imported Lamp').update(name='Renamed Lamp')
+        Product.objects.filter(name='Imported Chair').delete()
+        assert _search(api_client, 'imported') == []
+        assert _search(api_client, 'renamed') == ['Renamed Lamp']
+
+    def test_only_public_products_are_searched(self, api_client, user):
+        _product(user, 'Draft Widget', status='draft').save()
+        assert _search(api_client, 'widget') == []
@@ -0,0 +1,81 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.products.models import Product
+from apps.products.serializers import ProductSerializer
+from core.management.commands.benchmark_serializers import DRFProductSerializer
+
+def _product_queries(context):
+    return [q['sql'] for q in context.captured_queries if 'FROM "products_product"' in q['sql']]
+
+@pytest.fixture
+def products(business, user):
+    products = [
+        Product.objects.create(name=f'Product {index}', description='long text ' * 50, price=f'{index}.50',
+                               status='approved', business=business, created_by=user)
+        for index in range(12)
+    ]
+    products[0].approve(user)
+    Product.objects.filter(pk=products[1].pk).update(created_by=None)
+    return products
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    def test_fields_limit_response_and_columns(self, api_client, products):
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get('/api/products/', {'fields': 'id,name,price'})
+        assert response.status_code == 200
+        assert set(response.data['results'][0]) == {'id', 'name', 'price'}
+        sql = _product_queries(context)[-1]
+        assert '"description"' not in sql and 'JOIN' not in sql
+
+    def test_omit_drops_fields(self, api_client, products):
+        response = api_client.get('/api/products/', {'omit': 'description,created_by_name'})
+        item = response.data['results'][0]
+        assert 'description' not in item and 'created_by_name' not in item
+        assert item['business_name'] == 'Test Business'
+
+    def test_unknown_field_is_rejected(self, api_client, products):
+        response = api_client.get('/api/products/', {'fields': 'id,secret'})
+        assert response.status_code == 400
+        assert 'secret' in str(response.data['fields'])
+
+    def test_keyset_pages_do_not_load_deferred_columns(self, api_client, user, products):
+        api_client.force_authenticate(user=user)
+        first = api_client.get('/api/products/list_internal/', {'fields': 'name', 'cursor': '', 'ordering': 'price'})
+        with CaptureQueriesContext(connection) as context:
+            second = api_client.get(first.data['next'])
+        assert len(_product_queries(context)) == 1
+        names = [item['name'] for item in first.data['results'] + second.data['results']]
+        assert len(names) == len(set(names)) == 12
+
+    def test_retrieve_with_fields_bypasses_detail_cache(self, api_client, products):
+        pk = products[0].pk
+        with CaptureQueriesContext(connection) as context:
+            sparse = api_client.get(f'/api/products/{pk}/', {'fields': 'name'})
+        assert sparse.data == {'name': 'Product 0'}
+        assert len(_product_queries(context)) == 1
+        assert 'description' in api_client.get(f'/api/products/{pk}/').data
+
+    def test_writes_return_full_products(self, api_client, user):
+        api_client.force_authenticate(user=user)
+        response = api_client.post('/api/products/?fields=id', {'name': 'New', 'description': 'd', 'price': '1.00'})
+        assert response.status_code == 201
+        assert 'description' in response.data
+
+
+@pytest.mark.django_db
+def test_fast_list_serializer_matches_drf(products, settings):
+    settings.TIME_ZONE = 'Africa/Kampala'
+    timezone.activate('Africa/Kampala')
+    try:
+        queryset = Product.objects.select_related('business', 'created_by').order_by('id')
+        assert ProductSerializer(queryset, many=True).data == DRFProductSerializer(queryset, many=True).data
+        fields = ['id', 'created_by_name', 'approved_at']
+        context = {'fields': fields}
+        fast = ProductSerializer(queryset, many=True, context=context).data
+        assert fast == DRFProductSerializer(queryset, many=True, context=context).data
+        assert 'created_by_name' not in fast[1] and fast[0]['approved_at'].endswith('+03:00')
+    finally:
+        timezone.deactivate()
@@ -0,0 +1,74 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+from apps.authentication.models import Business
+from core.throttling import TokenBucket, parse_rate
+
+User = get_user_model()
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}
+    return set_rates
+
+def test_parse_rate():
+    assert parse_rate('120/min') == (2.0, 120)
+    assert parse_rate('10/s:3') == (10.0, 3)
+
+def test_bucket_allows_burst_then_refills():
+    bucket = TokenBucket('1/s:3')
+    assert [bucket.take('throttle:test', now=100.0) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take('throttle:test', now=100.0) == pytest.approx(1.0)
+    # Denied requests are not charged
+    assert bucket.take('throttle:test', now=100.5) == pytest.approx(0.5)
+    assert bucket.take('throttle:test', now=101.0) == 0
+    assert bucket.take('throttle:test', now=101.0) > 0
+    # Idle buckets refill only up to the burst
+    assert [bucket.take('throttle:test', now=500.0) for _ in range(4)][-1] > 0
+
+@pytest.mark.django_db
+class TestThrottles:
+    def test_login_is_throttled_with_retry_after(self, api_client, user, rates):
+        rates(login='1/min:2')
+        for _ in range(2):
+            assert api_client.post('/api/auth/login/', {'username': 'testuser', 'password': 'wrong'}).status_code == 401
+        response = api_client.post('/api/auth/login/', {'username': 'testuser', 'password': 'password'})
+        assert response.status_code == 429
+        assert 55 <= int(response['Retry-After']) <= 60
+
+    def test_business_users_share_a_bucket(self, api_client, business, user, admin_role, rates):
+        rates(business='1/min:2')
+        colleague = User.objects.create_user(username='colleague', email='c@example.com', password='password',
+                                             business=business, role=admin_role)
+        outsider = User.objects.create_user(username='outsider', password='password',
+                                            business=Business.objects.create(name='Other'), role=admin_role)
+        for client_user in (user, colleague):
+            api_client.force_authenticate(user=client_user)
+            assert api_client.get('/api/products/list_internal/').status_code == 200
+        assert api_client.get('/api/products/list_internal/').status_code == 429
+        api_client.force_authenticate(user=outsider)
+        assert api_client.get('/api/products/list_internal/').status_code == 200
+
+    def test_anonymous_reads_are_per_ip(self, api_client, rates):
+        rates(anon_read='1/min:1')
+        assert api_client.get('/api/products/', REMOTE_ADDR='10.0.0.1').status_code == 200
+        assert api_client.get('/api/products/', REMOTE_ADDR='10.0.0.1').status_code == 429
+        assert api_client.get('/api/products/', REMOTE_ADDR='10.0.0.2').status_code == 200
+
+    def test_write_buckets_leave_reads_alone(self, api_client, user, rates):
+        rates(product_write='1/min:1')
+        api_client.force_authenticate(user=user)
+        product = {'name': 'Kettle', 'description': 'd', 'price': '10.00'}
+        assert api_client.post('/api/products/', product).status_code == 201
+        assert api_client.post('/api/products/', product).status_code == 429
+        assert api_client.post('/api/chat/history/', {'user_message': 'hi', 'ai_response': 'hello'}).status_code == 201
+        assert api_client.get('/api/products/list_internal/').status_code == 200
+
+    def test_async_views_are_throttled(self, rates):
+        rates(anon_read='1/min:1')
+        client = AsyncClient()
+        assert async_to_sync(client.get)('/api/products/async/').status_code == 200
+        response = async_to_sync(client.get)('/api/products/async/')
+        assert response.status_code == 429 and response['Retry-After'] == '60'
@@ -35,14 +35,16 @@ export async function POST(request: Request) {
         // Fetch products from your backend
         const apiUrl = getBackendUrl();
 
-        // Fetch products for context
+        // Fetch only the products relevant to this message
         const productsResponse = await fetch(
-            `${apiUrl}/products/list_internal/?business=${businessId}`,
+            `${apiUrl}/chat/context/`,
             {
+                method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                     'Authorization': request.headers.get('Authorization') || '',
                 },
+                body: JSON.stringify({ message, k: 8 }),
             }
         );
 
@@ -50,8 +52,8 @@ export async function POST(request: Request) {
             console.error('❌ Failed to fetch products:', productsResponse.status);
         }
 
-        const productsData = productsResponse.ok ? await productsResponse.json() : [];
-        const products = Array.isArray(productsData) ? productsData : (productsData.results || []);
+        const productsData = productsResponse.ok ? await productsResponse.json() : {};
+        const products = productsData.results || [];
 
         console.log(`🤖 Found ${products.length} products`);
 